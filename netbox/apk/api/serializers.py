@@ -1,6 +1,8 @@
+from rest_framework import serializers
+
 from netbox.api.serializers import NetBoxModelSerializer
 
-from ..models import APK
+from ..models import APK, APKRollup
 
 
 class APKSerializer(NetBoxModelSerializer):
@@ -47,3 +49,19 @@ class APKDRSSerializer(NetBoxModelSerializer):
             'last_updated',
             'tags',
         ]
+
+
+class APKRollupSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = APKRollup
+        fields = [
+            'type',
+            'operator',
+            'region',
+            'apk_count',
+            'ports_count',
+            'capacity',
+            'avg_traffic',
+            'device_count',
+            'last_updated',
+        ]
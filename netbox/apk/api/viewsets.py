@@ -1,13 +1,27 @@
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
 from netbox.api.viewsets import NetBoxModelViewSet
 
-from ..models import APK
-from .serializers import APKSerializer, APKDRSSerializer
+from ..models import APK, APKRollup
+from .serializers import APKSerializer, APKDRSSerializer, APKRollupSerializer
 
 
 class APKViewSet(NetBoxModelViewSet):
     queryset = APK.objects.order_by('name', 'pk')
     serializer_class = APKSerializer
 
+    @action(detail=False, methods=['get'])
+    def totals(self, request):
+        """
+        Количество APK, портов, емкость, трафик и устройства по типу, региону и оператору
+        Читается из готовых агрегатов APKRollup; ?type=DRS оставляет один тип APK
+        """
+        rollups = APKRollup.objects.all()
+        if apk_type := request.query_params.get('type'):
+            rollups = rollups.filter(type__iexact=apk_type)
+        return Response(APKRollupSerializer(rollups, many=True).data)
+
 
 class APKDRSViewSet(NetBoxModelViewSet):
     # Показываем только объекты, где type равен 'DRS'
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from apk.rollups import rebuild_rollups
+
+
+class Command(BaseCommand):
+    help = "Пересчитать агрегаты APKRollup по всем APK (если изменения прошли мимо сигналов, например bulk_create)"
+
+    def handle(self, *args, **options):
+        groups = rebuild_rollups()
+        self.stdout.write(self.style.SUCCESS(f"✅ Пересчитано групп: {groups}"))
@@ -0,0 +1,185 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations, models
+
+# Старое текстовое поле -> новое числовое
+FIELDS = {
+    'ports_count_text': 'ports_count',
+    'capacity_text': 'capacity',
+    'avg_traffic_text': 'avg_traffic',
+}
+
+# "1 000,5 Гбит/с" -> число "1 000,5" и единица "Гбит/с"
+VALUE_RE = re.compile(r'(?P<number>\d[\d\s.,]*?)\s*(?P<unit>[^\d\s.,][^\d]*)?', re.IGNORECASE)
+# Множитель к Gbps; единица без приставки ("100") уже в Gbps, как колонка Capacity (Gbps)
+UNIT_RE = re.compile(r'(?P<prefix>[kmgtкмгт])?(?:b|bit|bits|б|бит)?(?:/s|/с|ps)?', re.IGNORECASE)
+UNIT_PREFIXES = {
+    'k': Decimal('0.000001'), 'к': Decimal('0.000001'),
+    'm': Decimal('0.001'), 'м': Decimal('0.001'),
+    'g': Decimal(1), 'г': Decimal(1),
+    't': Decimal(1000), 'т': Decimal(1000),
+}
+PORT_UNITS = ('', 'шт', 'pcs', 'ports', 'порт', 'порта', 'портов')
+MAX_DECIMAL = Decimal(10) ** 10
+MAX_INTEGER = 2 ** 31 - 1
+
+
+def parse_decimal(number):
+    """
+    "1 000,5" / "1,000.5" / "1.000,5" -> Decimal("1000.5"); "1,000" -> 1000, "2,5" -> 2.5
+
+    Запятая с группами по три цифры - разделитель тысяч, иначе десятичная.
+    """
+    number = re.sub(r'\s', '', number)
+    if ',' in number and '.' in number:
+        decimal = ',' if number.rfind(',') > number.rfind('.') else '.'
+        number = number.replace('.' if decimal == ',' else ',', '').replace(decimal, '.')
+    elif re.fullmatch(r'\d{1,3}([,.])\d{3}(\1\d{3})*', number) and (',' in number or number.count('.') > 1):
+        number = number.replace(',', '').replace('.', '')
+    else:
+        number = number.replace(',', '.')
+    if not re.fullmatch(r'\d+(\.\d+)?', number):
+        raise ValueError('not a number')
+    return Decimal(number)
+
+
+def parse_number(value, integer=False):
+    """
+    Значение из текстового поля APK или None для пустого
+
+    Скорость приводится к Gbps: "400 Mbps" -> 0.4, "1,5 Тбит/с" -> 1500.
+
+    Raises:
+        ValueError: значение нельзя перенести без потерь (несколько чисел, неизвестная единица, дробные порты)
+    """
+    value = (value or '').strip()
+    if not value:
+        return None
+    match = VALUE_RE.fullmatch(value)
+    if not match:
+        raise ValueError('not a number')
+    try:
+        number = parse_decimal(match.group('number'))
+    except InvalidOperation:
+        raise ValueError('not a number')
+    unit = re.sub(r'\s', '', match.group('unit') or '').rstrip('.').lower()
+
+    if integer:
+        if unit not in PORT_UNITS:
+            raise ValueError(f'unknown unit {unit!r}')
+        if number != number.to_integral_value() or number > MAX_INTEGER:
+            raise ValueError('not a whole number of ports')
+        return int(number)
+
+    unit_match = UNIT_RE.fullmatch(unit)
+    if not unit_match or (unit and not unit_match.group('prefix')):
+        raise ValueError(f'unknown unit {unit!r}')
+    if unit:
+        number *= UNIT_PREFIXES[unit_match.group('prefix').lower()]
+    if number >= MAX_DECIMAL:
+        raise ValueError(f'{number} Gbps is out of range')
+    rounded = number.quantize(Decimal('0.01'))
+    if rounded != number:
+        raise ValueError(f'{number} Gbps does not fit 2 decimal places')
+    return rounded
+
+
+def backfill_numbers(apps, schema_editor):
+    """
+    Переносит значения в числовые поля
+
+    Если хоть одно значение не разбирается, миграция падает со списком таких APK:
+    текстовые колонки удаляются следующими операциями, и молча сбросить значение
+    нельзя. Исправьте значения (или очистите их) и запустите migrate снова.
+    """
+    APK = apps.get_model('apk', 'APK')
+    objects = list(APK.objects.only('pk', 'name', *FIELDS).order_by('pk'))
+
+    errors = []
+    for obj in objects:
+        for text_field, field in FIELDS.items():
+            value = getattr(obj, text_field)
+            try:
+                number = parse_number(value, integer=(field == 'ports_count'))
+            except ValueError as e:
+                errors.append(f'  APK {obj.pk} {obj.name!r}: {field}={value!r} ({e})')
+                continue
+            setattr(obj, field, number)
+
+    if errors:
+        raise ValueError(
+            f'Can not convert {len(errors)} APK value(s) to numbers, the migration was not applied:\n'
+            + '\n'.join(errors)
+            + '\nFix or clear these values and run migrate again.'
+        )
+
+    APK.objects.bulk_update(objects, list(FIELDS.values()), batch_size=1000)
+
+
+def restore_text(apps, schema_editor):
+    APK = apps.get_model('apk', 'APK')
+    objects = list(APK.objects.only('pk', *FIELDS.values()))
+
+    for obj in objects:
+        for text_field, field in FIELDS.items():
+            value = getattr(obj, field)
+            setattr(obj, text_field, None if value is None else str(value))
+
+    APK.objects.bulk_update(objects, list(FIELDS), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apk', '0008_add_avg_traffic_retention_period_to_apk'),
+    ]
+
+    operations = [
+        migrations.RenameField(
+            model_name='apk',
+            old_name='ports_count',
+            new_name='ports_count_text',
+        ),
+        migrations.RenameField(
+            model_name='apk',
+            old_name='capacity',
+            new_name='capacity_text',
+        ),
+        migrations.RenameField(
+            model_name='apk',
+            old_name='avg_traffic',
+            new_name='avg_traffic_text',
+        ),
+        migrations.AddField(
+            model_name='apk',
+            name='ports_count',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='apk',
+            name='capacity',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='apk',
+            name='avg_traffic',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True),
+        ),
+        migrations.RunPython(
+            code=backfill_numbers,
+            reverse_code=restore_text,
+        ),
+        migrations.RemoveField(
+            model_name='apk',
+            name='ports_count_text',
+        ),
+        migrations.RemoveField(
+            model_name='apk',
+            name='capacity_text',
+        ),
+        migrations.RemoveField(
+            model_name='apk',
+            name='avg_traffic_text',
+        ),
+    ]
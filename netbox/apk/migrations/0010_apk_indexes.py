@@ -0,0 +1,27 @@
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apk', '0009_apk_typed_numeric_fields'),
+        ('dcim', '0215_rackreservation_status'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='apk',
+            index=models.Index(fields=['region', 'operator'], name='apk_apk_region_operator'),
+        ),
+        migrations.AddIndex(
+            model_name='apk',
+            index=models.Index(django.db.models.functions.text.Upper('type'), name='apk_apk_type_upper'),
+        ),
+        # Устройства связаны с APK через custom field: APK.get_devices фильтрует
+        # custom_field_data -> 'APK' = pk, без индекса это seq scan по dcim_device
+        migrations.RunSQL(
+            sql="CREATE INDEX IF NOT EXISTS apk_device_cf_apk ON dcim_device ((custom_field_data -> 'APK'))",
+            reverse_sql="DROP INDEX IF EXISTS apk_device_cf_apk",
+        ),
+    ]
@@ -0,0 +1,72 @@
+from django.db import migrations, models
+
+
+def build_rollups(apps, schema_editor):
+    """Первичное заполнение агрегатов по уже существующим APK"""
+    from decimal import Decimal
+
+    APK = apps.get_model('apk', 'APK')
+    APKRollup = apps.get_model('apk', 'APKRollup')
+    Device = apps.get_model('dcim', 'Device')
+
+    apks = list(APK.objects.values_list('pk', 'type', 'region', 'operator', 'ports_count', 'capacity', 'avg_traffic'))
+    device_counts = {}
+    for value in Device.objects.filter(custom_field_data__has_key='APK').values_list('custom_field_data__APK', flat=True):
+        try:
+            pk = int(value)
+        except (TypeError, ValueError):
+            continue
+        device_counts[pk] = device_counts.get(pk, 0) + 1
+
+    rollups = {}
+    for pk, apk_type, region, operator, ports_count, capacity, avg_traffic in apks:
+        key = (apk_type or '', region or '', operator or '')
+        rollup = rollups.setdefault(key, APKRollup(
+            type=key[0], region=key[1], operator=key[2],
+            apk_count=0, ports_count=0, capacity=Decimal(0), avg_traffic=Decimal(0), device_count=0,
+        ))
+        rollup.apk_count += 1
+        rollup.ports_count += ports_count or 0
+        rollup.capacity += capacity or 0
+        rollup.avg_traffic += avg_traffic or 0
+        rollup.device_count += device_counts.get(pk, 0)
+
+    APKRollup.objects.bulk_create(rollups.values())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('apk', '0010_apk_indexes'),
+        ('dcim', '0215_rackreservation_status'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='APKRollup',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('type', models.CharField(blank=True, max_length=255)),
+                ('region', models.CharField(blank=True, max_length=255)),
+                ('operator', models.CharField(blank=True, max_length=255)),
+                ('apk_count', models.PositiveIntegerField(default=0)),
+                ('ports_count', models.PositiveBigIntegerField(default=0)),
+                ('capacity', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('avg_traffic', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('device_count', models.PositiveIntegerField(default=0)),
+                ('last_updated', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'ordering': ('type', 'region', 'operator'),
+                'constraints': [
+                    models.UniqueConstraint(
+                        fields=('type', 'region', 'operator'), name='apk_apkrollup_unique_group'
+                    ),
+                ],
+            },
+        ),
+        migrations.RunPython(
+            code=build_rollups,
+            reverse_code=migrations.RunPython.noop,
+        ),
+    ]
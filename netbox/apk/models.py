@@ -1,7 +1,54 @@
+from functools import partial
+
 from django.db import models
+from django.db.models import Count, Func, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Upper
 from django.urls import reverse
 from dcim.models import Device
 from netbox.models import NetBoxModel
+from utilities.querysets import RestrictedQuerySet
+
+from .type_map import DEFAULT_URL_PREFIX, apk_type_map, get_url_prefix
+
+
+class hybridmethod:
+    """
+    Метод, который получает и модель, и экземпляр (None, если вызван у модели)
+
+    get_action_url() из NetBox вызывает _get_action_url и у модели, и у объекта,
+    classmethod теряет объект, а с ним и тип APK.
+    """
+
+    def __init__(self, func):
+        self.func = func
+
+    def __get__(self, obj, cls):
+        return partial(self.func, cls, obj)
+
+
+class APKQuerySet(RestrictedQuerySet):
+
+    def with_device_count(self):
+        """
+        Добавляет device_count одним подзапросом вместо get_devices().count() на каждую строку таблицы
+        """
+        field = f'custom_field_data__{APK.CUSTOMFIELD_SLUG}'
+        # Значение custom field хранится в jsonb, поэтому pk сравниваем как to_jsonb(pk) - так работает индекс
+        devices = Device.objects.filter(
+            **{field: Func(OuterRef('pk'), function='to_jsonb', output_field=models.JSONField())}
+        ).order_by().values(field).annotate(c=Count('*')).values('c')
+        return self.annotate(device_count=Coalesce(Subquery(devices), 0))
+
+    def totals(self):
+        """
+        Суммы емкости по региону и оператору одним GROUP BY (индекс region, operator)
+        """
+        return self.values('region', 'operator').annotate(
+            apk_count=Count('pk'),
+            total_ports=Sum('ports_count'),
+            total_capacity=Sum('capacity'),
+            total_avg_traffic=Sum('avg_traffic'),
+        ).order_by('region', 'operator')
 
 
 class APK(NetBoxModel):
@@ -13,12 +60,21 @@ class APK(NetBoxModel):
     contract = models.CharField(max_length=255, blank=True)
     ttx = models.CharField(max_length=255, blank=True)
     port_type = models.CharField(max_length=255, blank=True)
-    ports_count = models.CharField(max_length=255, blank=True, null=True)
-    capacity = models.CharField(max_length=255, blank=True, null=True)
-    avg_traffic = models.CharField(max_length=255, blank=True, null=True)
+    ports_count = models.PositiveIntegerField(blank=True, null=True)
+    capacity = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
+    avg_traffic = models.DecimalField(max_digits=12, decimal_places=2, blank=True, null=True)
     retention_period = models.CharField(max_length=255, blank=True, null=True)
     CUSTOMFIELD_SLUG = 'APK'
 
+    objects = APKQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=('region', 'operator'), name='apk_apk_region_operator'),
+            # Списки DRS/Rubej/HSI фильтруются по type__iexact
+            models.Index(Upper('type'), name='apk_apk_type_upper'),
+        )
+
     def __str__(self) -> str:
         t = (self.type or '').strip()
         if t.lower() == "drs":
@@ -40,7 +96,7 @@ class APK(NetBoxModel):
 
 
     def get_devices(self):
-        # Ищем устройства, связанные через общее поле APK
+        # Ищем устройства, связанные через общее поле APK (индекс apk_device_cf_apk, миграция 0010)
         return Device.objects.filter(**{f'custom_field_data__{self.CUSTOMFIELD_SLUG}': self.pk})
 
     def get_device_filter_url(self):
@@ -49,82 +105,63 @@ class APK(NetBoxModel):
 
     def get_absolute_url(self):
         # Определяем URL в зависимости от типа
-        if self.type and self.type.lower() == 'drs':
-            return reverse('plugins:apk:apk_drs', args=[self.pk])
-        elif self.type and self.type.lower() == 'rubej':
-            return reverse('plugins:apk:apk_rubej', args=[self.pk])
-        return reverse('plugins:apk:apk_hsi', args=[self.pk])
-
-    @classmethod
-    def _get_action_url(cls, action, rest_api=False, kwargs=None):
+        return reverse(f'plugins:apk:apk_{get_url_prefix(self.type)}', args=[self.pk])
+
+    @hybridmethod
+    def _get_action_url(cls, obj, action, rest_api=False, kwargs=None):
         """
         Переопределяет стандартное построение URL для модели APK.
-        URL определяется динамически на основе типа объекта.
+        URL определяется по типу объекта: если метод вызван у экземпляра, тип берется из него,
+        если у модели с pk - из карты pk -> тип (apk_type_map), без запроса в базу на каждую ссылку.
         """
         if kwargs is None:
             kwargs = {}
-        
-        # Если передан pk, проверяем тип объекта
-        pk = kwargs.get('pk')
-        obj_type = None
-        if pk:
-            try:
-                obj = cls.objects.get(pk=pk)
-                obj_type = obj.type.lower() if obj.type else None
-            except cls.DoesNotExist:
-                pass
 
         if rest_api:
             # Для REST API используем стандартный формат
-            viewname = f'plugins-api:apk-api:apk'
+            viewname = 'plugins-api:apk-api:apk'
             if action:
                 viewname = f'{viewname}-{action}'
+            return reverse(viewname, kwargs=kwargs)
+
+        # Для веб-интерфейса используем кастомные имена URL в зависимости от типа
+        if obj is not None:
+            prefix = get_url_prefix(obj.type)
+        elif kwargs.get('pk'):
+            prefix = apk_type_map.get_url_prefix(kwargs['pk'])
         else:
-            # Для веб-интерфейса используем кастомные имена URL в зависимости от типа
-            if obj_type == 'drs':
-                action_map = {
-                    'list': 'plugins:apk:apk_drs_list',
-                    'add': 'plugins:apk:apk_drs_add',
-                    'edit': 'plugins:apk:apk_drs_edit',
-                    'delete': 'plugins:apk:apk_drs_delete',
-                    'changelog': 'plugins:apk:apk_drs_changelog',
-                    'bulk_delete': 'plugins:apk:apk_drs_bulk_delete',
-                }
-                if action is None or action == '':
-                    viewname = 'plugins:apk:apk_drs'
-                else:
-                    viewname = action_map.get(action)
-                    if viewname is None:
-                        viewname = f'plugins:apk:apk_drs_{action}'
-            elif obj_type == 'rubej':
-                action_map = {
-                    'list': 'plugins:apk:apk_rubej_list',
-                    'add': 'plugins:apk:apk_rubej_add',
-                    'edit': 'plugins:apk:apk_rubej_edit',
-                    'delete': 'plugins:apk:apk_rubej_delete',
-                    'changelog': 'plugins:apk:apk_rubej_changelog',
-                    'bulk_delete': 'plugins:apk:apk_rubej_bulk_delete',
-                }
-                if action is None or action == '':
-                    viewname = 'plugins:apk:apk_rubej'
-                else:
-                    viewname = action_map.get(action)
-                    if viewname is None:
-                        viewname = f'plugins:apk:apk_rubej_{action}'
-            else:
-                action_map = {
-                    'list': 'plugins:apk:apk_hsi_list',
-                    'add': 'plugins:apk:apk_hsi_add',
-                    'edit': 'plugins:apk:apk_hsi_edit',
-                    'delete': 'plugins:apk:apk_hsi_delete',
-                    'changelog': 'plugins:apk:apk_hsi_changelog',
-                    'bulk_delete': 'plugins:apk:apk_hsi_bulk_delete',
-                }
-                if action is None or action == '':
-                    viewname = 'plugins:apk:apk_hsi'
-                else:
-                    viewname = action_map.get(action)
-                    if viewname is None:
-                        viewname = f'plugins:apk:apk_hsi_{action}'
-        
+            prefix = DEFAULT_URL_PREFIX
+
+        viewname = f'plugins:apk:apk_{prefix}'
+        if action:
+            viewname = f'{viewname}_{action}'
+
         return reverse(viewname, kwargs=kwargs)
+
+
+class APKRollup(models.Model):
+    """
+    Агрегаты по APK на группу (type, region, operator)
+
+    Производная таблица: поддерживается сигналами (см. signals.py и rollups.py),
+    чтобы итоги на дашборде и в API читались за один запрос без суммирования всех APK.
+    """
+    id = models.BigAutoField(primary_key=True)
+    type = models.CharField(max_length=255, blank=True)
+    region = models.CharField(max_length=255, blank=True)
+    operator = models.CharField(max_length=255, blank=True)
+    apk_count = models.PositiveIntegerField(default=0)
+    ports_count = models.PositiveBigIntegerField(default=0)
+    capacity = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    avg_traffic = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    device_count = models.PositiveIntegerField(default=0)
+    last_updated = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ('type', 'region', 'operator')
+        constraints = (
+            models.UniqueConstraint(fields=('type', 'region', 'operator'), name='apk_apkrollup_unique_group'),
+        )
+
+    def __str__(self) -> str:
+        return f"{self.type} {self.region} {self.operator}".strip()
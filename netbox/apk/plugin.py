@@ -9,4 +9,8 @@ class ApkConfig(PluginConfig):
     author_email = 'vkim@tashsoftcom.uz'
     base_url = 'apk'
 
+    def ready(self):
+        super().ready()
+        from . import signals, widgets  # noqa: F401
+
 config = ApkConfig
@@ -0,0 +1,121 @@
+from decimal import Decimal
+
+from django.db import transaction
+from django.db.models import Count, Q
+
+from dcim.models import Device
+
+from .models import APK, APKRollup
+
+ROLLUP_FIELDS = ('apk_count', 'ports_count', 'capacity', 'avg_traffic', 'device_count')
+
+
+def get_group_key(apk):
+    """Ключ агрегата: (type, region, operator) как они записаны в APK"""
+    return apk.type or '', apk.region or '', apk.operator or ''
+
+
+def get_apk_pk(custom_field_data):
+    """pk APK из custom field устройства или None"""
+    value = (custom_field_data or {}).get(APK.CUSTOMFIELD_SLUG)
+    try:
+        return int(value) if value not in (None, '') else None
+    except (TypeError, ValueError):
+        return None
+
+
+def count_devices(apk_pks):
+    """{pk APK: число устройств} одним запросом по индексу custom_field_data -> 'APK'"""
+    if not apk_pks:
+        return {}
+    field = f'custom_field_data__{APK.CUSTOMFIELD_SLUG}'
+    counts = Device.objects.filter(**{f'{field}__in': list(apk_pks)}).order_by().values(field).annotate(
+        count=Count('*')
+    ).values_list(field, 'count')
+    return {int(pk): count for pk, count in counts}
+
+
+def compute_rollups(queryset):
+    """
+    Считает агрегаты по APK из queryset
+
+    Returns:
+        dict: {(type, region, operator): APKRollup} - еще не сохраненные объекты
+    """
+    apks = list(queryset.values_list('pk', 'type', 'region', 'operator', 'ports_count', 'capacity', 'avg_traffic'))
+    device_counts = count_devices([apk[0] for apk in apks])
+
+    rollups = {}
+    for pk, apk_type, region, operator, ports_count, capacity, avg_traffic in apks:
+        key = (apk_type or '', region or '', operator or '')
+        rollup = rollups.get(key)
+        if rollup is None:
+            rollup = rollups[key] = APKRollup(
+                type=key[0], region=key[1], operator=key[2],
+                apk_count=0, ports_count=0, capacity=Decimal(0), avg_traffic=Decimal(0), device_count=0,
+            )
+        rollup.apk_count += 1
+        rollup.ports_count += ports_count or 0
+        rollup.capacity += capacity or 0
+        rollup.avg_traffic += avg_traffic or 0
+        rollup.device_count += device_counts.get(pk, 0)
+
+    return rollups
+
+
+def refresh_rollups(keys):
+    """
+    Пересчитывает агрегаты только для затронутых групп (type, region, operator)
+
+    Группа читается по индексу, так что цена не зависит от общего числа APK.
+    Опустевшие группы удаляются.
+    """
+    keys = {key for key in keys if key is not None}
+    if not keys:
+        return
+
+    query = Q()
+    for apk_type, region, operator in keys:
+        query |= Q(type=apk_type, region=region, operator=operator)
+    rollups = compute_rollups(APK.objects.filter(query))
+
+    with transaction.atomic():
+        if rollups:
+            # Upsert: параллельные пересчеты одной группы не падают на unique constraint
+            APKRollup.objects.bulk_create(
+                rollups.values(),
+                update_conflicts=True,
+                unique_fields=('type', 'region', 'operator'),
+                update_fields=(*ROLLUP_FIELDS, 'last_updated'),
+            )
+        empty = keys - set(rollups)
+        if empty:
+            query = Q()
+            for apk_type, region, operator in empty:
+                query |= Q(type=apk_type, region=region, operator=operator)
+            APKRollup.objects.filter(query).delete()
+
+
+def refresh_apk_rollups(apk_pks):
+    """Пересчитывает группы, в которые входят APK с указанными pk"""
+    apk_pks = {pk for pk in apk_pks if pk is not None}
+    if apk_pks:
+        groups = APK.objects.filter(pk__in=apk_pks).values_list('type', 'region', 'operator')
+        refresh_rollups({
+            (apk_type or '', region or '', operator or '')
+            for apk_type, region, operator in groups
+        })
+
+
+def rebuild_rollups():
+    """
+    Полный пересчет всех агрегатов (после миграции или если сигналы были пропущены, например bulk_create)
+
+    Returns:
+        int: количество групп
+    """
+    rollups = compute_rollups(APK.objects.all())
+    with transaction.atomic():
+        APKRollup.objects.all().delete()
+        APKRollup.objects.bulk_create(rollups.values())
+    return len(rollups)
@@ -0,0 +1,91 @@
+from django.db.models.signals import post_delete, post_init, post_save, pre_save
+from django.dispatch import receiver
+
+from dcim.models import Device
+
+from .models import APK
+from .rollups import get_apk_pk, get_group_key, refresh_apk_rollups, refresh_rollups
+from .type_map import invalidate_apk_type_map
+
+
+@receiver((post_save, post_delete), sender=APK)
+def clear_apk_type_map(sender, **kwargs):
+    """Сбрасывает карту pk -> тип при любом изменении APK"""
+    invalidate_apk_type_map()
+
+
+#
+# Агрегаты APKRollup
+#
+# Прежние группа APK и APK устройства запоминаются при загрузке объекта (post_init),
+# чтобы сохранение не делало лишний SELECT. Запрос остается только для объектов,
+# загруженных без нужных полей (only()/defer()).
+#
+
+APK_GROUP_FIELDS = ('type', 'region', 'operator')
+
+
+@receiver(post_init, sender=APK)
+def init_apk_group(sender, instance, **kwargs):
+    if instance.pk is not None and all(field in instance.__dict__ for field in APK_GROUP_FIELDS):
+        instance._rollup_group = get_group_key(instance)
+
+
+@receiver(pre_save, sender=APK)
+def remember_apk_group(sender, instance, **kwargs):
+    """Запоминает прежнюю группу APK: при смене типа/региона/оператора пересчитываем обе"""
+    if not instance.pk:
+        instance._rollup_group = None
+    elif not hasattr(instance, '_rollup_group'):
+        old = APK.objects.filter(pk=instance.pk).values_list(*APK_GROUP_FIELDS).first()
+        instance._rollup_group = tuple(value or '' for value in old) if old else None
+
+
+@receiver(post_save, sender=APK)
+def update_apk_rollup(sender, instance, update_fields=None, **kwargs):
+    refresh_rollups({instance._rollup_group, get_group_key(instance)})
+    if update_fields is None or set(APK_GROUP_FIELDS) & set(update_fields):
+        instance._rollup_group = get_group_key(instance)
+
+
+@receiver(post_delete, sender=APK)
+def delete_apk_rollup(sender, instance, **kwargs):
+    refresh_rollups({get_group_key(instance)})
+
+
+@receiver(post_init, sender=Device)
+def init_device_apk(sender, instance, **kwargs):
+    if instance.pk is not None and 'custom_field_data' in instance.__dict__:
+        instance._rollup_apk = get_apk_pk(instance.custom_field_data)
+
+
+@receiver(pre_save, sender=Device)
+def remember_device_apk(sender, instance, update_fields=None, **kwargs):
+    """
+    Запоминает прежний APK устройства
+
+    Сохранения без custom_field_data (например, серийный номер после сканирования) пропускаются.
+    """
+    instance._rollup_skip = update_fields is not None and 'custom_field_data' not in update_fields
+    if instance._rollup_skip:
+        return
+    if not instance.pk:
+        instance._rollup_apk = None
+    elif not hasattr(instance, '_rollup_apk'):
+        custom_fields = Device.objects.filter(pk=instance.pk).values_list('custom_field_data', flat=True).first()
+        instance._rollup_apk = get_apk_pk(custom_fields)
+
+
+@receiver(post_save, sender=Device)
+def update_device_apk_rollup(sender, instance, created, **kwargs):
+    if getattr(instance, '_rollup_skip', False):
+        return
+    old_apk, new_apk = getattr(instance, '_rollup_apk', None), get_apk_pk(instance.custom_field_data)
+    if created or old_apk != new_apk:
+        refresh_apk_rollups({old_apk, new_apk})
+    instance._rollup_apk = new_apk
+
+
+@receiver(post_delete, sender=Device)
+def delete_device_apk_rollup(sender, instance, **kwargs):
+    refresh_apk_rollups({get_apk_pk(instance.custom_field_data)})
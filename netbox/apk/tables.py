@@ -5,7 +5,7 @@ from .models import APK
 
 
 class APKTable(NetBoxTable):
-    devices = tables.Column(verbose_name=('Devices'), empty_values=())
+    devices = tables.Column(verbose_name=('Devices'), accessor='device_count', empty_values=())
     capacity  = tables.Column(verbose_name='Capacity (Gbps)')
     ttx = tables.Column(verbose_name='TTX (Gbps)')
 
@@ -16,14 +16,17 @@ class APKTable(NetBoxTable):
         default_columns = ('name', 'type', 'operator', 'region', 'contract', 'ttx', 'port_type', 'ports_count', 'capacity', 'devices')
         
     def render_devices(self, record):
-        count = record.get_devices().count()
+        # device_count добавляет with_device_count(); в подтверждении массового удаления его нет
+        count = getattr(record, 'device_count', None)
+        if count is None:
+            count = record.get_devices().count()
         if count == 0:
             return '—'
         return format_html('<a href="{}">{}</a>', record.get_device_filter_url(), count)
 
 
 class APKDRSTable(NetBoxTable):
-    devices = tables.Column(verbose_name=('Devices'), empty_values=())
+    devices = tables.Column(verbose_name=('Devices'), accessor='device_count', empty_values=())
     
     class Meta(NetBoxTable.Meta):
         model = APK  # Работаем с той же моделью APK
@@ -31,7 +34,10 @@ class APKDRSTable(NetBoxTable):
         default_columns = ('name', 'type', 'operator', 'region', 'contract', 'avg_traffic', 'retention_period', 'devices')
 
     def render_devices(self, record):
-        count = record.get_devices().count()
+        # device_count добавляет with_device_count(); в подтверждении массового удаления его нет
+        count = getattr(record, 'device_count', None)
+        if count is None:
+            count = record.get_devices().count()
         if count == 0:
             return '—'
         return format_html('<a href="{}">{}</a>', record.get_device_filter_url(), count)
@@ -39,7 +45,7 @@ class APKDRSTable(NetBoxTable):
         
 
 class APKRubejTable(NetBoxTable):
-    devices = tables.Column(verbose_name=('Devices'), empty_values=())
+    devices = tables.Column(verbose_name=('Devices'), accessor='device_count', empty_values=())
     
     class Meta(NetBoxTable.Meta):
         model = APK
@@ -47,7 +53,10 @@ class APKRubejTable(NetBoxTable):
         default_columns = ('type', 'operator', 'region', 'contract', 'devices')
 
     def render_devices(self, record):
-        count = record.get_devices().count()
+        # device_count добавляет with_device_count(); в подтверждении массового удаления его нет
+        count = getattr(record, 'device_count', None)
+        if count is None:
+            count = record.get_devices().count()
         if count == 0:
             return '—'
         return format_html('<a href="{}">{}</a>', record.get_device_filter_url(), count)
\ No newline at end of file
@@ -0,0 +1,82 @@
+import threading
+import uuid
+
+from django.core.cache import cache
+
+# Версия карты в общем Django cache (Redis): меняется при любом изменении APK,
+# чтобы все процессы перечитали свои локальные копии
+CACHE_VERSION_KEY = "apk:types:version"
+
+# Тип APK -> префикс имен URL (plugins:apk:apk_<prefix>_<action>)
+URL_PREFIXES = {
+    "drs": "drs",
+    "rubej": "rubej",
+}
+DEFAULT_URL_PREFIX = "hsi"
+
+
+def get_url_prefix(apk_type):
+    """DRS -> drs, Rubej -> rubej, все остальное -> hsi"""
+    return URL_PREFIXES.get((apk_type or "").strip().lower(), DEFAULT_URL_PREFIX)
+
+
+class APKTypeMap:
+    """
+    Карта pk -> префикс URL для построения ссылок по pk без запроса объекта
+
+    Все APK читаются одним запросом (их сотни, не миллионы), дальше поиск идет по словарю.
+    Карта сбрасывается сигналами при изменении APK (см. signals.py),
+    другие процессы узнают об изменении по версии в Django cache.
+    Неизвестный pk перечитывает карту не больше одного раза на версию:
+    ссылки на удаленные APK не должны делать запрос на каждую ссылку.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._prefixes = None
+        self._version = None
+        # Карта уже перечитывалась из-за неизвестного pk в текущей версии
+        self._reloaded = False
+
+    def clear(self):
+        with self._lock:
+            self._prefixes = None
+
+    def _load(self, reload=False):
+        version = cache.get(CACHE_VERSION_KEY)
+        with self._lock:
+            if version != self._version:
+                self._reloaded = False
+            stale = self._prefixes is None or version != self._version
+            if reload and not stale:
+                if self._reloaded:
+                    return self._prefixes
+                self._reloaded = True
+                stale = True
+            if stale:
+                from .models import APK
+                self._prefixes = {
+                    pk: get_url_prefix(apk_type)
+                    for pk, apk_type in APK.objects.values_list("pk", "type")
+                }
+                self._version = version
+            return self._prefixes
+
+    def get_url_prefix(self, pk):
+        prefixes = self._load()
+        try:
+            pk = int(pk)
+        except (TypeError, ValueError):
+            return DEFAULT_URL_PREFIX
+        if pk not in prefixes:
+            # Создан после загрузки карты, а сигнал пришел в другой процесс раньше, чем версия
+            prefixes = self._load(reload=True)
+        return prefixes.get(pk, DEFAULT_URL_PREFIX)
+
+
+apk_type_map = APKTypeMap()
+
+
+def invalidate_apk_type_map():
+    apk_type_map.clear()
+    cache.set(CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
@@ -32,4 +32,8 @@ urlpatterns += [
     path('rubej/<int:pk>/delete/', views.APKRubejDeleteView.as_view(), name='apk_rubej_delete'),
     path('rubej/<int:pk>/changelog/', views.APKRubejChangeLogView.as_view(), name='apk_rubej_changelog'),
     path('rubej/delete/', views.APKRubejBulkDeleteView.as_view(), name='apk_rubej_bulk_delete'),
-]
\ No newline at end of file
+]
+
+urlpatterns += [
+    path('rollup/', views.APKRollupView.as_view(), name='apk_rollup'),
+]
@@ -1,6 +1,9 @@
+from django.contrib.auth.mixins import LoginRequiredMixin, PermissionRequiredMixin
+from django.shortcuts import render
 from django.urls import reverse
+from django.views import View
 from netbox.views import generic
-from .models import APK
+from .models import APK, APKRollup
 from .tables import APKTable, APKDRSTable, APKRubejTable
 from .forms import APKForm, APKDRSForm, APKRubejForm
 from netbox.object_actions import AddObject, BulkDelete
@@ -8,7 +11,11 @@ from netbox.object_actions import AddObject, BulkDelete
 
 class APKHSIListView(generic.ObjectListView):
     # Показываем только объекты, где type не равен 'DRS' и не равен 'Rubej'
-    queryset = APK.objects.exclude(type__iexact='DRS').exclude(type__iexact='Rubej').order_by('name', 'pk')
+    queryset = (
+        APK.objects.exclude(type__iexact='DRS').exclude(type__iexact='Rubej')
+        .with_device_count()
+        .order_by('name', 'pk')
+    )
     table = APKTable
     actions = (AddObject, BulkDelete)
 
@@ -51,7 +58,7 @@ class BulkDeleteAPKDRS(BulkDelete):
 
 class APKDRSListView(generic.ObjectListView):
     # Показываем только объекты, где type равен 'DRS'
-    queryset = APK.objects.filter(type__iexact='DRS').order_by('name', 'pk')
+    queryset = APK.objects.filter(type__iexact='DRS').with_device_count().order_by('name', 'pk')
     table = APKDRSTable
     actions = (AddAPKDRSObject, BulkDeleteAPKDRS)
 
@@ -94,7 +101,7 @@ class BulkDeleteAPKRubej(BulkDelete):
 
 
 class APKRubejListView(generic.ObjectListView):
-    queryset = APK.objects.filter(type__iexact='Rubej').order_by('name', 'pk')
+    queryset = APK.objects.filter(type__iexact='Rubej').with_device_count().order_by('name', 'pk')
     table = APKRubejTable
     actions = (AddAPKRubejObject, BulkDeleteAPKRubej)
 
@@ -119,4 +126,16 @@ class APKRubejChangeLogView(generic.ObjectChangeLogView):
 
 class APKRubejBulkDeleteView(generic.BulkDeleteView):
     queryset = APK.objects.filter(type__iexact='Rubej').order_by('name', 'pk')
-    table = APKRubejTable
\ No newline at end of file
+    table = APKRubejTable
+
+
+class APKRollupView(LoginRequiredMixin, PermissionRequiredMixin, View):
+    """Итоги по типу, региону и оператору из готовых агрегатов APKRollup"""
+    template_name = 'apk/apk_rollup.html'
+    permission_required = 'apk.view_apk'
+
+    def get(self, request):
+        rollups = APKRollup.objects.all()
+        if apk_type := request.GET.get('type'):
+            rollups = rollups.filter(type__iexact=apk_type)
+        return render(request, self.template_name, {'rollups': rollups})
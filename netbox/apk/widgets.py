@@ -0,0 +1,37 @@
+from django import forms
+from django.template.loader import render_to_string
+from django.urls import reverse
+
+from extras.dashboard.utils import register_widget
+from extras.dashboard.widgets import DashboardWidget, WidgetConfigForm
+
+from .models import APKRollup
+
+
+@register_widget
+class APKRollupWidget(DashboardWidget):
+    default_title = 'APK Capacity'
+    description = 'Итоги APK по типу, региону и оператору: порты, емкость, трафик, устройства.'
+    template_name = 'apk/widgets/rollup.html'
+    width = 6
+    height = 4
+
+    class ConfigForm(WidgetConfigForm):
+        type = forms.CharField(
+            required=False,
+            help_text='Показывать только этот тип APK (DRS, Rubej, ...)'
+        )
+
+    def render(self, request):
+        if not request.user.has_perm('apk.view_apk'):
+            return render_to_string(self.template_name, {'rollups': None})
+
+        # Читаем готовые агрегаты: число строк = число групп, а не APK
+        rollups = APKRollup.objects.all()
+        if apk_type := self.config.get('type'):
+            rollups = rollups.filter(type__iexact=apk_type)
+
+        return render_to_string(self.template_name, {
+            'rollups': rollups,
+            'url': reverse('plugins:apk:apk_rollup'),
+        })
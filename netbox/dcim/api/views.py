@@ -1,4 +1,5 @@
 from django.contrib.contenttypes.prefetch import GenericPrefetch
+from django.db import router, transaction
 from django.http import Http404, HttpResponse
 from django.shortcuts import get_object_or_404
 from drf_spectacular.types import OpenApiTypes
@@ -12,6 +13,7 @@ from dcim import filtersets
 from dcim.constants import CABLE_TRACE_SVG_DEFAULT_WIDTH
 from dcim.models import *
 from dcim.svg import CableTraceSVG
+from dcim.utils import defer_cablepath_updates
 from extras.api.mixins import ConfigContextQuerySetMixin, RenderConfigMixin
 from netbox.api.authentication import IsAuthenticatedOrLoginNotRequired
 from netbox.api.metadata import ContentTypeMetadata
@@ -562,6 +564,16 @@ class CableViewSet(NetBoxModelViewSet):
     serializer_class = serializers.CableSerializer
     filterset_class = filtersets.CableFilterSet
 
+    # Trace each affected cable path once per request, after all cables have been saved
+
+    def perform_create(self, serializer):
+        with transaction.atomic(using=router.db_for_write(Cable)), defer_cablepath_updates():
+            super().perform_create(serializer)
+
+    def perform_bulk_update(self, objects, update_data, partial):
+        with transaction.atomic(using=router.db_for_write(Cable)), defer_cablepath_updates():
+            return super().perform_bulk_update(objects, update_data, partial)
+
 
 class CableTerminationViewSet(NetBoxModelViewSet):
     metadata_class = ContentTypeMetadata
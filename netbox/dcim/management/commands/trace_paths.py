@@ -1,10 +1,15 @@
+import itertools
+import multiprocessing
+from collections import defaultdict
+
 from django.core.management.base import BaseCommand
 from django.core.management.color import no_style
-from django.db import connection
+from django.db import connection, router, transaction
 from django.db.models import Q
 
+from core.models import ObjectType
 from dcim.models import CablePath, ConsolePort, ConsoleServerPort, Interface, PowerFeed, PowerOutlet, PowerPort
-from dcim.signals import create_cablepath
+from dcim.tracing import CableGraph, Untraceable
 
 ENDPOINT_MODELS = (
     ConsolePort,
@@ -15,6 +20,16 @@ ENDPOINT_MODELS = (
     PowerPort
 )
 
+# Number of CablePaths to create per transaction
+BATCH_SIZE = 1000
+
+# The CableGraph shared with worker processes (inherited on fork)
+_graph = None
+
+
+def _trace_many(origins):
+    return _graph.trace_many(origins)
+
 
 class Command(BaseCommand):
     help = "Generate any missing cable paths among all cable termination objects in NetBox"
@@ -28,6 +43,10 @@ class Command(BaseCommand):
             "--no-input", action='store_true', dest='no_input',
             help="Do not prompt user for any input/confirmation"
         )
+        parser.add_argument(
+            "--workers", type=int, default=1,
+            help="Number of processes among which to divide tracing (split by site)"
+        )
 
     def draw_progress_bar(self, percentage):
         """
@@ -54,9 +73,15 @@ class Command(BaseCommand):
                     self.stdout.write(self.style.SUCCESS("Aborting"))
                     return
 
-            # Delete all existing CablePath instances
+            # Delete all existing CablePath instances. Detach them from their origins first, so that they can be deleted
+            # in a single query rather than by the collector (which sends signals for each object).
             self.stdout.write(f"Deleting {paths_count} existing cable paths...")
-            deleted_count, _ = CablePath.objects.all().delete()
+            with transaction.atomic(using=router.db_for_write(CablePath)):
+                for model in ENDPOINT_MODELS:
+                    model.objects.filter(_path__isnull=False).update(_path=None)
+                with connection.cursor() as cursor:
+                    cursor.execute(f'DELETE FROM {connection.ops.quote_name(CablePath._meta.db_table)}')
+                    deleted_count = cursor.rowcount
             self.stdout.write((self.style.SUCCESS(f'  Deleted {deleted_count} paths')))
 
             # Reinitialize the model's PK sequence
@@ -66,6 +91,11 @@ class Command(BaseCommand):
                 for sql in sequence_sql:
                     cursor.execute(sql)
 
+        # Load all cabling into memory once
+        self.stdout.write('Loading cable graph...')
+        global _graph
+        _graph = CableGraph()
+
         # Retrace paths
         for model in ENDPOINT_MODELS:
             params = Q(cable__isnull=False)
@@ -79,12 +109,79 @@ class Command(BaseCommand):
                 self.stdout.write(f'Found no missing {model._meta.verbose_name} paths; skipping')
                 continue
             self.stdout.write(f'Retracing {origins_count} cabled {model._meta.verbose_name_plural}...')
-            i = 0
-            for i, obj in enumerate(origins, start=1):
-                create_cablepath([obj])
-                if not i % 100:
-                    self.draw_progress_bar(i * 100 / origins_count)
-            self.draw_progress_bar(100)
-            self.stdout.write(self.style.SUCCESS(f'\n  Retraced {i} {model._meta.verbose_name_plural}'))
+            results = self.trace(model, origins, options['workers'])
+            self.save_paths(model, results)
+            self.stdout.write(self.style.SUCCESS(f'\n  Retraced {len(results)} {model._meta.verbose_name_plural}'))
 
         self.stdout.write(self.style.SUCCESS('Finished.'))
+
+    @staticmethod
+    def trace(model, origins, workers=1):
+        """
+        Trace paths from the given origins against the in-memory graph, optionally dividing the origins by site among
+        several processes. Returns a list of (pk, result) tuples in the order of the origins.
+        """
+        object_type = ObjectType.objects.get_for_model(model).pk
+        site_field = 'power_panel__site_id' if model is PowerFeed else 'device__site_id'
+        fields = ['pk', 'cable_id', site_field]
+        if hasattr(model, 'wireless_link'):
+            fields.append('wireless_link_id')
+
+        pks = []
+        sites = defaultdict(list)
+        for i, (pk, cable_id, site_id, *wireless_link_id) in enumerate(origins.values_list(*fields)):
+            pks.append(pk)
+            # Paths over WirelessLinks are traced from the database
+            link = cable_id if cable_id or not any(wireless_link_id) else Untraceable
+            sites[site_id].append((i, (object_type, pk), link))
+
+        results = [None] * len(pks)
+        chunks = [
+            chunk[n:n + BATCH_SIZE] for chunk in sites.values() for n in range(0, len(chunk), BATCH_SIZE)
+        ]
+        if workers > 1 and len(chunks) > 1:
+            # Forked workers only read from the inherited graph and never use the database
+            with multiprocessing.get_context('fork').Pool(workers) as pool:
+                traced = pool.map(_trace_many, [
+                    [(origin, link) for _, origin, link in chunk if link is not Untraceable] for chunk in chunks
+                ])
+        else:
+            traced = [
+                _trace_many([(origin, link) for _, origin, link in chunk if link is not Untraceable])
+                for chunk in chunks
+            ]
+
+        for chunk, chunk_results in zip(chunks, traced):
+            chunk_results = iter(chunk_results)
+            for i, origin, link in chunk:
+                results[i] = Untraceable if link is Untraceable else next(chunk_results)
+
+        return list(zip(pks, results))
+
+    def save_paths(self, model, results):
+        """
+        Create CablePaths in bulk from the traced results, and record each path on its origin. Origins which could not
+        be traced in memory are traced from the database.
+        """
+        for n in range(0, len(results), BATCH_SIZE):
+            batch = results[n:n + BATCH_SIZE]
+            paths = []
+            for pk, result in batch:
+                if result is Untraceable:
+                    cablepath = CablePath.from_origin([model.objects.get(pk=pk)])
+                elif result is not None:
+                    path, is_complete, is_active, is_split = result
+                    cablepath = CablePath(path=path, is_complete=is_complete, is_active=is_active, is_split=is_split)
+                else:
+                    cablepath = None
+                if cablepath:
+                    cablepath._nodes = list(itertools.chain(*cablepath.path))
+                    paths.append((pk, cablepath))
+
+            with transaction.atomic(using=router.db_for_write(CablePath)):
+                CablePath.objects.bulk_create([cablepath for _, cablepath in paths])
+                model.objects.bulk_update(
+                    [model(pk=pk, _path_id=cablepath.pk) for pk, cablepath in paths],
+                    ['_path'],
+                )
+            self.draw_progress_bar((n + len(batch)) * 100 / len(results))
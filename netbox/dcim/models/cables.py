@@ -1,7 +1,9 @@
 import itertools
+from collections import defaultdict
 
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
 from django.core.exceptions import ValidationError
 from django.db import models
 from django.dispatch import Signal
@@ -537,6 +539,10 @@ class CablePath(models.Model):
     class Meta:
         verbose_name = _('cable path')
         verbose_name_plural = _('cable paths')
+        indexes = (
+            # Enables efficient containment (`_nodes__contains`) lookups when finding paths which traverse an object
+            GinIndex(fields=['_nodes']),
+        )
 
     def __str__(self):
         return f"Path #{self.pk}: {len(self.path)} hops"
@@ -598,11 +604,14 @@ class CablePath(models.Model):
         return int(len(self.path) / 3)
 
     @classmethod
-    def from_origin(cls, terminations):
+    def from_origin(cls, terminations, path=None, position_stack=None, is_active=True, is_split=False):
         """
         Create a new CablePath instance as traced from the given termination objects. These can be any object to which a
         Cable or WirelessLink connects (interfaces, console ports, circuit termination, etc.). All terminations must be
         of the same type and must belong to the same parent object.
+
+        To resume a partial trace (see get_resume_state()), pass the mid-span terminations at which to continue along
+        with the path traced so far and its position stack and status.
         """
         from circuits.models import CircuitTermination
 
@@ -610,14 +619,12 @@ class CablePath(models.Model):
             return None
 
         # Ensure all originating terminations are attached to the same link
-        if len(terminations) > 1 and not all(t.link == terminations[0].link for t in terminations[1:]):
+        if path is None and len(terminations) > 1 and not all(t.link == terminations[0].link for t in terminations[1:]):
             raise UnsupportedCablePath(_("All originating terminations must be attached to the same link"))
 
-        path = []
-        position_stack = []
+        path = list(path or [])
+        position_stack = [list(positions) for positions in position_stack or []]
         is_complete = False
-        is_active = True
-        is_split = False
 
         while terminations:
 
@@ -817,11 +824,83 @@ class CablePath(models.Model):
             is_split=is_split
         )
 
-    def retrace(self):
+    def get_resume_state(self, obj):
+        """
+        Return the arguments for from_origin() to resume tracing this path at the first hop which includes the given
+        object, reusing the unaffected portion of the path which precedes it. Returns None if the path must instead be
+        traced from its origins.
+        """
+        node = object_to_path_node(obj)
+        for i, step in enumerate(self.path):
+            if node in step:
+                break
+        else:
+            return None
+
+        # Each hop comprises three steps: near-end terminations, links, and far-end terminations. Resume only where the
+        # preceding hop ended at pass-through ports; any other far end either terminates the path or is only followed
+        # by the initial trace (e.g. a circuit's peer termination).
+        start = i - i % 3
+        if start == 0:
+            return None
+        steps = self._get_step_objects(self.path[:start + 1])
+        if any(obj is None for step in steps for obj in step):
+            return None
+        if not all(type(obj) in (FrontPort, RearPort) for obj in steps[start - 1]):
+            return None
+
+        # Replay the preceding hops to restore the trace state
+        is_active = True
+        is_split = False
+        position_stack = []
+        for hop in range(0, start, 3):
+            near_ends, links, far_ends = steps[hop:hop + 3]
+            if any(t.cable_id is None and getattr(t, 'wireless_link_id', None) is None for t in near_ends):
+                is_split = True
+            if any(link.status != LinkStatusChoices.STATUS_CONNECTED for link in links):
+                is_active = False
+            if isinstance(far_ends[0], FrontPort):
+                rear_ports = steps[hop + 3]
+                if len(rear_ports) > 1 or rear_ports[0].positions > 1:
+                    position_stack.append([fp.rear_port_position for fp in far_ends])
+            elif isinstance(far_ends[0], RearPort):
+                if not (len(far_ends) == 1 and far_ends[0].positions == 1) and position_stack:
+                    position_stack.pop()
+
+        return {
+            'terminations': steps[start],
+            'path': self.path[:start],
+            'position_stack': position_stack,
+            'is_active': is_active,
+            'is_split': is_split,
+        }
+
+    @staticmethod
+    def _get_step_objects(steps):
         """
-        Retrace the path from the currently-defined originating termination(s)
+        Return the objects represented by the given path steps, fetching each object type with a single query.
         """
-        _new = self.from_origin(self.origins)
+        nodes = [[decompile_path_node(node) for node in step] for step in steps]
+        object_ids = defaultdict(set)
+        for ct_id, object_id in itertools.chain(*nodes):
+            object_ids[ct_id].add(object_id)
+        objects = {}
+        for ct_id, pks in object_ids.items():
+            model = ContentType.objects.get_for_id(ct_id).model_class()
+            for obj in model.objects.filter(pk__in=pks):
+                objects[(ct_id, obj.pk)] = obj
+        return [[objects.get(node) for node in step] for step in nodes]
+
+    def retrace(self, obj=None):
+        """
+        Retrace the path from the currently-defined originating termination(s). If the object whose change prompted the
+        retrace is given, only the portion of the path from the first hop which includes it is traced again.
+        """
+        resume_state = self.get_resume_state(obj) if obj is not None else None
+        if resume_state:
+            _new = self.from_origin(**resume_state)
+        else:
+            _new = self.from_origin(self.origins)
         if _new:
             self.path = _new.path
             self.is_complete = _new.is_complete
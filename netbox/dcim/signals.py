@@ -144,7 +144,7 @@ def retrace_cable_paths(instance, **kwargs):
     When a Cable is deleted, check for and update its connected endpoints
     """
     for cablepath in CablePath.objects.filter(_nodes__contains=instance):
-        cablepath.retrace()
+        cablepath.retrace(instance)
 
 
 @receiver(post_delete, sender=CableTermination)
@@ -159,7 +159,7 @@ def nullify_connected_endpoints(instance, **kwargs):
         # Remove the deleted CableTermination if it's one of the path's originating nodes
         if instance.termination in cablepath.origins:
             cablepath.origins.remove(instance.termination)
-        cablepath.retrace()
+        cablepath.retrace(instance.cable)
 
 
 @receiver(post_save, sender=FrontPort)
@@ -170,7 +170,7 @@ def extend_rearport_cable_paths(instance, created, raw, **kwargs):
     if created and not raw:
         rearport = instance.rear_port
         for cablepath in CablePath.objects.filter(_nodes__contains=rearport):
-            cablepath.retrace()
+            cablepath.retrace(rearport)
 
 
 @receiver(post_save, sender=Interface)
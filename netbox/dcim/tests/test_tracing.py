@@ -0,0 +1,266 @@
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from circuits.models import *
+from core.models import ObjectType
+from dcim.choices import LinkStatusChoices
+from dcim.management.commands.trace_paths import ENDPOINT_MODELS
+from dcim.models import *
+from dcim.tracing import CableGraph
+from dcim.utils import defer_cablepath_updates, object_to_path_node
+
+
+class CableGraphTestCase(TestCase):
+    """
+    Validate that paths traced from the in-memory CableGraph match those traced by CablePath.from_origin().
+    """
+    @classmethod
+    def setUpTestData(cls):
+        site = Site.objects.create(name='Site', slug='site')
+        manufacturer = Manufacturer.objects.create(name='Generic', slug='generic')
+        device_type = DeviceType.objects.create(manufacturer=manufacturer, model='Test Device')
+        role = DeviceRole.objects.create(name='Device Role', slug='device-role')
+        device = Device.objects.create(site=site, device_type=device_type, role=role, name='Test Device')
+        provider = Provider.objects.create(name='Provider', slug='provider')
+        circuit_type = CircuitType.objects.create(name='Circuit Type', slug='circuit-type')
+        circuit = Circuit.objects.create(provider=provider, type=circuit_type, cid='Circuit 1')
+
+        interfaces = [
+            Interface(device=device, name=f'Interface {i}') for i in range(1, 9)
+        ]
+        Interface.objects.bulk_create(interfaces)
+        rearport1 = RearPort.objects.create(device=device, name='Rear Port 1', positions=4)
+        rearport2 = RearPort.objects.create(device=device, name='Rear Port 2', positions=4)
+        frontports1 = [
+            FrontPort.objects.create(
+                device=device, name=f'Front Port 1:{i}', rear_port=rearport1, rear_port_position=i
+            ) for i in range(1, 5)
+        ]
+        frontports2 = [
+            FrontPort.objects.create(
+                device=device, name=f'Front Port 2:{i}', rear_port=rearport2, rear_port_position=i
+            ) for i in range(1, 5)
+        ]
+        circuittermination1 = CircuitTermination.objects.create(circuit=circuit, termination=site, term_side='A')
+        circuittermination2 = CircuitTermination.objects.create(circuit=circuit, termination=site, term_side='Z')
+
+        # [IF1] --C1-- [FP1:1] [RP1] --C2-- [RP2] [FP2:1] --C3-- [IF2]
+        # [IF3] --C4-- [FP1:2] [RP1]        [RP2] [FP2:2] --C5-- [IF4] (planned)
+        Cable(a_terminations=[interfaces[0]], b_terminations=[frontports1[0]]).save()
+        Cable(a_terminations=[rearport1], b_terminations=[rearport2]).save()
+        Cable(a_terminations=[frontports2[0]], b_terminations=[interfaces[1]]).save()
+        Cable(a_terminations=[interfaces[2]], b_terminations=[frontports1[1]]).save()
+        Cable(
+            a_terminations=[frontports2[1]], b_terminations=[interfaces[3]], status=LinkStatusChoices.STATUS_PLANNED
+        ).save()
+
+        # [IF5] --C6-- [CT1] [CT2] --C7-- [IF6]
+        Cable(a_terminations=[interfaces[4]], b_terminations=[circuittermination1]).save()
+        Cable(a_terminations=[circuittermination2], b_terminations=[interfaces[5]]).save()
+
+        # [IF7, IF8] --C8-- [FP1:3]
+        Cable(a_terminations=[interfaces[6], interfaces[7]], b_terminations=[frontports1[2]]).save()
+
+    def get_paths(self):
+        return sorted(
+            (cp.path, cp.is_complete, cp.is_active, cp.is_split) for cp in CablePath.objects.all()
+        )
+
+    def get_expected_paths(self):
+        """
+        Return the paths traced individually from each cabled endpoint.
+        """
+        paths = []
+        for model in ENDPOINT_MODELS:
+            for origin in model.objects.filter(cable__isnull=False):
+                cp = CablePath.from_origin([origin])
+                paths.append((cp.path, cp.is_complete, cp.is_active, cp.is_split))
+        return sorted(paths)
+
+    def test_trace(self):
+        graph = CableGraph()
+        for model in ENDPOINT_MODELS:
+            object_type = ObjectType.objects.get_for_model(model).pk
+            for origin in model.objects.filter(cable__isnull=False):
+                cablepath = CablePath.from_origin([origin])
+                self.assertEqual(
+                    graph.trace((object_type, origin.pk), origin.cable_id),
+                    (cablepath.path, cablepath.is_complete, cablepath.is_active, cablepath.is_split),
+                    msg=f'Path mismatch for {origin}'
+                )
+
+    def test_trace_paths_force(self):
+        paths = self.get_expected_paths()
+        self.assertEqual(len(paths), 8)
+
+        call_command('trace_paths', force=True, no_input=True, stdout=StringIO())
+        self.assertEqual(self.get_paths(), paths)
+        for interface in Interface.objects.all():
+            self.assertEqual(interface._path.origins, [interface])
+
+    @patch('dcim.management.commands.trace_paths.BATCH_SIZE', 2)
+    def test_trace_paths_workers(self):
+        paths = self.get_expected_paths()
+
+        call_command('trace_paths', force=True, no_input=True, workers=2, stdout=StringIO())
+        self.assertEqual(self.get_paths(), paths)
+
+    def test_trace_paths_missing(self):
+        call_command('trace_paths', force=True, no_input=True, stdout=StringIO())
+        paths = self.get_paths()
+        CablePath.objects.filter(interface__name='Interface 1').delete()
+        self.assertIsNone(Interface.objects.get(name='Interface 1')._path)
+
+        call_command('trace_paths', stdout=StringIO())
+        self.assertEqual(self.get_paths(), paths)
+        self.assertIsNotNone(Interface.objects.get(name='Interface 1')._path)
+
+
+class CablePathRetraceTestCase(TestCase):
+    """
+    Validate incremental retracing of a CablePath from the first hop affected by a change.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        site = Site.objects.create(name='Site', slug='site')
+        manufacturer = Manufacturer.objects.create(name='Generic', slug='generic')
+        device_type = DeviceType.objects.create(manufacturer=manufacturer, model='Test Device')
+        role = DeviceRole.objects.create(name='Device Role', slug='device-role')
+        device = Device.objects.create(site=site, device_type=device_type, role=role, name='Test Device')
+
+        interface1 = Interface.objects.create(device=device, name='Interface 1')
+        interface2 = Interface.objects.create(device=device, name='Interface 2')
+        rearports = [
+            RearPort.objects.create(device=device, name=f'Rear Port {i}', positions=4) for i in range(1, 5)
+        ]
+        frontports = [
+            FrontPort.objects.create(device=device, name=f'Front Port {i}', rear_port=rearport, rear_port_position=1)
+            for i, rearport in enumerate(rearports, start=1)
+        ]
+
+        # [IF1] --C1-- [FP1] [RP1] --C2-- [RP2] [FP2] --C3-- [FP3] [RP3] --C4-- [RP4] [FP4] --C5-- [IF2]
+        Cable(a_terminations=[interface1], b_terminations=[frontports[0]]).save()
+        Cable(a_terminations=[rearports[0]], b_terminations=[rearports[1]]).save()
+        Cable(a_terminations=[frontports[1]], b_terminations=[frontports[2]]).save()
+        Cable(a_terminations=[rearports[2]], b_terminations=[rearports[3]]).save()
+        Cable(a_terminations=[frontports[3]], b_terminations=[interface2]).save()
+
+    def test_get_resume_state(self):
+        interface1 = Interface.objects.get(name='Interface 1')
+        cablepath = interface1._path
+        self.assertTrue(cablepath.is_complete)
+        cable = Interface.objects.get(name='Interface 2').cable
+
+        state = cablepath.get_resume_state(cable)
+        self.assertEqual(state['path'], cablepath.path[:12])
+        self.assertEqual(state['terminations'], [FrontPort.objects.get(name='Front Port 4')])
+        self.assertEqual(state['position_stack'], [])
+
+        resumed = CablePath.from_origin(**state)
+        self.assertEqual(resumed.path, cablepath.path)
+        self.assertEqual(resumed.is_complete, cablepath.is_complete)
+
+        # Changes within the first hop require a complete retrace
+        self.assertIsNone(cablepath.get_resume_state(interface1.cable))
+
+    def test_retrace_on_cable_delete(self):
+        interface1 = Interface.objects.get(name='Interface 1')
+        Interface.objects.get(name='Interface 2').cable.delete()
+
+        cablepath = CablePath.objects.get(pk=interface1._path_id)
+        expected = CablePath.from_origin([interface1])
+        self.assertEqual(cablepath.path, expected.path)
+        self.assertFalse(cablepath.is_complete)
+        self.assertEqual(cablepath.path[-1], [object_to_path_node(FrontPort.objects.get(name='Front Port 4'))])
+
+    def test_retrace_on_cable_status(self):
+        interface1 = Interface.objects.get(name='Interface 1')
+        cable = RearPort.objects.get(name='Rear Port 3').cable
+        cable.status = LinkStatusChoices.STATUS_PLANNED
+        cable.save()
+        self.assertFalse(CablePath.objects.get(pk=interface1._path_id).is_active)
+
+        cable = Cable.objects.get(pk=cable.pk)
+        cable.status = LinkStatusChoices.STATUS_CONNECTED
+        cable.save()
+        cablepath = CablePath.objects.get(pk=interface1._path_id)
+        self.assertTrue(cablepath.is_active)
+        self.assertEqual(cablepath.path, CablePath.from_origin([interface1]).path)
+
+
+class DeferCablePathUpdatesTestCase(TestCase):
+    """
+    Validate the deferral of CablePath updates until the end of a bulk operation.
+    """
+    @classmethod
+    def setUpTestData(cls):
+        site = Site.objects.create(name='Site', slug='site')
+        manufacturer = Manufacturer.objects.create(name='Generic', slug='generic')
+        device_type = DeviceType.objects.create(manufacturer=manufacturer, model='Test Device')
+        role = DeviceRole.objects.create(name='Device Role', slug='device-role')
+        device = Device.objects.create(site=site, device_type=device_type, role=role, name='Test Device')
+
+        Interface.objects.bulk_create([
+            Interface(device=device, name=f'Interface {i}') for i in range(1, 5)
+        ])
+        for i in range(1, 3):
+            rearport = RearPort.objects.create(device=device, name=f'Rear Port {i}', positions=2)
+            for position in range(1, 3):
+                FrontPort.objects.create(
+                    device=device, name=f'Front Port {i}:{position}', rear_port=rearport, rear_port_position=position
+                )
+
+    def create_cables(self):
+        """
+        [IF1] --C1-- [FP1:1] [RP1] --C3-- [RP2] [FP2:1] --C4-- [IF3]
+        [IF2] --C2-- [FP1:2]                    [FP2:2] --C5-- [IF4]
+        """
+        interfaces = {i.name: i for i in Interface.objects.all()}
+        frontports = {fp.name: fp for fp in FrontPort.objects.all()}
+        rearports = {rp.name: rp for rp in RearPort.objects.all()}
+        Cable(a_terminations=[interfaces['Interface 1']], b_terminations=[frontports['Front Port 1:1']]).save()
+        Cable(a_terminations=[interfaces['Interface 2']], b_terminations=[frontports['Front Port 1:2']]).save()
+        Cable(a_terminations=[rearports['Rear Port 1']], b_terminations=[rearports['Rear Port 2']]).save()
+        Cable(a_terminations=[frontports['Front Port 2:1']], b_terminations=[interfaces['Interface 3']]).save()
+        Cable(a_terminations=[frontports['Front Port 2:2']], b_terminations=[interfaces['Interface 4']]).save()
+
+    def test_defer_cablepath_updates(self):
+        with patch.object(CablePath, 'retrace', autospec=True, side_effect=CablePath.retrace) as retrace:
+            with defer_cablepath_updates():
+                self.create_cables()
+                self.assertFalse(CablePath.objects.exists())
+
+        # No paths existed before the bulk operation, so none are retraced
+        self.assertEqual(retrace.call_count, 0)
+        self.assertEqual(CablePath.objects.count(), 4)
+        for interface in Interface.objects.all():
+            expected = CablePath.from_origin([interface])
+            self.assertEqual(interface._path.path, expected.path)
+            self.assertTrue(interface._path.is_complete)
+
+    def test_defer_cablepath_updates_retrace_once(self):
+        self.create_cables()
+        cables = Cable.objects.all()
+        for cable in cables:
+            cable.status = LinkStatusChoices.STATUS_PLANNED
+            cable.save()
+
+        with patch.object(CablePath, 'retrace', autospec=True, side_effect=CablePath.retrace) as retrace:
+            with defer_cablepath_updates():
+                for cable in Cable.objects.all():
+                    cable.status = LinkStatusChoices.STATUS_CONNECTED
+                    cable.save()
+
+        # Each of the four paths is retraced once, though each traverses three modified cables
+        self.assertEqual(retrace.call_count, 4)
+        self.assertEqual(CablePath.objects.filter(is_active=True).count(), 4)
+
+    def test_defer_cablepath_updates_exception(self):
+        with self.assertRaises(RuntimeError):
+            with defer_cablepath_updates():
+                self.create_cables()
+                raise RuntimeError()
+        self.assertFalse(CablePath.objects.exists())
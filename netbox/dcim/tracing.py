@@ -0,0 +1,293 @@
+from collections import defaultdict
+
+from core.models import ObjectType
+from dcim.choices import CableEndChoices, LinkStatusChoices
+from dcim.utils import compile_path_node
+
+__all__ = (
+    'CableGraph',
+    'Untraceable',
+)
+
+
+class Untraceable(Exception):
+    """
+    Raised when a path cannot be traced from the in-memory graph (e.g. it traverses a WirelessLink or an unsupported
+    topology). The origin should instead be traced by CablePath.from_origin(), which yields the authoritative result
+    (or error).
+    """
+    pass
+
+
+class CableGraph:
+    """
+    An in-memory snapshot of all cables, cable terminations, front/rear port mappings, and circuit terminations, used to
+    trace many CablePaths without issuing queries for each hop.
+
+    trace() mirrors the algorithm of CablePath.from_origin(): objects are represented as (content type ID, object ID)
+    tuples, and are ordered by each model's default ordering (recorded as they are loaded) to produce identical paths.
+    """
+    def __init__(self):
+        from circuits.models import CircuitTermination, ProviderNetwork
+        from dcim.models import Cable, CableTermination, FrontPort, RearPort
+
+        self.cable_type = ObjectType.objects.get_for_model(Cable).pk
+        self.frontport_type = ObjectType.objects.get_for_model(FrontPort).pk
+        self.rearport_type = ObjectType.objects.get_for_model(RearPort).pk
+        self.circuittermination_type = ObjectType.objects.get_for_model(CircuitTermination).pk
+        self.providernetwork_type = ObjectType.objects.get_for_model(ProviderNetwork).pk
+
+        # Cable statuses
+        self.cable_status = dict(Cable.objects.order_by().values_list('pk', 'status'))
+
+        # Cable terminations, in their default ordering
+        self.termination_cables = {}
+        self.cable_ends = defaultdict(list)
+        self.termination_rank = {}
+        for rank, (cable_id, cable_end, type_id, object_id) in enumerate(
+            CableTermination.objects.values_list('cable_id', 'cable_end', 'termination_type_id', 'termination_id')
+        ):
+            self.termination_cables[(type_id, object_id)] = (cable_id, cable_end)
+            self.cable_ends[(cable_id, cable_end)].append((type_id, object_id))
+            self.termination_rank[(cable_id, cable_end, type_id, object_id)] = rank
+
+        # Rear ports: (rank, device ID, positions, cable ID)
+        self.rear_ports = {
+            pk: (rank, device_id, positions, cable_id)
+            for rank, (pk, device_id, positions, cable_id) in enumerate(
+                RearPort.objects.values_list('pk', 'device_id', 'positions', 'cable_id')
+            )
+        }
+
+        # Front ports: (rank, device ID, rear port ID, rear port position, cable ID)
+        self.front_ports = {}
+        self.rear_port_mappings = defaultdict(list)
+        for rank, (pk, device_id, rear_port_id, position, cable_id) in enumerate(
+            FrontPort.objects.values_list('pk', 'device_id', 'rear_port_id', 'rear_port_position', 'cable_id')
+        ):
+            self.front_ports[pk] = (rank, device_id, rear_port_id, position, cable_id)
+            self.rear_port_mappings[rear_port_id].append(pk)
+
+        # Circuit terminations: (circuit ID, term side, provider network ID, termination, cable ID)
+        self.circuit_terminations = {}
+        self.circuit_sides = {}
+        for pk, circuit_id, term_side, provider_network_id, type_id, object_id, cable_id in (
+            CircuitTermination.objects.order_by().values_list(
+                'pk', 'circuit_id', 'term_side', '_provider_network_id', 'termination_type_id', 'termination_id',
+                'cable_id'
+            )
+        ):
+            termination = (type_id, object_id) if type_id and object_id else None
+            self.circuit_terminations[pk] = (circuit_id, term_side, provider_network_id, termination, cable_id)
+            self.circuit_sides.setdefault((circuit_id, term_side), pk)
+
+    def get_link(self, node, origin_link=None):
+        """
+        Return the ID of the Cable attached to the given node (if any).
+        """
+        type_id, pk = node
+        if type_id == self.frontport_type:
+            return self.front_ports[pk][4]
+        if type_id == self.rearport_type:
+            return self.rear_ports[pk][3]
+        if type_id == self.circuittermination_type:
+            return self.circuit_terminations[pk][4]
+        return origin_link
+
+    def get_parent(self, node):
+        type_id, pk = node
+        if type_id == self.frontport_type:
+            return self.front_ports[pk][1]
+        if type_id == self.rearport_type:
+            return self.rear_ports[pk][1]
+        if type_id == self.circuittermination_type:
+            return self.circuit_terminations[pk][0]
+        raise Untraceable()
+
+    def get_front_ports(self, rear_port_ids, positions=None, pairs=None):
+        """
+        Return the FrontPorts mapped to the given RearPorts (optionally limited to a set of positions, or to specific
+        (rear port, position) pairs), in their default ordering.
+        """
+        front_ports = []
+        for rear_port_id in rear_port_ids:
+            for pk in self.rear_port_mappings.get(rear_port_id, []):
+                position = self.front_ports[pk][3]
+                if positions is not None and position not in positions:
+                    continue
+                if pairs is not None and (rear_port_id, position) not in pairs:
+                    continue
+                front_ports.append(pk)
+        front_ports.sort(key=lambda pk: self.front_ports[pk][0])
+        return [(self.frontport_type, pk) for pk in front_ports]
+
+    def trace(self, origin, link):
+        """
+        Trace the path from an origin (a PathEndpoint) attached to the given Cable. Returns a tuple of (path,
+        is_complete, is_active, is_split) equivalent to the CablePath returned by from_origin(), or None if no path
+        exists.
+
+        :param origin: A (content type ID, object ID) tuple
+        :param link: The ID of the Cable attached to the origin
+        """
+        terminations = [origin]
+        path = []
+        position_stack = []
+        is_complete = False
+        is_active = True
+        is_split = False
+
+        while terminations:
+
+            # Terminations must all be of the same type
+            if not all(t[0] == terminations[0][0] for t in terminations[1:]):
+                raise Untraceable()
+
+            # All mid-span terminations must all be attached to the same device
+            if len(terminations) > 1 and len({self.get_parent(t) for t in terminations}) > 1:
+                raise Untraceable()
+
+            # Check for a split path
+            links = [self.get_link(t, link) for t in terminations]
+            if len(set(links)) > 1 and (position_stack and len(terminations) != len(position_stack[-1])):
+                is_split = True
+                break
+
+            # Step 1: Record the near-end termination object(s)
+            path.append([compile_path_node(*t) for t in terminations])
+
+            # Step 2: Determine the attached cables, if any
+            cables = [cable_id for cable_id in links if cable_id is not None]
+            if not cables:
+                if len(path) == 1:
+                    return None
+                break
+
+            # Step 3: Record asymmetric paths as split
+            if len(cables) != len(links):
+                is_complete = False
+                is_split = True
+
+            # Step 4: Record the cables, preserving their order
+            path.append([compile_path_node(self.cable_type, cable_id) for cable_id in dict.fromkeys(cables)])
+
+            # Step 5: Update the path status if a cable is not connected
+            if any(self.cable_status[cable_id] != LinkStatusChoices.STATUS_CONNECTED for cable_id in cables):
+                is_active = False
+
+            # Step 6: Determine the far-end terminations
+            cable_ends = set()
+            for t in terminations:
+                if t in self.termination_cables:
+                    cable_id, cable_end = self.termination_cables[t]
+                    if cable_end == CableEndChoices.SIDE_B:
+                        cable_ends.add((cable_id, CableEndChoices.SIDE_A))
+                    else:
+                        cable_ends.add((cable_id, CableEndChoices.SIDE_B))
+            if not cable_ends:
+                break
+            remote_terminations = sorted(
+                ((*cable_end, *t) for cable_end in cable_ends for t in self.cable_ends.get(cable_end, [])),
+                key=self.termination_rank.get
+            )
+            remote_terminations = [(type_id, object_id) for _, _, type_id, object_id in remote_terminations]
+
+            # Remote terminations must all be of the same type, otherwise return a split path
+            if not all(t[0] == remote_terminations[0][0] for t in remote_terminations[1:]):
+                is_complete = False
+                is_split = True
+                break
+
+            # Step 7: Record the far-end termination object(s)
+            path.append([compile_path_node(*t) for t in remote_terminations])
+
+            # Step 8: Determine the "next hop" terminations, if applicable
+            if not remote_terminations:
+                break
+            remote_type = remote_terminations[0][0]
+            remote_ids = [pk for _, pk in remote_terminations]
+
+            if remote_type == self.frontport_type:
+                # Follow FrontPorts to their corresponding RearPorts
+                rear_port_ids = sorted(
+                    {self.front_ports[pk][2] for pk in remote_ids},
+                    key=lambda pk: self.rear_ports[pk][0]
+                )
+                if len(rear_port_ids) > 1 or self.rear_ports[rear_port_ids[0]][2] > 1:
+                    position_stack.append([self.front_ports[pk][3] for pk in remote_ids])
+
+                terminations = [(self.rearport_type, pk) for pk in rear_port_ids]
+
+            elif remote_type == self.rearport_type:
+                if len(remote_ids) == 1 and self.rear_ports[remote_ids[0]][2] == 1:
+                    front_ports = self.get_front_ports(remote_ids, positions={1})
+                # Obtain the individual front ports based on the termination and all positions
+                elif len(remote_ids) > 1 and position_stack:
+                    positions = position_stack.pop()
+                    if len(remote_ids) != len(positions):
+                        raise Untraceable()
+                    pairs = {(pk, positions.pop()) for pk in remote_ids}
+                    front_ports = self.get_front_ports(remote_ids, pairs=pairs)
+                # Obtain the individual front ports based on the termination and position
+                elif position_stack:
+                    front_ports = self.get_front_ports(remote_ids[:1], positions=set(position_stack.pop()))
+                # If all rear ports have a single position, we can just get the front ports
+                elif all(self.rear_ports[pk][2] == 1 for pk in remote_ids):
+                    front_ports = self.get_front_ports(remote_ids)
+                    if len(front_ports) != len(remote_ids):
+                        is_split = True
+                        break
+                else:
+                    # No position indicated: path has split, so we stop at the RearPorts
+                    is_split = True
+                    break
+
+                terminations = front_ports
+
+            elif remote_type == self.circuittermination_type:
+                # Follow a CircuitTermination to its corresponding CircuitTermination (A to Z or vice versa)
+                if len(remote_ids) > 1:
+                    is_split = True
+                    break
+                circuit_id, term_side = self.circuit_terminations[remote_ids[0]][:2]
+                peer_id = self.circuit_sides.get((circuit_id, 'Z' if term_side == 'A' else 'A'))
+                if peer_id is None:
+                    break
+                _, _, provider_network_id, termination, cable_id = self.circuit_terminations[peer_id]
+                if provider_network_id:
+                    # Circuit terminates to a ProviderNetwork
+                    path.extend([
+                        [compile_path_node(self.circuittermination_type, peer_id)],
+                        [compile_path_node(self.providernetwork_type, provider_network_id)],
+                    ])
+                    is_complete = True
+                    break
+                elif termination and not cable_id:
+                    # Circuit terminates to a Region/Site/etc.
+                    path.extend([
+                        [compile_path_node(self.circuittermination_type, peer_id)],
+                        [compile_path_node(*termination)],
+                    ])
+                    break
+
+                terminations = [(self.circuittermination_type, peer_id)]
+
+            else:
+                # All remote terminations are path endpoints of the same type
+                is_complete = True
+                break
+
+        return path, is_complete, is_active, is_split
+
+    def trace_many(self, origins):
+        """
+        Trace paths for a list of (origin, link) tuples. Returns a list of trace() results, with Untraceable in place
+        of any path which must be traced from the database.
+        """
+        results = []
+        for origin, link in origins:
+            try:
+                results.append(self.trace(origin, link))
+            except (Untraceable, KeyError):
+                results.append(Untraceable)
+        return results
@@ -1,7 +1,13 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
 from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
 from django.db import router, transaction
 
+# Pending CablePath updates, while these are being deferred (see defer_cablepath_updates())
+cablepath_updates = ContextVar('cablepath_updates', default=None)
+
 
 def compile_path_node(ct_id, object_id):
     return f'{ct_id}:{object_id}'
@@ -39,6 +45,10 @@ def create_cablepath(terminations):
     """
     from dcim.models import CablePath
 
+    if (queue := cablepath_updates.get()) is not None:
+        queue['origins'].setdefault(tuple(object_to_path_node(t) for t in terminations), terminations)
+        return
+
     cp = CablePath.from_origin(terminations)
     if cp:
         cp.save()
@@ -46,17 +56,65 @@ def create_cablepath(terminations):
 
 def rebuild_paths(terminations):
     """
-    Rebuild all CablePaths which traverse the specified nodes.
+    Rebuild all CablePaths which traverse the specified nodes. Each path is retraced only from the first hop which
+    includes the node.
     """
     from dcim.models import CablePath
 
+    if (queue := cablepath_updates.get()) is not None:
+        for obj in terminations:
+            queue['nodes'][object_to_path_node(obj)] = obj
+        return
+
     for obj in terminations:
         cable_paths = CablePath.objects.filter(_nodes__contains=obj)
 
         with transaction.atomic(using=router.db_for_write(CablePath)):
             for cp in cable_paths:
-                cp.delete()
-                create_cablepath(cp.origins)
+                cp.retrace(obj)
+
+
+@contextmanager
+def defer_cablepath_updates():
+    """
+    Defer the creation and retracing of CablePaths prompted by changes to Cables (e.g. during a bulk import) until the
+    end of the block. Each affected path is then retraced only once, from the first hop which includes any of the
+    modified nodes, regardless of how many Cables along it were changed. Pending updates are discarded if the block
+    raises an exception.
+    """
+    # Updates are applied by the outermost block
+    if cablepath_updates.get() is not None:
+        yield
+        return
+
+    queue = {'origins': {}, 'nodes': {}}
+    token = cablepath_updates.set(queue)
+    try:
+        yield
+    finally:
+        cablepath_updates.reset(token)
+
+    apply_cablepath_updates(queue)
+
+
+def apply_cablepath_updates(queue):
+    """
+    Apply the CablePath updates collected by defer_cablepath_updates().
+    """
+    from dcim.models import CablePath
+
+    nodes = queue['nodes']
+    with transaction.atomic(using=router.db_for_write(CablePath)):
+
+        # Retrace each existing path which traverses any of the modified nodes, starting from the first such node
+        if nodes:
+            for cp in CablePath.objects.filter(_nodes__overlap=list(nodes)):
+                node = next(node for step in cp.path for node in step if node in nodes)
+                cp.retrace(nodes[node])
+
+        # Create paths originating from newly connected endpoints
+        for terminations in queue['origins'].values():
+            create_cablepath(terminations)
 
 
 def update_interface_bridges(device, interface_templates, module=None):
@@ -35,6 +35,7 @@ from . import filtersets, forms, tables
 from .choices import DeviceFaceChoices, InterfaceModeChoices
 from .models import *
 from .object_actions import BulkAddComponents, BulkDisconnect
+from .utils import defer_cablepath_updates
 
 CABLE_TERMINATION_TYPES = {
     'dcim.consoleport': ConsolePort,
@@ -3618,6 +3619,11 @@ class CableBulkImportView(generic.BulkImportView):
     queryset = Cable.objects.all()
     model_form = forms.CableImportForm
 
+    def create_and_update_objects(self, form, request):
+        # Trace each affected cable path once, after all cables have been saved
+        with defer_cablepath_updates():
+            return super().create_and_update_objects(form, request)
+
 
 @register_model_view(Cable, 'bulk_edit', path='edit', detail=False)
 class CableBulkEditView(generic.BulkEditView):
@@ -3629,6 +3635,11 @@ class CableBulkEditView(generic.BulkEditView):
     table = tables.CableTable
     form = forms.CableBulkEditForm
 
+    def _update_objects(self, form, request):
+        # Trace each affected cable path once, after all cables have been saved
+        with defer_cablepath_updates():
+            return super()._update_objects(form, request)
+
 
 @register_model_view(Cable, 'bulk_rename', path='rename', detail=False)
 class CableBulkRenameView(generic.BulkRenameView):
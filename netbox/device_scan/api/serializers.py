@@ -6,6 +6,8 @@ class DeviceScanSerializer(NetBoxModelSerializer):
        model = DeviceScan
        fields = [
            'id', 'url', 'display', 'device', 'status',
-           'last_started', 'last_finished', 'attemts', 'error',
+           'last_started', 'last_finished', 'attemts', 'error', 'next_scan', 'failures',
+           'fingerprint', 'last_full_scan', 'duration', 'requests', 'retries', 'bytes_received',
+           'db_writes', 'timings', 'firmware',
            'custom_fields', 'created', 'last_updated', 'tags',
        ]
\ No newline at end of file
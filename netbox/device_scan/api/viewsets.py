@@ -1,7 +1,55 @@
+from django.http import QueryDict
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.decorators import action
+from rest_framework.response import Response
+
+from dcim.filtersets import DeviceFilterSet
+from dcim.models import Device
 from netbox.api.viewsets import NetBoxModelViewSet
 from ..models import DeviceScan
+from ..tasks import enqueue_scans, exclude_active_scans
 from .serializers import DeviceScanSerializer
 
 class DeviceScanViewSet(NetBoxModelViewSet):
     queryset = DeviceScan.objects.order_by('pk')
-    serializer_class = DeviceScanSerializer
\ No newline at end of file
+    serializer_class = DeviceScanSerializer
+
+    @action(detail=False, methods=['post'], url_path='run')
+    def run(self, request):
+        """
+        Запускает сканирование устройств, выбранных фильтрами устройств (site, role, tag, id ...)
+
+        POST /api/plugins/device-scan/device-scans/run/
+        {"site": ["dc1"], "role": ["server"]}
+        """
+        data = request.data
+        if not isinstance(data, QueryDict):
+            # JSON: {"site": "dc1"} или {"site": ["dc1", "dc2"]}
+            data = QueryDict(mutable=True)
+            for key, value in request.data.items():
+                data.setlist(key, value if isinstance(value, list) else [value])
+
+        if not data:
+            return Response(
+                {"detail": "Укажите хотя бы один фильтр устройств"},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        # Запускать можно только сканирование устройств, которые пользователь видит
+        queryset = Device.objects.restrict(request.user, 'view').filter(oob_ip__isnull=False)
+        filterset = DeviceFilterSet(data, queryset=queryset)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        devices = filterset.qs.select_related('scan_status')
+        queued = enqueue_scans(exclude_active_scans(devices, now), now)
+
+        return Response(
+            {
+                "matched": devices.count(),
+                "queued": len(queued),
+            },
+            status=status.HTTP_202_ACCEPTED,
+        )
@@ -1,136 +1,276 @@
-from dcim.models import InventoryItem, Manufacturer
-from django.utils.text import slugify
-from pprint import pprint
-from django.db import transaction
+from contextlib import nullcontext
+from decimal import Decimal
+
+from dcim.models import Device, InventoryItem
+from django.db import models
+from django.db.models import F, Max
+from django.utils import timezone
+from django.db import connection, transaction
+from django_pglocks import advisory_lock
+
+from netbox.constants import ADVISORY_LOCK_KEYS
+from netbox.search import get_indexer
+from netbox.search.backends import search_backend
+from utilities.counters import update_counter
+
+from vendors.base.schema import normalize_inventory
+
+from .manufacturers import manufacturer_cache
+from .models import InventoryComponent
+
+# Ограничения длины полей InventoryItem
+NAME_MAX_LENGTH = 64
+DESCRIPTION_MAX_LENGTH = 200
+SERIAL_MAX_LENGTH = 50
+CAPACITY_QUANT = Decimal("0.01")
+
 
 def get_or_create_manufacturer(name):
-    if not name or name in ("N/A", "None", ""):
-        return None
-    name = str(name).strip()
-    slug = slugify(name)[:50]
-    manufacturer = Manufacturer.objects.filter(name__iexact=name).first()
+    return manufacturer_cache.get_or_create(name)
+
 
+def add_item(items, name, description="", manufacturer=None, serial=""):
+    """
+    Добавляет компонент в ожидаемое состояние инвентаря
+    Как и раньше, производитель и серийный номер меняются только если пришли от BMC.
+
+    Returns:
+        str: имя InventoryItem (обрезанное до допустимой длины)
+    """
+    fields = {"description": str(description or "")[:DESCRIPTION_MAX_LENGTH]}
     if manufacturer:
-        return manufacturer
+        fields["manufacturer_id"] = manufacturer.pk
+    if serial:
+        fields["serial"] = str(serial)[:SERIAL_MAX_LENGTH]
+    name = str(name)[:NAME_MAX_LENGTH]
+    items[name] = fields
+    return name
 
-    manufacturer = Manufacturer.objects.create(name=name, slug=slug)
-    return manufacturer
 
+def get_spec(component):
+    """Типизированные поля компонента в виде, который хранится в InventoryComponent"""
+    spec = {"kind": component.kind}
+    for name, value in component.get_spec().items():
+        field = InventoryComponent._meta.get_field(name)
+        if isinstance(field, models.DecimalField):
+            value = None if value is None else Decimal(str(value)).quantize(CAPACITY_QUANT)
+        elif isinstance(field, models.CharField):
+            value = (value or "")[:field.max_length]
+        spec[name] = value
+    return spec
 
 
-def upsert_item(device, name, description="", manufacturer=None, serial=""):
-    try:
-        with transaction.atomic():
-            item, _ = InventoryItem.objects.update_or_create(device=device, name=name)
-            item.description = description
-            if manufacturer:
-                item.manufacturer = manufacturer
-            if serial:
-                item.serial = serial
-            item.save()
-    except Exception as e:
-        print(f"❌ Ошибка в upsert_item: {e}")
+def collect_items(inventory):
+    """
+    Преобразует нормализованный инвентарь (vendors/base/schema.py) в {имя InventoryItem: поля}
 
-def map_data_to_inventory(device, data):
-    try:
-        # print("-> FANS")
-        for fan in data.get("FANS", []):
-            if not isinstance(fan, dict):
-                continue
-            name = fan.get("Name", "Fan")
-            upsert_item(device, name)
-    except Exception as e:
-        print(f"❌ Ошибка в FANS: {e}")
-    
+    Returns:
+        tuple: (items, specs) - поля InventoryItem и типизированные характеристики по имени
+    """
+    items = {}
+    specs = {}
+    # Производители могли поменяться в другом воркере
+    manufacturer_cache.check_version()
 
+    for component in inventory.components:
+        manufacturer = get_or_create_manufacturer(component.manufacturer)
+        name = add_item(
+            items,
+            component.name,
+            description=component.get_description(),
+            manufacturer=manufacturer,
+            serial=component.serial,
+        )
+        specs[name] = get_spec(component)
 
-    try:
-        # print("-> MEMORY")
-        memory = data.get("Memory", {})
-        for mod in memory.get("Modules", []):
-            if not isinstance(mod, dict):
-                continue
-            name = f"RAM {mod.get('DeviceLocator', 'Unknown')}"
-            desc = f"{mod.get('Capacity (GB)')} GB \n {mod.get('MemoryDeviceType')} \n {mod.get('OperatingSpeedMhz')} MHz"
-            manufacturer = get_or_create_manufacturer(mod.get('Manufacturer'))
-            upsert_item(device, name, description=desc, manufacturer=manufacturer)
-    except Exception as e:
-        print(f"❌ Ошибка в MEMORY: {e}")
+    return items, specs
 
 
-    try:
-        # print("-> PSUs")
-        i = 1
-        for psu in data.get('PSUs', []):
-            if not isinstance(psu, dict):
-                continue
-            name = f"{i}.PSU {psu.get('Name')}"
-            desc = f"FirmwareVersion: {psu.get('FirmwareVersion')} \n Model: {psu.get('Model')} \n Capacity: {psu.get('Capacity')} Watts"
-            serial_number = psu.get('SerialNumber')
-            manufacturer = get_or_create_manufacturer(psu.get('Manufacturer'))
-            upsert_item(device, name, description=desc, manufacturer=manufacturer, serial=serial_number)
-            i += 1
-    except Exception as e:
-        print(f"❌ Ошибка в PSUs: {e}")
+def sync_components(device, items_by_name, specs):
+    """
+    Приводит InventoryComponent устройства к характеристикам из сканирования
+    Пишет только новые и изменившиеся строки; для удаленных InventoryItem строки удаляются каскадом.
 
-    try:
-        # print("-> Processors")
-        for cpu in data.get('Processors', []):
-            if not isinstance(cpu, dict):
-                continue
-            name = f"CPU {cpu.get('ID')}"
-            desc = f"Model: {cpu.get('Model')} \n Total Cores: {cpu.get('TotalCores')} \n Total Threads: {cpu.get('TotalThreads')} \n MaxSpeed: {cpu.get('MaxSpeed (MHz)')}"
-            manufacturer = get_or_create_manufacturer(cpu.get('Manufacturer'))
-            upsert_item(device, name, description=desc, manufacturer=manufacturer)
-    except Exception as e:
-        print(f"❌ Ошибка в Processors: {e}")
+    Returns:
+        int: количество созданных и обновленных строк
+    """
+    existing = {
+        component.inventory_item_id: component
+        for component in InventoryComponent.objects.filter(device=device)
+    }
+    to_create = []
+    to_update = []
+    update_fields = set()
 
-    try:
-        # print("-> RAID Controllers")
-        for controller in data.get('RAID', {}).get('Controllers', []):
-            if not isinstance(controller, dict):
-                continue
-            name = f"RAID Controller {controller.get('Name')}"
-            if 'ahci' in name.lower() or 'sata' in name.lower():
-                continue
-            desc = f"Model: {controller.get('Model')} \n FirmwareVersion: {controller.get('FirmwareVersion', {}).get('VersionString', 'N/A')}"
-            upsert_item(device, name, description=desc)
-    except Exception as e:
-        print(f"❌ Ошибка в RAID Controllers: {e}")
+    for name, spec in specs.items():
+        item = items_by_name.get(name)
+        if item is None or item.pk is None:
+            continue
+        component = existing.get(item.pk)
+        if component is None:
+            to_create.append(InventoryComponent(inventory_item_id=item.pk, device=device, **spec))
+            continue
+        changed = [field for field, value in spec.items() if getattr(component, field) != value]
+        if changed:
+            for field in changed:
+                setattr(component, field, spec[field])
+            update_fields.update(changed)
+            to_update.append(component)
 
-    try:
-        # print("-> RAID Volumes")
-        for volume in data.get('RAID', {}).get('Volumes', []):
-            if not isinstance(volume, dict):
-                continue
-            name = f"RAID Volume {volume.get('Name')}"
-            desc = f"Size: {volume.get('Capacity')} GB \n Type: {volume.get('RAID')} \n Status: {volume.get('Status')}"
-            upsert_item(device, name, description=desc)
-    except Exception as e:
-        print(f"❌ Ошибка в RAID Volumes: {e}")
+    if to_create:
+        InventoryComponent.objects.bulk_create(to_create)
+    if to_update:
+        InventoryComponent.objects.bulk_update(to_update, sorted(update_fields))
+
+    return len(to_create) + len(to_update)
 
-    try:
-        # print("-> Storage")
-        for disk in data.get('Storage', []):
-            if not isinstance(disk, dict):
-                continue
-            name = f"{disk.get('MediaType')} {disk.get('ID')}"
-            desc = f"Model: {disk.get('Model')} \n Protocol: {disk.get('Protocol')} \n Capacity: {disk.get('Capacity')} GB"
-            serial_number = disk.get('SerialNumber')
-            upsert_item(device, name, description=desc, serial=serial_number)
-    except Exception as e:
-        print(f"❌ Ошибка в Storage: {e}")
+
+def sync_inventory(device, items, delete_missing=True, specs=None):
+    """
+    Приводит InventoryItem устройства к состоянию из сканирования
+
+    Существующие компоненты читаются одним запросом, дальше считается разница:
+    новые создаются через bulk_create, измененные обновляются через bulk_update,
+    не изменившиеся не трогаются. Компоненты, найденные сканированием раньше
+    (discovered=True) и пропавшие сейчас, удаляются. Добавленные вручную не удаляются.
+    Если переданы specs, так же синхронизируются типизированные InventoryComponent.
+    bulk_create/bulk_update не вызывают post_save, поэтому поисковый индекс
+    обновляется здесь же: для новых компонентов и для тех, у кого изменились индексируемые поля.
+
+    Returns:
+        dict: количество созданных, обновленных и удаленных компонентов
+    """
+    existing = {}
+    for item in InventoryItem.objects.filter(device=device).order_by(F('parent').asc(nulls_first=True), 'pk'):
+        # Сканер работает с корневыми компонентами; при совпадении имен берем корневой
+        existing.setdefault(item.name, item)
+
+    to_create = []
+    to_update = []
+    to_reindex = []
+    update_fields = {"discovered", "last_updated"}
+    search_fields = {name for name, _ in get_indexer(InventoryItem).fields}
+    now = timezone.now()
+
+    for name, fields in items.items():
+        item = existing.get(name)
+        if item is None:
+            to_create.append(InventoryItem(
+                device=device,
+                name=name,
+                discovered=True,
+                _site_id=device.site_id,
+                _location_id=device.location_id,
+                _rack_id=device.rack_id,
+                **fields,
+            ))
+            continue
+
+        changed = [field for field, value in fields.items() if getattr(item, field) != value]
+        if changed or not item.discovered:
+            for field in changed:
+                setattr(item, field, fields[field])
+            item.discovered = True
+            item.last_updated = now
+            update_fields.update(changed)
+            to_update.append(item)
+            if search_fields.intersection(changed):
+                to_reindex.append(item)
+
+    to_delete = []
+    if delete_missing:
+        to_delete = [
+            item.pk for name, item in existing.items()
+            if item.discovered and item.parent_id is None and name not in items
+        ]
+
+    # Новые компоненты - корни своих MPTT деревьев; tree_id выдаем так же, как django-mptt, но под блокировкой,
+    # чтобы параллельные сканирования не получили одинаковые деревья. Блокировка сессионная: она берется до
+    # транзакции и держится до commit, иначе другой воркер прочитает MAX(tree_id) без наших незакоммиченных строк
+    # (так же делает MPTTLockedMixin в API)
+    lock = advisory_lock(ADVISORY_LOCK_KEYS['inventoryitem']) if to_create else nullcontext()
+    with lock, transaction.atomic():
+        if to_create:
+            tree_id = (InventoryItem.objects.aggregate(max_tree_id=Max('tree_id'))['max_tree_id'] or 0) + 1
+            for item in to_create:
+                item.tree_id = tree_id
+                item.lft = 1
+                item.rght = 2
+                item.level = 0
+                tree_id += 1
+            InventoryItem.objects.bulk_create(to_create)
+            # bulk_create не вызывает сигналы, поэтому счетчик устройства и поисковый индекс обновляем сами
+            update_counter(Device, device.pk, 'inventory_item_count', len(to_create))
+            search_backend.cache(to_create, remove_existing=False)
+
+        if to_update:
+            InventoryItem.objects.bulk_update(to_update, sorted(update_fields))
+            if to_reindex:
+                search_backend.cache(to_reindex)
+
+        if to_delete:
+            InventoryItem.objects.filter(pk__in=to_delete).delete()
+
+        components = 0
+        if specs is not None:
+            items_by_name = {**existing, **{item.name: item for item in to_create}}
+            components = sync_components(device, items_by_name, specs)
+
+    return {
+        "created": len(to_create), "updated": len(to_update), "deleted": len(to_delete), "components": components,
+    }
+
+
+class WriteCounter:
+    """execute_wrapper, считающий INSERT/UPDATE/DELETE запросы к базе"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        if sql.lstrip()[:6].upper() in ("INSERT", "UPDATE", "DELETE"):
+            self.count += 1
+        return execute(sql, params, many, context)
+
+
+def map_data_to_inventory(device, data):
+    """
+    Returns:
+        dict: количество созданных/обновленных/удаленных компонентов, complete - инвентарь
+              получен целиком, и db_writes - число пишущих запросов к базе (включая сигналы, changelog и т.п.)
+
+    Raises:
+        Exception: ошибка синхронизации инвентаря; изменения транзакции откатываются
+    """
+    writes = WriteCounter()
+    with connection.execute_wrapper(writes):
+        result = _map_data_to_inventory(device, data)
+    result["db_writes"] = writes.count
+    return result
+
+
+def _map_data_to_inventory(device, data):
+    inventory = normalize_inventory(data)
+    items, specs = collect_items(inventory)
+
+    # Ошибка синхронизации не перехватывается: скан должен завершиться с ошибкой,
+    # иначе его отпечаток сохранится и следующие сканы сочтут инвентарь актуальным.
+    # Если часть секций не разобралась или BMC ничего не вернул, ничего не удаляем - данные неполные
+    complete = inventory.complete and bool(items)
+    result = sync_inventory(device, items, delete_missing=complete, specs=specs)
+    result["complete"] = complete
+    print(
+        f"📦 Инвентарь {device}: создано {result['created']}, "
+        f"обновлено {result['updated']}, удалено {result['deleted']}"
+    )
 
     try:
-        system_info = data.get('System', {})
-        serial_number = system_info.get('SerialNumber')
-        if serial_number and serial_number not in ("N/A", "", None):
-            if device.serial != serial_number:
-                device.serial = serial_number
-                device.save()
+        serial_number = inventory.serial
+        if serial_number and device.serial != serial_number:
+            device.serial = serial_number
+            # Сохраняем только серийный номер, чтобы не затереть счетчики устройства устаревшими значениями
+            device.save(update_fields=['serial', 'last_updated'])
     except Exception as e:
         print(f"❌ Ошибка в System: {e}")
 
-
-        
-
+    return result
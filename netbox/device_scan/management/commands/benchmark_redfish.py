@@ -0,0 +1,80 @@
+import contextlib
+import io
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from device_scan.tasks import PROVIDERS
+from vendors.base.aio import run_inventories
+from vendors.base.replay import ReplayPool, load_fixture
+
+
+class Command(BaseCommand):
+    help = "Прогнать провайдеры Redfish по записанным фикстурам (см. record_redfish) и замерить скорость"
+
+    def add_arguments(self, parser):
+        parser.add_argument('fixtures', nargs='+', help="Файлы фикстур, записанные record_redfish")
+        parser.add_argument(
+            '--latency',
+            type=float,
+            default=50,
+            help="Задержка каждого ответа в миллисекундах (по умолчанию 50)"
+        )
+        parser.add_argument(
+            '--devices',
+            type=int,
+            default=1,
+            help="Сколько серверов сканировать одновременно по одной фикстуре"
+        )
+        parser.add_argument('--repeat', type=int, default=3, help="Количество прогонов (берется лучший)")
+        parser.add_argument('--max-concurrent-requests', type=int, default=4)
+        parser.add_argument('--requests-per-second', type=float, default=10)
+        parser.add_argument('--max-concurrent-devices', type=int, default=100)
+
+    def run_once(self, provider_class, responses, options):
+        pool = ReplayPool(
+            responses,
+            latency=options['latency'] / 1000,
+            max_connections=options['max_concurrent_requests'] * options['devices'],
+            max_connections_per_host=options['max_concurrent_requests'],
+            requests_per_second=options['requests_per_second'],
+        )
+        # Разные IP, чтобы ограничения на один BMC работали как при реальном скане
+        providers = [
+            provider_class(f"10.{i // 65536 % 256}.{i // 256 % 256}.{i % 256}", "user", "password", pool=pool)
+            for i in range(options['devices'])
+        ]
+
+        output = io.StringIO()
+        started = time.perf_counter()
+        with contextlib.redirect_stdout(output):
+            results = run_inventories(providers, pool=pool, max_concurrent_devices=options['max_concurrent_devices'])
+        elapsed = time.perf_counter() - started
+
+        if options['verbosity'] > 1:
+            self.stdout.write(output.getvalue())
+        errors = [result for result in results if isinstance(result, Exception)]
+        if errors:
+            raise CommandError(f"Scan failed: {errors[0]}")
+
+        return elapsed, providers
+
+    def handle(self, *args, **options):
+        if options['devices'] < 1 or options['repeat'] < 1:
+            raise CommandError("--devices and --repeat must be positive")
+
+        for path in options['fixtures']:
+            vendor, responses = load_fixture(path)
+            if vendor not in PROVIDERS:
+                raise CommandError(f"Unknown vendor {vendor} in {path}")
+
+            runs = [self.run_once(PROVIDERS[vendor], responses, options) for _ in range(options['repeat'])]
+            elapsed, providers = min(runs, key=lambda run: run[0])
+            stats = providers[0].stats
+
+            self.stdout.write(
+                f"{path} ({vendor}, серверов: {options['devices']}): "
+                f"время {elapsed:.2f} с (в среднем {sum(run[0] for run in runs) / len(runs):.2f} с), "
+                f"запросов на скан {stats['requests']}, сэкономлено $expand {stats['requests_saved']}, "
+                f"байт на скан {stats['bytes']}"
+            )
@@ -0,0 +1,74 @@
+import asyncio
+
+from dcim.models import Device
+from django.core.management.base import BaseCommand, CommandError
+
+from device_scan.tasks import PROVIDERS, VENDOR_CREDENTIALS, get_provider
+from vendors.base.aio import collect_inventory, log_request_stats
+from vendors.base.replay import RecordingPool
+
+
+class Command(BaseCommand):
+    help = "Записать ответы Redfish API сервера в фикстуры для benchmark_redfish"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'device',
+            nargs='?',
+            help="Имя устройства в NetBox (IP и производитель берутся из устройства)"
+        )
+        parser.add_argument('--ip', help="IP адрес BMC, если устройства нет в NetBox")
+        parser.add_argument('--vendor', choices=sorted(PROVIDERS), help="Производитель для --ip")
+        parser.add_argument('--username', help="Логин BMC для --ip (по умолчанию из VENDOR_CREDENTIALS)")
+        parser.add_argument('--password', help="Пароль BMC для --ip (по умолчанию из VENDOR_CREDENTIALS)")
+        parser.add_argument(
+            '--output',
+            default='redfish_fixtures',
+            help="Каталог для фикстур (по умолчанию ./redfish_fixtures)"
+        )
+
+    @staticmethod
+    async def record(pool, provider):
+        """Собирает инвентарь через RecordingPool и закрывает сессию пула в том же event loop"""
+        async with pool:
+            try:
+                return await collect_inventory(provider)
+            finally:
+                log_request_stats(provider)
+
+    def handle(self, *args, **options):
+        pool = RecordingPool()
+
+        if options['device']:
+            try:
+                device = Device.objects.select_related('oob_ip', 'device_type__manufacturer').get(
+                    name=options['device']
+                )
+            except Device.DoesNotExist:
+                raise CommandError(f"Device {options['device']} not found")
+            provider = get_provider(device, pool)
+            vendor = next(key for key, cls in PROVIDERS.items() if isinstance(provider, cls))
+        elif options['ip'] and options['vendor']:
+            vendor = options['vendor']
+            creds = VENDOR_CREDENTIALS.get(vendor, {})
+            provider = PROVIDERS[vendor](
+                options['ip'],
+                options['username'] or creds.get('username'),
+                options['password'] or creds.get('password'),
+                pool=pool,
+            )
+        else:
+            raise CommandError("Specify a device name or --ip together with --vendor")
+
+        asyncio.run(self.record(pool, provider))
+
+        files = pool.save(options['output'], vendor)
+        if not files:
+            raise CommandError(f"No responses were recorded from {provider.ip_address}")
+
+        for path in files:
+            responses = sum(len(host_responses) for host_responses in pool.responses.values())
+            self.stdout.write(self.style.SUCCESS(f"Записано ответов: {responses} -> {path}"))
+        self.stdout.write(self.style.WARNING(
+            "Фикстуры содержат серийные номера и другие данные сервера, проверьте их перед публикацией."
+        ))
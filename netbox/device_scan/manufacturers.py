@@ -0,0 +1,168 @@
+import re
+import threading
+import uuid
+
+from dcim.models import Manufacturer
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils.text import slugify
+
+from netbox.plugins import get_plugin_config
+
+# Версия кеша в общем Django cache (Redis): меняется при любом изменении Manufacturer,
+# чтобы все воркеры сбросили свои локальные копии
+CACHE_VERSION_KEY = "device_scan:manufacturers:version"
+
+# Слова, которые BMC добавляют к названию производителя и которые не влияют на сравнение
+NAME_SUFFIXES = {
+    "inc", "incorporated", "corp", "corporation", "co", "company", "ltd", "limited", "llc",
+    "gmbh", "ag", "plc", "sa", "bv", "semiconductor", "semiconductors", "technology",
+    "technologies", "tech", "electronics", "international", "systems",
+}
+
+# Разные написания одного производителя -> каноническое название
+# Ключи сравниваются в нормализованном виде (см. normalize_manufacturer_name)
+MANUFACTURER_ALIASES = {
+    "hynix": "SK Hynix",
+    "sk hynix": "SK Hynix",
+    "skhynix": "SK Hynix",
+    "samsung": "Samsung",
+    "micron": "Micron",
+    "crucial": "Micron",
+    "kingston": "Kingston",
+    "intel": "Intel",
+    "genuineintel": "Intel",
+    "amd": "AMD",
+    "authenticamd": "AMD",
+    "advanced micro devices": "AMD",
+    "dell": "Dell",
+    "dell emc": "Dell",
+    "hpe": "HPE",
+    "hewlett packard enterprise": "HPE",
+    "huawei": "Huawei",
+    "delta": "Delta",
+    "liteon": "Lite-On",
+    "lite on": "Lite-On",
+    "seagate": "Seagate",
+    "toshiba": "Toshiba",
+    "kioxia": "Kioxia",
+    "western digital": "Western Digital",
+    "wdc": "Western Digital",
+    "broadcom": "Broadcom",
+    "lsi": "Broadcom",
+    "avago": "Broadcom",
+}
+
+EMPTY_NAMES = ("N/A", "None", "")
+
+
+def normalize_manufacturer_name(name):
+    """
+    Приводит название к виду для сравнения:
+    "Hynix Semiconductor Inc." -> "hynix", "SK-Hynix" -> "sk hynix"
+    """
+    words = re.sub(r"[^a-z0-9]+", " ", str(name).lower()).split()
+    while len(words) > 1 and words[-1] in NAME_SUFFIXES:
+        words.pop()
+    return " ".join(words)
+
+
+class ManufacturerCache:
+    """
+    Кеш нормализованное название -> Manufacturer на время жизни воркера
+
+    Все производители загружаются одним запросом, дальше поиск идет по словарю.
+    Кеш сбрасывается сигналами при изменении Manufacturer (см. signals.py),
+    другие процессы узнают об изменении по версии в Django cache (check_version).
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._by_key = None
+        self._aliases = None
+        self._version = None
+
+    @property
+    def aliases(self):
+        if self._aliases is None:
+            aliases = {
+                normalize_manufacturer_name(alias): canonical
+                for alias, canonical in MANUFACTURER_ALIASES.items()
+            }
+            # Дополнительные синонимы из PLUGINS_CONFIG["device_scan"]["manufacturer_aliases"]
+            custom = get_plugin_config("device_scan", "manufacturer_aliases") or {}
+            aliases.update({
+                normalize_manufacturer_name(alias): canonical
+                for alias, canonical in custom.items()
+            })
+            self._aliases = aliases
+        return self._aliases
+
+    def canonical_key(self, name):
+        """Ключ кеша: нормализованное каноническое название"""
+        key = normalize_manufacturer_name(name)
+        canonical = self.aliases.get(key)
+        return normalize_manufacturer_name(canonical) if canonical else key
+
+    def canonical_name(self, name):
+        name = str(name).strip()
+        return self.aliases.get(normalize_manufacturer_name(name), name)
+
+    def clear(self):
+        with self._lock:
+            self._by_key = None
+
+    def check_version(self):
+        """Сбрасывает кеш, если Manufacturer менялся в другом процессе"""
+        version = cache.get(CACHE_VERSION_KEY)
+        if version != self._version:
+            with self._lock:
+                self._by_key = None
+                self._version = version
+
+    def _load(self):
+        with self._lock:
+            if self._by_key is None:
+                by_key = {}
+                # Если в базе уже есть дубликаты, используем самый старый
+                for manufacturer in Manufacturer.objects.order_by("pk"):
+                    by_key.setdefault(self.canonical_key(manufacturer.name), manufacturer)
+                self._by_key = by_key
+            return self._by_key
+
+    def get_or_create(self, name):
+        if not name or str(name).strip() in EMPTY_NAMES:
+            return None
+
+        key = self.canonical_key(name)
+        if not key:
+            return None
+
+        manufacturer = self._load().get(key)
+        if manufacturer:
+            return manufacturer
+
+        name = self.canonical_name(name)
+        slug = slugify(name)[:50]
+        try:
+            with transaction.atomic():
+                manufacturer = Manufacturer.objects.create(name=name, slug=slug)
+        except IntegrityError:
+            # Создан параллельно другим воркером
+            manufacturer = (
+                Manufacturer.objects.filter(name__iexact=name).first()
+                or Manufacturer.objects.filter(slug=slug).first()
+            )
+            if manufacturer is None:
+                raise
+
+        # Сигнал post_save сбросил кеш - возвращаем найденного сразу, остальное перечитается
+        return manufacturer
+
+
+manufacturer_cache = ManufacturerCache()
+
+
+def invalidate_manufacturer_cache():
+    manufacturer_cache.clear()
+    cache.set(CACHE_VERSION_KEY, uuid.uuid4().hex, timeout=None)
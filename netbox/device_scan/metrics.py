@@ -0,0 +1,76 @@
+from collections import defaultdict
+
+from django.db.models import Avg, Count, F, Max, Sum
+from prometheus_client.core import GaugeMetricFamily
+
+from .models import DeviceScan
+
+# Метрики группируются по модели сервера и версии BMC, чтобы находить медленные прошивки
+LABELS = ["manufacturer", "model", "firmware"]
+
+# (имя, описание, агрегат по DeviceScan)
+SCAN_METRICS = (
+    ("device_scan_devices", "Devices with a finished scan", Count("pk")),
+    ("device_scan_duration_seconds_avg", "Average duration of the last scan", Avg("duration")),
+    ("device_scan_duration_seconds_max", "Maximum duration of the last scan", Max("duration")),
+    ("device_scan_requests_avg", "Average number of Redfish requests per scan", Avg("requests")),
+    ("device_scan_retries", "Redfish request retries in the last scans", Sum("retries")),
+    ("device_scan_bytes_avg", "Average bytes received from the BMC per scan", Avg("bytes_received")),
+    ("device_scan_db_writes_avg", "Average number of DB writes per scan", Avg("db_writes")),
+)
+
+
+class DeviceScanCollector:
+    """
+    Prometheus collector статистики сканирования
+
+    Сканы выполняются в Celery воркерах, поэтому метрики не копятся в памяти
+    процесса, а считаются из DeviceScan при каждом запросе /metrics.
+    """
+
+    def describe(self):
+        # Без describe() prometheus_client вызвал бы collect() при регистрации, до готовности базы
+        yield GaugeMetricFamily("device_scan_status", "Devices by scan status", labels=["status"])
+        for name, documentation, _ in SCAN_METRICS:
+            yield GaugeMetricFamily(name, documentation, labels=LABELS)
+        yield GaugeMetricFamily(
+            "device_scan_section_seconds_avg", "Average time per inventory section", labels=LABELS + ["section"]
+        )
+
+    def collect(self):
+        status = GaugeMetricFamily("device_scan_status", "Devices by scan status", labels=["status"])
+        for row in DeviceScan.objects.values("status").annotate(count=Count("pk")).order_by():
+            status.add_metric([row["status"]], row["count"])
+        yield status
+
+        scans = DeviceScan.objects.filter(duration__isnull=False).annotate(
+            manufacturer_name=F("device__device_type__manufacturer__name"),
+            model_name=F("device__device_type__model"),
+        )
+
+        families = [
+            GaugeMetricFamily(name, documentation, labels=LABELS) for name, documentation, _ in SCAN_METRICS
+        ]
+        rows = scans.values("manufacturer_name", "model_name", "firmware").annotate(**{
+            name: aggregate for name, _, aggregate in SCAN_METRICS
+        }).order_by()
+        for row in rows:
+            labels = [row["manufacturer_name"] or "", row["model_name"] or "", row["firmware"] or ""]
+            for family, (name, _, _) in zip(families, SCAN_METRICS):
+                family.add_metric(labels, row[name] or 0)
+        yield from families
+
+        # Время секций хранится в JSON, усредняем в Python
+        sections = defaultdict(list)
+        for manufacturer, model, firmware, timings in scans.values_list(
+            "manufacturer_name", "model_name", "firmware", "timings"
+        ):
+            for section, seconds in (timings or {}).items():
+                sections[(manufacturer or "", model or "", firmware or "", section)].append(seconds)
+
+        section_family = GaugeMetricFamily(
+            "device_scan_section_seconds_avg", "Average time per inventory section", labels=LABELS + ["section"]
+        )
+        for labels, values in sections.items():
+            section_family.add_metric(list(labels), sum(values) / len(values))
+        yield section_family
@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('device_scan', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='devicescan',
+            name='next_scan',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='devicescan',
+            name='failures',
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
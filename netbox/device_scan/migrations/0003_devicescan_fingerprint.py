@@ -0,0 +1,21 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('device_scan', '0002_devicescan_next_scan_failures'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='devicescan',
+            name='fingerprint',
+            field=models.CharField(blank=True, max_length=64, null=True),
+        ),
+        migrations.AddField(
+            model_name='devicescan',
+            name='last_full_scan',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,46 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('device_scan', '0003_devicescan_fingerprint'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='devicescan',
+            name='duration',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='devicescan',
+            name='requests',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='devicescan',
+            name='retries',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='devicescan',
+            name='bytes_received',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='devicescan',
+            name='db_writes',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='devicescan',
+            name='timings',
+            field=models.JSONField(blank=True, default=dict),
+        ),
+        migrations.AddField(
+            model_name='devicescan',
+            name='firmware',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+    ]
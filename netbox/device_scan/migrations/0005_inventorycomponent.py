@@ -0,0 +1,40 @@
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('dcim', '0215_rackreservation_status'),
+        ('device_scan', '0004_devicescan_scan_stats'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InventoryComponent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False)),
+                ('kind', models.CharField(choices=[('cpu', 'CPU'), ('memory', 'Memory'), ('disk', 'Disk'), ('psu', 'PSU'), ('fan', 'Fan'), ('raid_controller', 'RAID controller'), ('raid_volume', 'RAID volume')], max_length=20)),
+                ('model', models.CharField(blank=True, max_length=100)),
+                ('status', models.CharField(blank=True, max_length=20)),
+                ('capacity_gb', models.DecimalField(blank=True, decimal_places=2, max_digits=12, null=True)),
+                ('speed_mhz', models.PositiveIntegerField(blank=True, null=True)),
+                ('cores', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('threads', models.PositiveSmallIntegerField(blank=True, null=True)),
+                ('watts', models.PositiveIntegerField(blank=True, null=True)),
+                ('rpm', models.PositiveIntegerField(blank=True, null=True)),
+                ('memory_type', models.CharField(blank=True, max_length=20)),
+                ('media_type', models.CharField(blank=True, max_length=20)),
+                ('protocol', models.CharField(blank=True, max_length=20)),
+                ('raid_level', models.CharField(blank=True, max_length=20)),
+                ('device', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='inventory_components', to='dcim.device')),
+                ('inventory_item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='scan_component', to='dcim.inventoryitem')),
+            ],
+            options={
+                'indexes': [
+                    models.Index(fields=['kind', 'model'], name='device_scan_component_model'),
+                    models.Index(fields=['device', 'kind'], name='device_scan_component_device'),
+                ],
+            },
+        ),
+    ]
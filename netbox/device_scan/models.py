@@ -17,6 +17,24 @@ class DeviceScan(NetBoxModel):
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="PENDING")
     attemts = models.IntegerField(default=0)
     error = models.TextField(null=True, blank=True)
+    # Когда устройство снова нужно сканировать; пока скан в очереди или выполняется - срок аренды
+    next_scan = models.DateTimeField(null=True, blank=True, db_index=True)
+    # Ошибок подряд, от этого зависит пауза перед следующей попыткой
+    failures = models.PositiveIntegerField(default=0)
+    # Отпечаток конфигурации сервера с последнего полного скана (см. AsyncBaseProvider.get_fingerprint)
+    fingerprint = models.CharField(max_length=64, null=True, blank=True)
+    last_full_scan = models.DateTimeField(null=True, blank=True)
+
+    # Статистика последнего скана
+    duration = models.FloatField(null=True, blank=True)
+    requests = models.PositiveIntegerField(default=0)
+    retries = models.PositiveIntegerField(default=0)
+    bytes_received = models.PositiveBigIntegerField(default=0)
+    db_writes = models.PositiveIntegerField(default=0)
+    # Время секций сбора, секунды: {"System": 0.4, "Memory": 1.2, ...}
+    timings = models.JSONField(default=dict, blank=True)
+    # Версия Redfish сервиса BMC, например "Integrated Dell Remote Access Controller 1.11.0"
+    firmware = models.CharField(max_length=100, null=True, blank=True)
 
     def __str__(self):
         return f"{self.device} - {self.status}"
@@ -25,3 +43,67 @@ class DeviceScan(NetBoxModel):
         return reverse("plugins:device_scan:devicescan_view", args=[self.pk])
 
 
+class InventoryComponentQuerySet(models.QuerySet):
+
+    def summary(self, *group_by):
+        """
+        Агрегаты по компонентам одним GROUP BY, например общий объем памяти по сайтам:
+            InventoryComponent.objects.filter(kind="memory").summary("device__site__name")
+        """
+        return self.values(*group_by).annotate(
+            count=models.Count("pk"),
+            capacity_gb=models.Sum("capacity_gb"),
+            cores=models.Sum("cores"),
+            threads=models.Sum("threads"),
+            watts=models.Sum("watts"),
+        ).order_by(*group_by)
+
+
+class InventoryComponent(models.Model):
+    """
+    Типизированные характеристики InventoryItem, найденного сканированием
+
+    Заполняется из нормализованной схемы (vendors/base/schema.py), чтобы вопросы
+    вида "сколько памяти на сайте" или "все диски модели X" решались SQL запросом,
+    а не разбором описаний InventoryItem.
+    """
+    KIND_CHOICES = [
+        ("cpu", "CPU"),
+        ("memory", "Memory"),
+        ("disk", "Disk"),
+        ("psu", "PSU"),
+        ("fan", "Fan"),
+        ("raid_controller", "RAID controller"),
+        ("raid_volume", "RAID volume"),
+    ]
+
+    # Не "component": так называется GenericForeignKey самого InventoryItem
+    inventory_item = models.OneToOneField(
+        "dcim.InventoryItem", on_delete=models.CASCADE, related_name="scan_component"
+    )
+    # Дублирует inventory_item.device, чтобы агрегаты по устройствам/сайтам не требовали лишнего JOIN
+    device = models.ForeignKey(Device, on_delete=models.CASCADE, related_name="inventory_components")
+    kind = models.CharField(max_length=20, choices=KIND_CHOICES)
+    model = models.CharField(max_length=100, blank=True)
+    status = models.CharField(max_length=20, blank=True)
+    capacity_gb = models.DecimalField(max_digits=12, decimal_places=2, null=True, blank=True)
+    speed_mhz = models.PositiveIntegerField(null=True, blank=True)
+    cores = models.PositiveSmallIntegerField(null=True, blank=True)
+    threads = models.PositiveSmallIntegerField(null=True, blank=True)
+    watts = models.PositiveIntegerField(null=True, blank=True)
+    rpm = models.PositiveIntegerField(null=True, blank=True)
+    memory_type = models.CharField(max_length=20, blank=True)
+    media_type = models.CharField(max_length=20, blank=True)
+    protocol = models.CharField(max_length=20, blank=True)
+    raid_level = models.CharField(max_length=20, blank=True)
+
+    objects = InventoryComponentQuerySet.as_manager()
+
+    class Meta:
+        indexes = (
+            models.Index(fields=("kind", "model"), name="device_scan_component_model"),
+            models.Index(fields=("device", "kind"), name="device_scan_component_device"),
+        )
+
+    def __str__(self):
+        return f"{self.device} - {self.inventory_item.name}"
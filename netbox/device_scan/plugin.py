@@ -10,9 +10,51 @@ class DeviceScanConfig(PluginConfig):
     author_email = "vkim@tashsoftcom.uz"
     base_url = "device-scan"
     required_settings = []
-    default_settings = {}
+    default_settings = {
+        # Максимум одновременных Redfish запросов к одному BMC
+        "max_concurrent_requests": 4,
+        # Максимум стартов запросов в секунду к одному BMC
+        "requests_per_second": 10,
+        # Сколько серверов один воркер опрашивает одновременно
+        "max_concurrent_devices": 100,
+        # Общий лимит HTTP соединений воркера на все BMC
+        "max_connections": 200,
+        # Максимальный таймаут запроса к BMC (секунды); фактический подстраивается под время ответов
+        "request_timeout": 30,
+        # Таймаут установки соединения (секунды): выключенный BMC отваливается быстро
+        "connect_timeout": 5,
+        # Сетевых ошибок подряд, после которых сканирование сервера прерывается
+        "failure_threshold": 3,
+        # Дольше этого (секунды) Retry-After от BMC не ждем
+        "max_retry_after": 30,
+        # Сколько устройств уходит в одну задачу scan_devices_task
+        "scan_batch_size": 50,
+        # Как часто пересканировать исправное устройство (секунды)
+        "scan_interval": 3600,
+        # Пауза после ошибки (секунды), удваивается с каждой ошибкой подряд до max_error_backoff
+        "error_backoff": 300,
+        "max_error_backoff": 86400,
+        # Сколько устройств может одновременно стоять в очереди и сканироваться
+        "max_active_scans": 500,
+        # Через сколько секунд скан в очереди/RUNNING считается зависшим и запускается заново
+        "scan_timeout": 1800,
+        # Полный обход не реже чем раз в столько секунд, даже если отпечаток не менялся
+        "full_scan_interval": 86400,
+        # Дополнительные синонимы производителей {"написание от BMC": "Название в NetBox"}
+        "manufacturer_aliases": {},
+    }
     caching_config = {}
 
+    def ready(self):
+        super().ready()
+        from . import signals  # noqa: F401
+
+        from django.conf import settings
+        if settings.METRICS_ENABLED:
+            from prometheus_client import REGISTRY
+            from .metrics import DeviceScanCollector
+            REGISTRY.register(DeviceScanCollector())
+
 
 config = DeviceScanConfig
 
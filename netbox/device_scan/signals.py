@@ -0,0 +1,11 @@
+from dcim.models import Manufacturer
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .manufacturers import invalidate_manufacturer_cache
+
+
+@receiver((post_save, post_delete), sender=Manufacturer)
+def clear_manufacturer_cache(sender, **kwargs):
+    """Сбрасывает кеш производителей при любом изменении Manufacturer"""
+    invalidate_manufacturer_cache()
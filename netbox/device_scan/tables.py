@@ -11,10 +11,27 @@ class DeviceScanTable(NetBoxTable):
     last_finished = tables.DateTimeColumn()
     attemts = tables.Column()
     error = tables.Column()
+    next_scan = tables.DateTimeColumn()
+    failures = tables.Column()
+    last_full_scan = tables.DateTimeColumn()
+    duration = tables.Column(verbose_name="Duration (s)")
+    requests = tables.Column()
+    retries = tables.Column()
+    bytes_received = tables.Column()
+    db_writes = tables.Column()
+    timings = tables.Column(orderable=False)
+    firmware = tables.Column()
+
+    def render_timings(self, value):
+        return ", ".join(f"{name}: {seconds}s" for name, seconds in value.items())
 
 
     class Meta(NetBoxTable.Meta):
         model = DeviceScan
-        fields = ('device', 'status', 'last_started', 'last_finished', 'attemts', 'error')
-        default_columns = ('device', 'status', 'last_finished', 'error')
+        fields = (
+            'device', 'status', 'last_started', 'last_finished', 'attemts', 'error',
+            'next_scan', 'failures', 'last_full_scan',
+            'duration', 'requests', 'retries', 'bytes_received', 'db_writes', 'timings', 'firmware',
+        )
+        default_columns = ('device', 'status', 'last_finished', 'duration', 'requests', 'error')
         
\ No newline at end of file
@@ -1,4 +1,8 @@
+from collections import defaultdict
+from datetime import timedelta
+
 from celery import shared_task
+from django.db.models import F, Q
 from django.utils import timezone
 from dcim.models import Device
 from .models import DeviceScan
@@ -6,7 +10,10 @@ from .inventory_mapper import map_data_to_inventory
 from vendors.dell.vendor import DellProvider
 from vendors.hp.vendor import HPProvider
 from vendors.huawei.vendor import HuaweiProvider
+from vendors.base.aio import ConnectionPool, run_inventory, run_inventories
+from django.core.cache import cache
 from django.core.management import call_command
+from netbox.plugins import get_plugin_config
 
 PROVIDERS = {
     "dell": DellProvider,
@@ -22,96 +29,392 @@ VENDOR_CREDENTIALS = {
 }
 
 
-@shared_task
-def calculate_cached_counts_task():
-    call_command('calculate_cached_counts')
+# Поля DeviceScan, которые меняет скан (пакетная задача пишет их одним bulk_update)
+SCAN_FIELDS = (
+    "status", "last_started", "last_finished", "next_scan", "attemts", "error", "failures",
+    "fingerprint", "last_full_scan", "duration", "requests", "retries", "bytes_received",
+    "db_writes", "timings", "firmware", "last_updated",
+)
+
+
+# Ключ в Django cache: отложенный пересчет счетчиков уже запланирован
+RECOUNT_SCHEDULED_KEY = "device_scan:recount:scheduled"
+RECOUNT_DELAY = 600  # 10 минут
 
 
 @shared_task
-def scan_device_task(device_id):
-    device = Device.objects.get(pk=device_id)
-    scan, _ = DeviceScan.objects.get_or_create(device=device)
+def calculate_cached_counts_task(since=None):
+    """
+    Исправляет только разошедшиеся счетчики (calculate_cached_counts --drift)
+
+    since - ISO время: проверяются только объекты, у которых с тех пор менялись компоненты.
+    """
+    # Изменения, сделанные во время пересчета, должны запланировать следующий
+    cache.delete(RECOUNT_SCHEDULED_KEY)
+    call_command('calculate_cached_counts', drift=True, since=since)
+
+
+def schedule_cached_counts(countdown=RECOUNT_DELAY):
+    """
+    Планирует один отложенный пересчет счетчиков на все сканы за countdown секунд
+
+    cache.add атомарен, поэтому из всех задач обхода пересчет ставит только первая.
+
+    Returns:
+        bool: True, если пересчет поставлен этим вызовом
+    """
+    if not cache.add(RECOUNT_SCHEDULED_KEY, True, timeout=countdown):
+        return False
+    # Запас на сканы, которые начались раньше, чем был поставлен пересчет
+    since = timezone.now() - timedelta(seconds=RECOUNT_DELAY)
+    calculate_cached_counts_task.apply_async(kwargs={"since": since.isoformat()}, countdown=countdown)
+    return True
+
+
+def get_vendor(device):
+    """Ключ провайдера (dell, hp, huawei) по производителю устройства"""
+    manufacturer = (device.device_type.manufacturer.name or "").lower()
+
+    for key in PROVIDERS:
+        if key in manufacturer:
+            return key
+
+    raise Exception(f"Provider for {manufacturer} is not found")
+
+
+def get_provider(device, pool=None):
+    """
+    Подбирает провайдер по производителю устройства
+
+    Args:
+        device: Device с заполненным oob_ip
+        pool: общий ConnectionPool (для пакетного сканирования)
+
+    Raises:
+        Exception: нет OOB IP или провайдера для производителя
+    """
+    ip = None
+    if device.oob_ip:
+        ip = str(device.oob_ip.address.ip)
+    if not ip:
+        raise Exception("OOB IP is not found")
+
+    key = get_vendor(device)
+    provider_class = PROVIDERS[key]
+    creds = VENDOR_CREDENTIALS.get(key, {})
+
+    return provider_class(
+        ip,
+        creds.get("username"),
+        creds.get("password"),
+        max_concurrent_requests=get_plugin_config("device_scan", "max_concurrent_requests"),
+        requests_per_second=get_plugin_config("device_scan", "requests_per_second"),
+        pool=pool,
+    )
 
+
+def begin_scan(scan, now):
     scan.status = "RUNNING"
-    scan.last_started = timezone.now()
+    scan.last_started = now
+    scan.last_updated = now
+    # Пока скан идет, планировщик устройство не трогает; если воркер упадет, аренда истечет
+    scan.next_scan = now + timedelta(seconds=get_plugin_config("device_scan", "scan_timeout"))
     scan.attemts += 1
     scan.error = ""
+
+
+def start_scan(device):
+    scan, _ = DeviceScan.objects.get_or_create(device=device)
+    begin_scan(scan, timezone.now())
     scan.save()
 
+    return scan
 
-    try:
-        ip = None
-        if device.oob_ip:
-            ip = str(device.oob_ip.address.ip)
-        if not ip:
-            raise Exception("OOB IP is not found")
-
-        manufacturer = (device.device_type.manufacturer.name or "").lower()
-        provider_class = None
-
-        for key, cls in PROVIDERS.items():
-            if key in manufacturer:
-                provider_class = cls
-                break
-        if not provider_class:
-            raise Exception(f"Provider for {manufacturer} is not found")
-
-        calculate_cached_counts_task.apply_async(countdown=600)  # 10 минут    print(f"Using {manufacturer} provider")
-
-        creds = VENDOR_CREDENTIALS.get(manufacturer, {})
-        username = creds.get("username")
-        password = creds.get("password")
-
-
-        provider = provider_class(ip, username, password)
-        # provider = DellProvider(ip, "root", "UzMaster2021")
-        data = provider.get_all_inventory()
-        
-        # Проверяем, что получены хотя бы базовые данные (System info)
-        if not data or not data.get("System"):
-            raise Exception("Failed to retrieve basic system information. The device may be unavailable or the IP address may be incorrect.")
-        
-        map_data_to_inventory(device, data)
+
+def start_scans(devices):
+    """
+    Пакетный start_scan: отмечает устройства RUNNING несколькими запросами на всю пачку
+
+    Returns:
+        dict: {device_id: DeviceScan}
+    """
+    now = timezone.now()
+    scans = {scan.device_id: scan for scan in DeviceScan.objects.filter(device__in=devices)}
+
+    missing = [DeviceScan(device=device) for device in devices if device.pk not in scans]
+    if missing:
+        DeviceScan.objects.bulk_create(missing, ignore_conflicts=True)
+        scans = {scan.device_id: scan for scan in DeviceScan.objects.filter(device__in=devices)}
+
+    for scan in scans.values():
+        begin_scan(scan, now)
+    DeviceScan.objects.bulk_update(scans.values(), SCAN_FIELDS)
+
+    return scans
+
+
+def get_retry_delay(failures):
+    """Пауза перед повторным сканом после failures ошибок подряд: error_backoff, x2, x4 ... до max_error_backoff"""
+    delay = get_plugin_config("device_scan", "error_backoff") * 2 ** (max(failures, 1) - 1)
+    return min(delay, get_plugin_config("device_scan", "max_error_backoff"))
+
+
+def finish_scan(scan, error=None, save=True):
+    now = timezone.now()
+    if error is None:
         scan.status = "OK"
+        scan.failures = 0
+        scan.next_scan = now + timedelta(seconds=get_plugin_config("device_scan", "scan_interval"))
+    else:
+        scan.status = "ERROR"
+        scan.error = str(error)
+        scan.failures += 1
+        scan.next_scan = now + timedelta(seconds=get_retry_delay(scan.failures))
+    scan.last_finished = now
+    scan.last_updated = now
+    if save:
+        scan.save()
+
+
+def save_inventory(device, data):
+    # Проверяем, что получены хотя бы базовые данные (System info)
+    if not data or not data.get("System"):
+        raise Exception("Failed to retrieve basic system information. The device may be unavailable or the IP address may be incorrect.")
+
+    return map_data_to_inventory(device, data)
+
+
+def record_scan_stats(scan, stats):
+    """Переносит статистику провайдера (AsyncBaseProvider.get_scan_stats) в DeviceScan"""
+    if not stats:
+        return
+    scan.requests = stats.get("requests", 0)
+    scan.retries = stats.get("retries", 0)
+    scan.bytes_received = stats.get("bytes", 0)
+    scan.timings = stats.get("timings") or {}
+    scan.duration = scan.timings.get("Total")
+    scan.firmware = (stats.get("firmware") or "")[:100] or scan.firmware
+
+
+def get_known_fingerprint(scan):
+    """
+    Отпечаток, при совпадении с которым полный скан можно пропустить
+    None, если нужен полный скан: его еще не было, прошлый скан с ошибкой
+    или с последнего полного прошло больше full_scan_interval.
+    """
+    if scan.failures or not scan.fingerprint or not scan.last_full_scan:
+        return None
+    full_scan_interval = timedelta(seconds=get_plugin_config("device_scan", "full_scan_interval"))
+    if timezone.now() - scan.last_full_scan > full_scan_interval:
+        return None
+    return scan.fingerprint
+
+
+def save_scan_result(device, scan, data):
+    """
+    Сохраняет результат скана
+
+    Returns:
+        bool: False, если конфигурация не изменилась и инвентарь не трогали
+    """
+    record_scan_stats(scan, data and data.get("scan_stats"))
+    scan.db_writes = 0
+    if data and data.get("unchanged"):
+        return False
+
+    result = save_inventory(device, data)
+    scan.db_writes = result["db_writes"]
+    # Отпечаток запоминаем только после полной и закоммиченной синхронизации:
+    # с ним следующие сканы пропускают разбор инвентаря до full_scan_interval
+    if result["complete"]:
+        scan.fingerprint = data.get("fingerprint")
+        scan.last_full_scan = timezone.now()
+    else:
+        scan.fingerprint = None
+    return True
+
+
+@shared_task
+def scan_device_task(device_id):
+    device = Device.objects.select_related("oob_ip", "device_type__manufacturer").get(pk=device_id)
+    scan = start_scan(device)
+    provider = None
+
+    try:
+        provider = get_provider(device)
+
+        # Ручной скан всегда полный
+        data = run_inventory(provider)
+        save_scan_result(device, scan, data)
+        schedule_cached_counts()
 
     except Exception as e:
-        scan.status = "ERROR"
-        scan.error = str(e)
+        if provider is not None:
+            record_scan_stats(scan, provider.get_scan_stats())
+        finish_scan(scan, e)
 
-    finally:
-        scan.last_finished = timezone.now()
-        scan.save()
+    else:
+        finish_scan(scan)
 
 
 @shared_task
-def scan_all_devices_task():
-    devices = Device.objects.all()
-    total = 0
-    launched = 0
-
-    for dev in devices:
-        total += 1
-
-        ip = None
-        if dev.oob_ip:
-            ip = str(dev.oob_ip.address.ip)
-        if not ip:
-            continue
-
-        DeviceScan.objects.update_or_create(
-            device=dev,
-            defaults = {"status": "PENDING", "error": ""}
-        )
+def scan_devices_task(device_ids):
+    """
+    Сканирует пачку устройств в одном воркере
+
+    Устройства читаются одним запросом, статусы DeviceScan пишутся пакетно
+    (bulk_update в начале и в конце). Все BMC опрашиваются одновременно в одном
+    event loop через общий пул соединений, поэтому задача не держит отдельный
+    слот Celery на каждый сервер.
+    """
+    pool = ConnectionPool(
+        max_connections=get_plugin_config("device_scan", "max_connections"),
+        max_connections_per_host=get_plugin_config("device_scan", "max_concurrent_requests"),
+        requests_per_second=get_plugin_config("device_scan", "requests_per_second"),
+        timeout=get_plugin_config("device_scan", "request_timeout"),
+        connect_timeout=get_plugin_config("device_scan", "connect_timeout"),
+        failure_threshold=get_plugin_config("device_scan", "failure_threshold"),
+        max_retry_after=get_plugin_config("device_scan", "max_retry_after"),
+    )
+
+    devices = list(
+        Device.objects.filter(pk__in=device_ids).select_related("oob_ip", "device_type__manufacturer")
+    )
+    scans = start_scans(devices)
+
+    # Группируем по провайдеру: серверы одного производителя опрашиваются подряд
+    by_vendor = defaultdict(list)
+    for device in devices:
+        scan = scans[device.pk]
+        try:
+            by_vendor[get_vendor(device)].append((device, scan, get_provider(device, pool)))
+        except Exception as e:
+            finish_scan(scan, e, save=False)
+
+    jobs = [job for vendor in sorted(by_vendor) for job in by_vendor[vendor]]
 
-        scan_device_task.delay(dev.id)
-        launched += 1
+    results = run_inventories(
+        [provider for _, _, provider in jobs],
+        pool=pool,
+        max_concurrent_devices=get_plugin_config("device_scan", "max_concurrent_devices"),
+        fingerprints=[get_known_fingerprint(scan) for _, scan, _ in jobs],
+    )
 
+    failed = 0
+    unchanged = 0
+    for (device, scan, _), data in zip(jobs, results):
+        try:
+            if isinstance(data, Exception):
+                record_scan_stats(scan, getattr(data, "scan_stats", None))
+                raise data
+            if not save_scan_result(device, scan, data):
+                unchanged += 1
+        except Exception as e:
+            failed += 1
+            finish_scan(scan, e, save=False)
+        else:
+            finish_scan(scan, save=False)
+
+    DeviceScan.objects.bulk_update(scans.values(), SCAN_FIELDS)
+
+    # Счетчики пересчитываем, только если инвентарь действительно менялся
+    if len(jobs) > unchanged:
+        schedule_cached_counts()
 
     return {
-        "total": total,
-        "launched": launched,
+        "total": len(device_ids),
+        "scanned": len(jobs),
+        "unchanged": unchanged,
+        "failed": failed,
+        "vendors": {vendor: len(vendor_jobs) for vendor, vendor_jobs in by_vendor.items()},
     }
 
 
+def get_scan_candidates(limit, now=None):
+    """
+    Устройства, которые пора сканировать, одним запросом
+
+    Берутся устройства с OOB IP, у которых срок next_scan наступил или скана еще не было.
+    Сначала самые просроченные. Устройства в очереди или RUNNING не попадают,
+    пока не истечет их аренда (scan_timeout).
+    """
+    now = now or timezone.now()
+    stale_before = now - timedelta(seconds=get_plugin_config("device_scan", "scan_timeout"))
+    return (
+        Device.objects.filter(oob_ip__isnull=False)
+        .filter(
+            Q(scan_status__isnull=True)
+            | Q(scan_status__next_scan__isnull=True)
+            | Q(scan_status__next_scan__lte=now)
+        )
+        # Скан, запущенный до появления next_scan или вручную, тоже не дублируем
+        .exclude(scan_status__status="RUNNING", scan_status__last_started__gt=stale_before)
+        .select_related("oob_ip", "device_type__manufacturer", "scan_status")
+        .order_by(F("scan_status__next_scan").asc(nulls_first=True), "pk")[:limit]
+    )
+
+
+def exclude_active_scans(devices, now=None):
+    """Убирает устройства, скан которых уже в очереди или выполняется (аренда не истекла)"""
+    now = now or timezone.now()
+    return devices.exclude(
+        scan_status__status__in=("PENDING", "RUNNING"),
+        scan_status__next_scan__gt=now,
+    )
+
+
+def enqueue_scans(devices, now=None):
+    """
+    Ставит устройства в очередь сканирования пачками по scan_batch_size
+
+    Args:
+        devices: устройства с select_related("scan_status")
+
+    Returns:
+        list: ID поставленных в очередь устройств
+    """
+    now = now or timezone.now()
+    batch_size = get_plugin_config("device_scan", "scan_batch_size")
+    lease = now + timedelta(seconds=get_plugin_config("device_scan", "scan_timeout"))
+    devices = list(devices)
+
+    # Отмечаем устройства как поставленные в очередь: существующие одним UPDATE, новые одним INSERT
+    existing_ids = [dev.scan_status.pk for dev in devices if hasattr(dev, "scan_status")]
+    DeviceScan.objects.filter(pk__in=existing_ids).update(status="PENDING", error="", next_scan=lease)
+    DeviceScan.objects.bulk_create(
+        [
+            DeviceScan(device=dev, status="PENDING", next_scan=lease)
+            for dev in devices if not hasattr(dev, "scan_status")
+        ],
+        ignore_conflicts=True,
+    )
 
+    device_ids = [dev.pk for dev in devices]
+    for i in range(0, len(device_ids), batch_size):
+        scan_devices_task.delay(device_ids[i:i + batch_size])
 
+    return device_ids
+
+
+@shared_task
+def scan_all_devices_task():
+    """
+    Планировщик сканирования (запускается celery beat)
+
+    Ставит в очередь только устройства, у которых подошел срок, и не больше,
+    чем позволяет max_active_scans с учетом уже запущенных сканов.
+    """
+    now = timezone.now()
+
+    # В очереди или выполняются сейчас (аренда еще не истекла)
+    active = DeviceScan.objects.filter(status__in=("PENDING", "RUNNING"), next_scan__gt=now).count()
+    slots = get_plugin_config("device_scan", "max_active_scans") - active
+    if slots <= 0:
+        return {"active": active, "launched": 0}
+
+    device_ids = enqueue_scans(get_scan_candidates(slots, now), now)
+
+    return {
+        "active": active,
+        "launched": len(device_ids),
+    }
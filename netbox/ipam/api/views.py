@@ -406,10 +406,11 @@ class AvailableIPAddressesView(AvailableObjectsView):
     def get_available_objects(self, parent, limit=None):
         # Calculate available IPs within the parent
         ip_list = []
-        for index, ip in enumerate(parent.get_available_ips(), start=1):
-            ip_list.append(ip)
-            if index == limit:
-                break
+        for available_ip_range in parent.get_available_ip_ranges():
+            for ip in available_ip_range:
+                ip_list.append(ip)
+                if len(ip_list) == limit:
+                    return ip_list
         return ip_list
 
     def get_extra_context(self, parent):
@@ -0,0 +1,81 @@
+import netaddr
+from django.db import connections, router
+from django.db.models import F
+
+from ipam.lookups import Host, Inet
+
+__all__ = (
+    'get_available_ip_ranges',
+    'get_used_ip_space',
+)
+
+
+# Merge overlapping IP addresses/ranges into contiguous blocks ("gaps and islands"): a row starts a new block unless it
+# begins at or before the highest address covered by any preceding row.
+USED_IP_SPACE_SQL = """
+    SELECT HOST(MIN(first_ip)), HOST(MAX(last_ip))
+    FROM (
+        SELECT first_ip, last_ip, SUM(is_new_block) OVER (ORDER BY first_ip, last_ip) AS block
+        FROM (
+            SELECT first_ip, last_ip,
+                CASE WHEN first_ip <= MAX(last_ip) OVER (
+                    ORDER BY first_ip, last_ip ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING
+                ) THEN 0 ELSE 1 END AS is_new_block
+            FROM ({}) used
+        ) blocks
+    ) numbered_blocks
+    GROUP BY block
+    ORDER BY block
+"""
+
+
+def get_used_ip_space(ip_queryset, range_queryset=None):
+    """
+    Yield the first and last addresses (as integers) of each contiguous block of IP space occupied by the given
+    IPAddresses and IPRanges, in ascending order. Blocks are computed by the database and fetched in chunks, so
+    individual IP addresses are never loaded.
+
+    :param ip_queryset: A queryset of IPAddresses
+    :param range_queryset: A queryset of IPRanges (optional)
+    """
+    # Compare host addresses only (the mask would otherwise take precedence in inet ordering)
+    queryset = ip_queryset.order_by().annotate(
+        first_ip=Inet(Host(F('address'))),
+        last_ip=Inet(Host(F('address'))),
+    ).values_list('first_ip', 'last_ip')
+    if range_queryset is not None:
+        queryset = queryset.union(
+            range_queryset.order_by().annotate(
+                first_ip=Inet(Host(F('start_address'))),
+                last_ip=Inet(Host(F('end_address'))),
+            ).values_list('first_ip', 'last_ip'),
+            all=True
+        )
+    sql, params = queryset.query.sql_with_params()
+
+    connection = connections[router.db_for_read(ip_queryset.model)]
+    with connection.chunked_cursor() as cursor:
+        cursor.execute(USED_IP_SPACE_SQL.format(sql), params)
+        while rows := cursor.fetchmany(1000):
+            for first_ip, last_ip in rows:
+                yield int(netaddr.IPAddress(first_ip)), int(netaddr.IPAddress(last_ip))
+
+
+def get_available_ip_ranges(first_ip, last_ip, used_ip_space):
+    """
+    Yield each range of available IP space between first_ip and last_ip (inclusive) as a netaddr.IPRange, given the
+    blocks of used IP space returned by get_used_ip_space().
+    """
+    first_ip, last_ip = netaddr.IPAddress(first_ip), netaddr.IPAddress(last_ip)
+    version = first_ip.version
+    next_ip = int(first_ip)
+
+    for start, end in used_ip_space:
+        if start > int(last_ip):
+            break
+        if start > next_ip:
+            yield netaddr.IPRange(netaddr.IPAddress(next_ip, version), netaddr.IPAddress(start - 1, version))
+        next_ip = max(next_ip, end + 1)
+
+    if next_ip <= int(last_ip):
+        yield netaddr.IPRange(netaddr.IPAddress(next_ip, version), last_ip)
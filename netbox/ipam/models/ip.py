@@ -13,6 +13,7 @@ from dcim.models.mixins import CachedScopeMixin
 from ipam.choices import *
 from ipam.constants import *
 from ipam.fields import IPNetworkField, IPAddressField
+from ipam.ipspace import get_available_ip_ranges, get_used_ip_space
 from ipam.lookups import Host
 from ipam.managers import IPAddressManager
 from ipam.querysets import PrefixQuerySet
@@ -422,46 +423,41 @@ class Prefix(ContactsMixin, GetAvailablePrefixesMixin, CachedScopeMixin, Primary
         else:
             return IPAddress.objects.filter(address__net_host_contained=str(self.prefix), vrf=self.vrf)
 
-    def get_available_ips(self):
+    def get_available_ip_ranges(self):
         """
-        Return all available IPs within this prefix as an IPSet.
+        Return an iterator of all available IP ranges within this prefix (as netaddr.IPRanges), in ascending order.
         """
-        prefix = netaddr.IPSet(self.prefix)
-        child_ips = netaddr.IPSet([
-            ip.address.ip for ip in self.get_child_ips()
-        ])
-        child_ranges = netaddr.IPSet([
-            iprange.range for iprange in self.get_child_ranges().filter(mark_populated=True)
-        ])
-        available_ips = prefix - child_ips - child_ranges
+        first_ip, last_ip = self.prefix.first, self.prefix.last
 
         # IPv6 /127's, pool, or IPv4 /31-/32 sets are fully usable
-        if (self.family == 6 and self.prefix.prefixlen >= 127) or self.is_pool or (
+        if not ((self.family == 6 and self.prefix.prefixlen >= 127) or self.is_pool or (
                 self.family == 4 and self.prefix.prefixlen >= 31
-        ):
-            return available_ips
-
-        if self.family == 4:
-            # For "normal" IPv4 prefixes, omit first and last addresses
-            available_ips -= netaddr.IPSet([
-                netaddr.IPAddress(self.prefix.first),
-                netaddr.IPAddress(self.prefix.last),
-            ])
-        else:
-            # For IPv6 prefixes, omit the Subnet-Router anycast address
-            # per RFC 4291
-            available_ips -= netaddr.IPSet([netaddr.IPAddress(self.prefix.first)])
+        )):
+            # For "normal" IPv4 prefixes, omit first and last addresses. For IPv6 prefixes, omit the Subnet-Router
+            # anycast address per RFC 4291.
+            first_ip += 1
+            if self.family == 4:
+                last_ip -= 1
+
+        used_ip_space = get_used_ip_space(self.get_child_ips(), self.get_child_ranges(mark_populated=True))
+        return get_available_ip_ranges(
+            netaddr.IPAddress(first_ip, self.family), netaddr.IPAddress(last_ip, self.family), used_ip_space
+        )
 
-        return available_ips
+    def get_available_ips(self):
+        """
+        Return all available IPs within this prefix as an IPSet.
+        """
+        return netaddr.IPSet(self.get_available_ip_ranges())
 
     def get_first_available_ip(self):
         """
         Return the first available IP within the prefix (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        available_ip_range = next(self.get_available_ip_ranges(), None)
+        if available_ip_range is None:
             return None
-        return '{}/{}'.format(next(available_ips.__iter__()), self.prefix.prefixlen)
+        return '{}/{}'.format(available_ip_range[0], self.prefix.prefixlen)
 
     def get_utilization(self):
         """
@@ -685,28 +681,33 @@ class IPRange(ContactsMixin, PrimaryModel):
             vrf=self.vrf
         )
 
-    def get_available_ips(self):
+    def get_available_ip_ranges(self):
         """
-        Return all available IPs within this range as an IPSet.
+        Return an iterator of all available IP ranges within this range (as netaddr.IPRanges), in ascending order.
         """
         if self.mark_populated:
-            return netaddr.IPSet()
+            return iter(())
 
-        range = netaddr.IPRange(self.start_address.ip, self.end_address.ip)
-        child_ips = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()])
+        return get_available_ip_ranges(self.start_address.ip, self.end_address.ip, get_used_ip_space(
+            self.get_child_ips()
+        ))
 
-        return netaddr.IPSet(range) - child_ips
+    def get_available_ips(self):
+        """
+        Return all available IPs within this range as an IPSet.
+        """
+        return netaddr.IPSet(self.get_available_ip_ranges())
 
     @cached_property
     def first_available_ip(self):
         """
         Return the first available IP within the range (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        available_ip_range = next(self.get_available_ip_ranges(), None)
+        if available_ip_range is None:
             return None
 
-        return '{}/{}'.format(next(available_ips.__iter__()), self.start_address.prefixlen)
+        return '{}/{}'.format(available_ip_range[0], self.start_address.prefixlen)
 
     @cached_property
     def utilization(self):
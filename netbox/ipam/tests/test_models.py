@@ -87,6 +87,23 @@ class TestIPRange(TestCase):
             )
             iprange_4_198_201.clean()
 
+    def test_get_available_ips(self):
+        iprange = IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.1/24'), end_address=IPNetwork('10.0.0.8/24')
+        )
+        IPAddress.objects.bulk_create((
+            IPAddress(address=IPNetwork('10.0.0.2/24')),
+            IPAddress(address=IPNetwork('10.0.0.3/32')),
+            IPAddress(address=IPNetwork('10.0.0.3/24')),
+            IPAddress(address=IPNetwork('10.0.0.8/24')),
+        ))
+
+        self.assertEqual(iprange.get_available_ips(), IPSet(['10.0.0.1/32', '10.0.0.4/31', '10.0.0.6/31']))
+        self.assertEqual(iprange.first_available_ip, '10.0.0.1/24')
+
+        iprange.mark_populated = True
+        self.assertEqual(iprange.get_available_ips(), IPSet())
+
 
 class TestPrefix(TestCase):
 
@@ -238,6 +255,44 @@ class TestPrefix(TestCase):
 
         self.assertEqual(available_ips, missing_ips)
 
+    def test_get_available_ip_ranges(self):
+
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('10.0.0.0/24'))
+        IPAddress.objects.bulk_create((
+            # Masks must not affect the ordering of addresses
+            IPAddress(address=IPNetwork('10.0.0.9/32')),
+            IPAddress(address=IPNetwork('10.0.0.5/24')),
+            IPAddress(address=IPNetwork('10.0.0.5/24')),
+            IPAddress(address=IPNetwork('10.0.0.6/16')),
+            # IP within a populated range
+            IPAddress(address=IPNetwork('10.0.0.22/24')),
+            IPAddress(address=IPNetwork('10.0.0.254/24')),
+        ))
+        IPRange.objects.create(
+            start_address=IPNetwork('10.0.0.20/24'),
+            end_address=IPNetwork('10.0.0.29/24'),
+            mark_populated=True
+        )
+
+        available_ip_ranges = [(str(r[0]), str(r[-1])) for r in parent_prefix.get_available_ip_ranges()]
+        self.assertEqual(available_ip_ranges, [
+            ('10.0.0.1', '10.0.0.4'),
+            ('10.0.0.7', '10.0.0.8'),
+            ('10.0.0.10', '10.0.0.19'),
+            ('10.0.0.30', '10.0.0.253'),
+        ])
+
+    def test_get_available_ip_ranges_ipv6(self):
+
+        parent_prefix = Prefix.objects.create(prefix=IPNetwork('2001:db8:500::/64'))
+        IPAddress.objects.create(address=IPNetwork('2001:db8:500::1/64'))
+        IPAddress.objects.create(address=IPNetwork('2001:db8:500:0:ffff:ffff:ffff:ffff/64'))
+
+        available_ip_ranges = [(str(r[0]), str(r[-1])) for r in parent_prefix.get_available_ip_ranges()]
+        self.assertEqual(available_ip_ranges, [
+            ('2001:db8:500::2', '2001:db8:500:0:ffff:ffff:ffff:fffe'),
+        ])
+
     def test_get_first_available_prefix(self):
 
         prefixes = Prefix.objects.bulk_create((
@@ -1,9 +1,11 @@
+import heapq
 from dataclasses import dataclass
 import netaddr
 
 from django.utils.translation import gettext_lazy as _
 
 from .constants import *
+from .ipspace import get_available_ip_ranges, get_used_ip_space
 from .models import Prefix, VLAN
 
 __all__ = (
@@ -64,16 +66,6 @@ def add_requested_prefixes(parent, prefix_list, show_available=True, show_assign
 
 
 def annotate_ip_space(prefix):
-    # Compile child objects
-    records = []
-    records.extend([
-        (iprange.start_address.ip, iprange) for iprange in prefix.get_child_ranges(mark_populated=True)
-    ])
-    records.extend([
-        (ip.address.ip, ip) for ip in prefix.get_child_ips()
-    ])
-    records = sorted(records, key=lambda x: x[0])
-
     # Determine the first & last valid IP addresses in the prefix
     if prefix.family == 4 and prefix.mask_length < 31 and not prefix.is_pool:
         # Ignore the network and broadcast addresses for non-pool IPv4 prefixes larger than /31
@@ -83,51 +75,27 @@ def annotate_ip_space(prefix):
         first_ip_in_prefix = netaddr.IPAddress(prefix.prefix.first)
         last_ip_in_prefix = netaddr.IPAddress(prefix.prefix.last)
 
-    if not records:
-        return [
-            AvailableIPSpace(
-                size=int(last_ip_in_prefix - first_ip_in_prefix + 1),
-                first_ip=f'{first_ip_in_prefix}/{prefix.mask_length}'
-            )
-        ]
-
-    output = []
-    prev_ip = None
-
-    # Account for any available IPs before the first real IP
-    if records[0][0] > first_ip_in_prefix:
-        output.append(AvailableIPSpace(
-            size=int(records[0][0] - first_ip_in_prefix),
-            first_ip=f'{first_ip_in_prefix}/{prefix.mask_length}'
-        ))
-
-    # Add IP ranges & addresses, annotating available space in between records
-    for record in records:
-        if prev_ip:
-            # Annotate available space
-            if (diff := int(record[0]) - int(prev_ip)) > 1:
-                first_skipped = f'{prev_ip + 1}/{prefix.mask_length}'
-                output.append(AvailableIPSpace(
-                    size=diff - 1,
-                    first_ip=first_skipped
-                ))
-
-        output.append(record[1])
-
-        # Update the previous IP address
-        if hasattr(record[1], 'end_address'):
-            prev_ip = record[1].end_address.ip
-        else:
-            prev_ip = record[0]
-
-    # Include any remaining available IPs
-    if prev_ip < last_ip_in_prefix:
-        output.append(AvailableIPSpace(
-            size=int(last_ip_in_prefix - prev_ip),
-            first_ip=f'{prev_ip + 1}/{prefix.mask_length}'
-        ))
-
-    return output
+    # Compile child objects, ordered by address
+    child_ranges = prefix.get_child_ranges(mark_populated=True).order_by('start_address__host__inet', 'pk')
+    child_ips = prefix.get_child_ips().order_by('address__host__inet', 'pk')
+
+    # Determine the available IP space between child objects
+    available_ip_ranges = get_available_ip_ranges(
+        first_ip_in_prefix, last_ip_in_prefix, get_used_ip_space(child_ips, child_ranges)
+    )
+
+    # Interleave IP ranges, addresses, and available space
+    records = heapq.merge(
+        ((int(iprange.start_address.ip), iprange) for iprange in child_ranges),
+        ((int(ip.address.ip), ip) for ip in child_ips),
+        (
+            (ip_range.first, AvailableIPSpace(size=ip_range.size, first_ip=f'{ip_range[0]}/{prefix.mask_length}'))
+            for ip_range in available_ip_ranges
+        ),
+        key=lambda record: record[0]
+    )
+
+    return [record[1] for record in records]
 
 
 def available_vlans_from_range(vlans, vlan_group, vid_range):
@@ -2,12 +2,7 @@ from django import forms
 
 class ExcelRegionImportForm(forms.Form):
     file = forms.FileField(
-        label='Excel (.xlsx) with Region column',
-        help_text='Загрузите .xlsx с заголовком столбца "Region"',
-        widget=forms.ClearableFileInput(attrs={'accept': '.xlsx'})
-    )
-    dry_run = forms.BooleanField(
-        label='Пробный прогон (без записи)',
-        required=False,
-        initial=False
+        label='Excel (.xlsx), CSV or Parquet with Region column',
+        help_text='Загрузите .xlsx, .csv или .parquet с заголовком столбца "Region"',
+        widget=forms.ClearableFileInput(attrs={'accept': '.xlsx,.csv,.parquet'})
     )
@@ -0,0 +1,961 @@
+import csv
+import hashlib
+import ipaddress
+import json
+import os
+from collections import defaultdict, namedtuple
+from decimal import Decimal
+
+import pandas as pd
+from openpyxl import load_workbook
+from django.contrib.contenttypes.models import ContentType
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.text import capfirst
+
+from core.choices import ObjectChangeActionChoices
+from core.models import ObjectChange
+from dcim.models.sites import Region, Site, Location
+from dcim.models.racks import Rack
+from dcim.models.devices import DeviceRole, Manufacturer, DeviceType, Platform, Device, Interface
+from ipam.models.vlans import VLAN
+from ipam.models.ip import IPAddress, Prefix
+from netbox.search.backends import search_backend
+from tenancy.models import Tenant
+from utilities.counters import update_counter
+
+REQUIRED_COLUMNS = (
+    "Region", "Tenant", "Site", "Location", "Rack", "RackFace", "Role", "Manufacturer", "DeviceType",
+    "Height", "Platform", "DeviceName", "Position", "InterfaceName", "VLAN", "IP", "Mask",
+)
+
+# Колонка -> ключ строки после разбора
+COLUMN_FIELDS = {
+    "Region": "region",
+    "Tenant": "tenant",
+    "Site": "site",
+    "Location": "location",
+    "Rack": "rack",
+    "RackFace": "face",
+    "Role": "role",
+    "Manufacturer": "manufacturer",
+    "DeviceType": "device_type",
+    "Height": "u_height",
+    "Platform": "platform",
+    "DeviceName": "device",
+    "Position": "position",
+    "InterfaceName": "interface",
+    "VLAN": "vid",
+    "IP": "ip",
+    "Mask": "mask",
+}
+
+# Разобранная строка файла; row - номер строки в файле
+ImportRow = namedtuple("ImportRow", (
+    "row", "region", "tenant", "site", "location", "rack", "rack_u_height", "face", "role", "manufacturer",
+    "device_type", "u_height", "platform", "device", "position", "interface", "vid", "address", "prefix",
+))
+
+# Сколько строк файла разбирается за раз
+BATCH_SIZE = 5000
+
+# Этапы импорта в порядке зависимостей (для отчета о прогрессе)
+STAGES = (
+    "regions", "tenants", "sites", "locations", "racks", "device roles", "manufacturers", "device types",
+    "platforms", "devices", "interfaces", "vlans", "ip addresses", "prefixes", "primary ips",
+)
+
+
+def make_slug(name):
+    # Как и раньше, чтобы совпадать со slug уже загруженных объектов
+    return name.lower().replace(" ", "-")
+
+
+def iter_xlsx(file, batch_size):
+    """Читает первый лист потоково (openpyxl read_only): в памяти только текущая пачка строк"""
+    workbook = load_workbook(file, read_only=True, data_only=True)
+    try:
+        sheet_rows = workbook.active.iter_rows(values_only=True)
+        header = next(sheet_rows, None)
+        if header is None:
+            return
+        columns = ["" if value is None else str(value).strip() for value in header]
+
+        batch = []
+        numbers = []
+        for number, values in enumerate(sheet_rows, start=2):  # строка 1 - заголовок
+            if all(value is None or value == "" for value in values):
+                continue
+            batch.append(values)
+            numbers.append(number)
+            if len(batch) >= batch_size:
+                yield pd.DataFrame(batch, columns=columns, index=numbers)
+                batch = []
+                numbers = []
+        if batch:
+            yield pd.DataFrame(batch, columns=columns, index=numbers)
+    finally:
+        workbook.close()
+
+
+def iter_csv(file, batch_size):
+    sample = file.read(4096).decode("utf-8-sig", errors="ignore")
+    file.seek(0)
+    try:
+        # Excel с русской локалью сохраняет CSV через ";"
+        delimiter = csv.Sniffer().sniff(sample, delimiters=",;\t").delimiter
+    except csv.Error:
+        delimiter = ","
+
+    reader = pd.read_csv(
+        file,
+        sep=delimiter,
+        dtype=str,
+        keep_default_na=False,
+        encoding="utf-8-sig",
+        chunksize=batch_size,
+    )
+    for chunk in reader:
+        chunk.columns = [str(column).strip() for column in chunk.columns]
+        chunk.index += 2
+        yield chunk
+
+
+def iter_parquet(file, batch_size):
+    try:
+        import pyarrow.parquet as pq
+    except ModuleNotFoundError:
+        raise ValueError("Parquet import requires pyarrow to be installed")
+
+    number = 2
+    for record_batch in pq.ParquetFile(file).iter_batches(batch_size=batch_size):
+        chunk = record_batch.to_pandas()
+        chunk.index = range(number, number + len(chunk))
+        number += len(chunk)
+        yield chunk
+
+
+READERS = {
+    ".xlsx": iter_xlsx,
+    ".csv": iter_csv,
+    ".parquet": iter_parquet,
+}
+
+
+class ImportFileError(ValueError):
+    """Файл нельзя прочитать: формат, обязательные колонки или содержимое"""
+
+
+def iter_batches(file, filename, batch_size=BATCH_SIZE):
+    """
+    Пачки строк файла в виде DataFrame; индекс - номер строки в файле
+
+    Args:
+        file: открытый на чтение двоичный файл
+
+    Raises:
+        ImportFileError: неподдерживаемый формат
+    """
+    extension = os.path.splitext(filename.lower())[1]
+    reader = READERS.get(extension)
+    if reader is None:
+        raise ImportFileError(f"Unsupported file format {extension or filename}, expected: {', '.join(READERS)}")
+    return reader(file, batch_size)
+
+
+def to_integers(series):
+    """Числовая колонка и маска значений, которые не являются целыми числами"""
+    numbers = pd.to_numeric(series, errors="coerce")
+    return numbers, numbers.isna() | (numbers % 1 != 0)
+
+
+def parse_batch(df, strings=None):
+    """
+    Нормализует и проверяет пачку строк операциями над колонками целиком
+
+    Args:
+        strings: общий словарь для переиспользования одинаковых строк между пачками
+
+    Returns:
+        tuple: (список ImportRow, {номер строки: (имя устройства, ошибка)})
+    """
+    strings = {} if strings is None else strings
+    values = pd.DataFrame({
+        field: df[column].astype("string").fillna("").str.strip()
+        for column, field in COLUMN_FIELDS.items()
+    }, index=df.index)
+
+    # Ошибки копятся в одной строке на запись: "; Invalid Height: x; Invalid VLAN: y"
+    errors = pd.Series("", index=df.index, dtype="string")
+
+    def reject(mask, message):
+        nonlocal errors
+        errors = errors.mask(mask, errors + "; " + message)
+
+    empty = values.eq("")
+    if empty.to_numpy().any():
+        labels = pd.Series([f"{column}, " for column in COLUMN_FIELDS], index=list(COLUMN_FIELDS.values()))
+        with_empty = empty.any(axis=1)
+        missing = empty[with_empty].astype(object).dot(labels).str.rstrip(", ")
+        reject(with_empty, ("Missing required fields: " + missing).reindex(df.index, fill_value=""))
+
+    # "R01-42" -> стойка R01 высотой 42U
+    rack = values["rack"].str.partition("-")
+    raw_rack = values["rack"]
+    values["rack"] = rack[0].str.strip()
+    rack_height = rack[2].str.strip()
+    rack_u_height, bad = to_integers(rack_height.mask(rack_height == ""))
+    reject(bad & (rack_height != ""), "Invalid U height for rack " + raw_rack + ": " + rack_height)
+
+    u_height, bad = to_integers(values["u_height"])
+    reject(bad & ~empty["u_height"], "Invalid Height: " + values["u_height"])
+
+    position = pd.to_numeric(values["position"], errors="coerce")
+    reject(position.isna() & ~empty["position"], "Invalid Position: " + values["position"])
+
+    vid, bad = to_integers(values["vid"])
+    reject(bad & ~empty["vid"], "Invalid VLAN: " + values["vid"])
+
+    # Адреса разбираются только для строк, прошедших остальные проверки
+    pending = errors == ""
+    addresses = []
+    prefixes = []
+    ip_errors = []
+    for ip, mask in zip(values["ip"][pending], values["mask"][pending]):
+        try:
+            interface = ipaddress.ip_interface(f"{ip}/{mask}")
+        except ValueError as e:
+            addresses.append("")
+            prefixes.append("")
+            ip_errors.append(f"; Invalid IP: {e}")
+        else:
+            addresses.append(str(interface))
+            prefixes.append(str(interface.network))
+            ip_errors.append("")
+    index = df.index[pending]
+    addresses = pd.Series(addresses, index=index, dtype="string").reindex(df.index, fill_value="")
+    prefixes = pd.Series(prefixes, index=index, dtype="string").reindex(df.index, fill_value="")
+    errors = errors + pd.Series(ip_errors, index=index, dtype="string").reindex(df.index, fill_value="")
+
+    failed_mask = errors != ""
+    failed = {
+        number: (device, error[2:])
+        for number, device, error in zip(df.index[failed_mask], values["device"][failed_mask], errors[failed_mask])
+    }
+
+    ok = ~failed_mask
+    if not ok.any():
+        return [], failed
+
+    def text(series):
+        return [strings.setdefault(value, value) for value in series[ok]]
+
+    rows = [
+        ImportRow(*fields) for fields in zip(
+            df.index[ok],
+            text(values["region"]),
+            text(values["tenant"]),
+            text(values["site"]),
+            text(values["location"]),
+            text(values["rack"]),
+            [None if pd.isna(height) else int(height) for height in rack_u_height[ok]],
+            text(values["face"]),
+            text(values["role"]),
+            text(values["manufacturer"]),
+            text(values["device_type"]),
+            u_height[ok].astype(int).tolist(),
+            text(values["platform"]),
+            values["device"][ok].tolist(),
+            [Decimal(value) for value in values["position"][ok]],
+            text(values["interface"]),
+            vid[ok].astype(int).tolist(),
+            addresses[ok].tolist(),
+            text(prefixes),
+        )
+    ]
+    return rows, failed
+
+
+def iter_rows(file, filename, batch_size=BATCH_SIZE):
+    """
+    Читает и проверяет файл пачками: в памяти только текущая пачка
+
+    Yields:
+        tuple: (список ImportRow, {номер строки: (имя устройства, ошибка)})
+
+    Raises:
+        ImportFileError: неподдерживаемый формат, поврежденный файл или в файле нет обязательных колонок
+    """
+    strings = {}
+    batches = iter_batches(file, filename, batch_size)
+    while True:
+        try:
+            batch = next(batches, None)
+        except ImportFileError:
+            raise
+        except Exception as e:
+            raise ImportFileError(str(e)) from e
+        if batch is None:
+            return
+
+        missing = [column for column in REQUIRED_COLUMNS if column not in batch.columns]
+        if missing:
+            raise ImportFileError(f"File must include columns: {', '.join(missing)}")
+
+        yield parse_batch(batch, strings)
+
+
+# related - функция, которая одним запросом загружает объекты, нужные build для пачки строк
+Stage = namedtuple(
+    "Stage", ("name", "model", "label", "key", "lookup", "build", "bulk", "slug", "related"), defaults=(None,)
+)
+
+# Сколько объектов каждого вида показывать в предпросмотре
+PREVIEW_LIMIT = 500
+
+# Сколько объектов читается из базы одним запросом при поиске изменений
+CHUNK_SIZE = 1000
+
+
+def chunks(items, size=CHUNK_SIZE):
+    items = list(items)
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def describe(key):
+    """Ключ объекта для предпросмотра: ("Site 0", "Loc 1") -> "Site 0 / Loc 1" """
+    if isinstance(key, tuple):
+        return " / ".join(str(part) for part in key)
+    return str(key)
+
+
+class ExcelImporter:
+    """
+    Пакетный импорт устройств из таблицы в два этапа: план и применение
+
+    Файл читается пачками (read_batches), в памяти между пачками остаются
+    только ключи объектов и их pk, а не строки файла, поэтому расход памяти
+    не зависит от числа строк.
+
+    plan() без записи в базу сравнивает файл с текущим состоянием: для каждой
+    пачки объекты ищутся по именам одним запросом на модель, результат - список
+    создаваемых объектов, изменений существующих и отклоненных строк. Строки,
+    которые заведомо упадут при записи (занятый slug, место в стойке),
+    отклоняются уже на этом этапе.
+
+    apply() выполняет план в одной транзакции, перечитывая файл: новые объекты
+    создаются bulk_create в порядке зависимостей (регионы -> сайты -> ... -> префиксы),
+    изменения пишутся bulk_update. Поштучно через save() создаются только
+    модели, у которых сохранение делает дополнительную работу: MPTT деревья
+    (Region, Location, DeviceRole, Platform), Device (компоненты из шаблонов,
+    счетчики) и Prefix (глубина и дочерние префиксы через сигналы).
+
+    bulk_create не вызывает сигналы, поэтому для созданных пакетом объектов
+    записи журнала изменений и поисковый индекс создаются здесь же.
+    """
+
+    def __init__(self, read_batches, request=None, progress=None):
+        """
+        Args:
+            read_batches: функция без аргументов, каждый вызов которой заново читает файл
+                          и возвращает пачки (список ImportRow, {номер строки: (имя устройства, ошибка)})
+                          (см. iter_rows)
+        """
+        self.read_batches = read_batches
+        self.request = request
+        self.progress = progress
+        # {номер строки: (имя устройства, ошибка)} - отклоненные строки
+        self.failed = {}
+        # Прочитано строк файла (для прогресса)
+        self.rows_read = 0
+        self.rows_total = None
+        # {этап: {ключ: pk}} - существующие, после apply() и созданные
+        self.pks = {}
+        # {этап: множество ключей} - объекты, которые нужно создать
+        self.missing = {}
+        # {этап: {ключ: причина}} - ключи, строки с которыми отклоняются во всех пачках
+        self.rejected = {}
+        # {этап: {slug: ключ}} - slug новых объектов
+        self.slugs = {}
+        # {(стойка, позиция, сторона): имя устройства} - занятые места в стойках
+        self.occupied = {}
+        self.checked_racks = set()
+        # [(модель, pk, объект, поле, было, станет)]
+        self.updates = []
+        # {адрес: ключ интерфейса}
+        self.assignments = {}
+        # {ключ устройства: {поле: адрес}}
+        self.device_ips = defaultdict(dict)
+        # Созданные адреса, интерфейс которых создается в следующих пачках
+        self.unassigned = set()
+        self.stages = self.get_stages()
+        for stage in self.stages:
+            self.pks[stage.name] = {}
+            self.missing[stage.name] = set()
+            self.rejected[stage.name] = {}
+            self.slugs[stage.name] = {}
+
+    def report_progress(self, phase, stage):
+        if self.progress:
+            self.progress(phase, stage, STAGES.index(stage), len(STAGES), self.rows_read, self.rows_total)
+
+    #
+    # Этапы
+    #
+
+    def get_stages(self):
+        p = self.pks
+        interface_type = ContentType.objects.get_for_model(Interface)
+
+        def by_name(model):
+            return lambda names: dict(model.objects.filter(name__in=names).values_list("name", "pk"))
+
+        def location(r):
+            return r.site, r.location
+
+        def rack(r):
+            return r.site, r.location, r.rack
+
+        def device_type(r):
+            return r.manufacturer, r.device_type
+
+        def device(r):
+            # Имя устройства уникально без учета регистра
+            return r.site, r.tenant, r.device.lower()
+
+        def interface(r):
+            return (*device(r), r.interface)
+
+        def vlan(r):
+            return r.interface, r.vid
+
+        def build_rack(key, r, related):
+            obj = Rack(name=r.rack, site_id=p["sites"][r.site], location_id=p["locations"][location(r)])
+            if r.rack_u_height:
+                obj.u_height = r.rack_u_height
+            return obj
+
+        def device_related(rows):
+            # Device.save() читает тип устройства (шаблоны компонентов) и локацию стойки
+            return {
+                "device types": DeviceType.objects.in_bulk({p["device types"][device_type(r)] for r in rows}),
+                "racks": Rack.objects.select_related("location").in_bulk({p["racks"][rack(r)] for r in rows}),
+            }
+
+        def build_device(key, r, related):
+            return Device(
+                name=r.device,
+                device_type=related["device types"][p["device types"][device_type(r)]],
+                role_id=p["device roles"][r.role],
+                site_id=p["sites"][r.site],
+                tenant_id=p["tenants"][r.tenant],
+                rack=related["racks"][p["racks"][rack(r)]],
+                face=r.face,
+                location_id=p["locations"][location(r)],
+                position=r.position,
+                platform_id=p["platforms"][r.platform],
+            )
+
+        def interface_related(rows):
+            return {
+                pk: (site_id, location_id, rack_id)
+                for pk, site_id, location_id, rack_id in Device.objects.filter(
+                    pk__in={p["devices"][device(r)] for r in rows}
+                ).values_list("pk", "site_id", "location_id", "rack_id")
+            }
+
+        def build_interface(key, r, related):
+            device_id = p["devices"][device(r)]
+            site_id, location_id, rack_id = related[device_id]
+            return Interface(
+                device_id=device_id,
+                name=r.interface,
+                type="1000base-t",
+                enabled=True,
+                # Денормализованные ссылки, которые обычно заполняет Interface.save()
+                _site_id=site_id,
+                _location_id=location_id,
+                _rack_id=rack_id,
+            )
+
+        def build_ip_address(key, r, related):
+            interface_id = p["interfaces"].get(self.assignments[key])
+            if interface_id is None:
+                # Интерфейс из последней строки с этим адресом появится в одной из следующих пачек
+                self.unassigned.add(key)
+                return IPAddress(address=r.address, status="active")
+            return IPAddress(
+                address=r.address, status="active",
+                assigned_object_type=interface_type, assigned_object_id=interface_id,
+            )
+
+        return (
+            Stage(
+                "regions", Region, "Region", lambda r: r.region, by_name(Region),
+                lambda key, r, related: Region(name=r.region, slug=make_slug(r.region)),
+                bulk=False, slug=True,
+            ),
+            Stage(
+                "tenants", Tenant, "Tenant", lambda r: r.tenant, by_name(Tenant),
+                lambda key, r, related: Tenant(name=r.tenant, slug=make_slug(r.tenant)),
+                bulk=True, slug=True,
+            ),
+            Stage(
+                "sites", Site, "Site", lambda r: r.site, by_name(Site),
+                lambda key, r, related: Site(name=r.site, slug=make_slug(r.site), region_id=p["regions"][r.region]),
+                bulk=True, slug=True,
+            ),
+            Stage(
+                "locations", Location, "Location", location,
+                lambda keys: {
+                    (site, name): pk
+                    for site, name, pk in Location.objects.filter(
+                        site__name__in={key[0] for key in keys}, name__in={key[1] for key in keys}
+                    ).values_list("site__name", "name", "pk")
+                },
+                lambda key, r, related: Location(
+                    name=r.location, slug=make_slug(r.location), site_id=p["sites"][r.site]
+                ),
+                bulk=False, slug=False,
+            ),
+            Stage(
+                "racks", Rack, "Rack", rack,
+                lambda keys: {
+                    (site, location or "", name): pk
+                    for site, location, name, pk in Rack.objects.filter(
+                        site__name__in={key[0] for key in keys}, name__in={key[2] for key in keys}
+                    ).values_list("site__name", "location__name", "name", "pk")
+                },
+                build_rack,
+                bulk=True, slug=False,
+            ),
+            Stage(
+                "device roles", DeviceRole, "Role", lambda r: r.role, by_name(DeviceRole),
+                lambda key, r, related: DeviceRole(name=r.role, slug=make_slug(r.role), vm_role=False),
+                bulk=False, slug=True,
+            ),
+            Stage(
+                "manufacturers", Manufacturer, "Manufacturer", lambda r: r.manufacturer, by_name(Manufacturer),
+                lambda key, r, related: Manufacturer(name=r.manufacturer, slug=make_slug(r.manufacturer)),
+                bulk=True, slug=True,
+            ),
+            Stage(
+                "device types", DeviceType, "Device type", device_type,
+                lambda keys: {
+                    (manufacturer, model): pk
+                    for manufacturer, model, pk in DeviceType.objects.filter(
+                        manufacturer__name__in={key[0] for key in keys}, model__in={key[1] for key in keys}
+                    ).values_list("manufacturer__name", "model", "pk")
+                },
+                lambda key, r, related: DeviceType(
+                    manufacturer_id=p["manufacturers"][r.manufacturer],
+                    model=r.device_type,
+                    slug=make_slug(r.device_type),
+                    u_height=r.u_height,
+                ),
+                bulk=True, slug=False,
+            ),
+            Stage(
+                "platforms", Platform, "Platform", lambda r: r.platform, by_name(Platform),
+                lambda key, r, related: Platform(name=r.platform, slug=make_slug(r.platform)),
+                bulk=False, slug=True,
+            ),
+            Stage(
+                "devices", Device, "Device", device,
+                lambda keys: {
+                    (site, tenant, name): pk
+                    for site, tenant, name, pk in Device.objects.annotate(lower_name=Lower("name")).filter(
+                        site__name__in={key[0] for key in keys}, lower_name__in={key[2] for key in keys}
+                    ).values_list("site__name", "tenant__name", "lower_name", "pk")
+                },
+                build_device,
+                bulk=False, slug=False, related=device_related,
+            ),
+            Stage(
+                "interfaces", Interface, "Interface", interface,
+                lambda keys: {
+                    (site, tenant, device_name, name): pk
+                    for site, tenant, device_name, name, pk in Interface.objects.annotate(
+                        device_name=Lower("device__name")
+                    ).filter(
+                        device__site__name__in={key[0] for key in keys},
+                        device_name__in={key[2] for key in keys},
+                        name__in={key[3] for key in keys},
+                    ).values_list("device__site__name", "device__tenant__name", "device_name", "name", "pk")
+                },
+                build_interface,
+                bulk=True, slug=False, related=interface_related,
+            ),
+            Stage(
+                "vlans", VLAN, "VLAN", vlan,
+                lambda keys: {
+                    (name, vid): pk
+                    for name, vid, pk in VLAN.objects.filter(
+                        name__in={key[0] for key in keys}, vid__in={key[1] for key in keys}
+                    ).order_by("-pk").values_list("name", "vid", "pk")
+                },
+                lambda key, r, related: VLAN(name=r.interface, vid=r.vid, status="active"),
+                bulk=True, slug=False,
+            ),
+            Stage(
+                "ip addresses", IPAddress, "IP address", lambda r: r.address,
+                lambda addresses: {
+                    str(address): pk
+                    for address, pk in IPAddress.objects.filter(address__in=addresses).order_by("-pk").values_list(
+                        "address", "pk"
+                    )
+                },
+                build_ip_address,
+                bulk=True, slug=False,
+            ),
+            Stage(
+                "prefixes", Prefix, "Prefix", lambda r: (r.prefix, *vlan(r)),
+                lambda keys: {
+                    (str(prefix), vlan_name, vid): pk
+                    for prefix, vlan_name, vid, pk in Prefix.objects.filter(
+                        prefix__in={key[0] for key in keys}, vlan__vid__in={key[2] for key in keys}
+                    ).values_list("prefix", "vlan__name", "vlan__vid", "pk")
+                },
+                lambda key, r, related: Prefix(prefix=r.prefix, vlan_id=p["vlans"][vlan(r)], status="active"),
+                bulk=False, slug=False,
+            ),
+        )
+
+    def get_stage(self, name):
+        return next(stage for stage in self.stages if stage.name == name)
+
+    @staticmethod
+    def collect(rows, key_func):
+        """{ключ: первая строка с этим ключом}"""
+        keys = {}
+        for row in rows:
+            keys.setdefault(key_func(row), row)
+        return keys
+
+    def reject(self, rows, conflicts, key_func, label):
+        """Отклоняет строки, ключ которых есть в conflicts {ключ: причина}; возвращает оставшиеся"""
+        if not conflicts:
+            return rows
+        valid = []
+        for row in rows:
+            key = key_func(row)
+            if key in conflicts:
+                self.failed[row.row] = (row.device, f"{label} {describe(key)}: {conflicts[key]}")
+            else:
+                valid.append(row)
+        return valid
+
+    def is_known(self, stage, key):
+        """Ключ уже найден в базе или запланирован к созданию в предыдущих пачках"""
+        return key in self.pks[stage.name] or key in self.missing[stage.name]
+
+    #
+    # План
+    #
+
+    def plan(self):
+        """
+        Сравнивает файл с базой, ничего не записывая
+
+        Returns:
+            dict: предпросмотр (см. get_plan)
+        """
+        for rows, failed in self.read_batches():
+            self.failed.update(failed)
+            self.plan_batch(rows)
+            self.rows_read += len(rows) + len(failed)
+
+        self.report_progress("plan", "primary ips")
+        self.plan_updates()
+        self.rows_total = self.rows_read
+        return self.get_plan()
+
+    def plan_batch(self, rows):
+        """Ищет объекты строк пачки и отклоняет конфликтующие строки"""
+        for stage in self.stages:
+            self.report_progress("plan", stage.name)
+            rows = self.reject(rows, self.rejected[stage.name], stage.key, stage.label)
+            new = [key for key in self.collect(rows, stage.key) if not self.is_known(stage, key)]
+            if not new:
+                continue
+            self.pks[stage.name].update(stage.lookup(new))
+            if stage.slug:
+                conflicts = self.get_slug_conflicts(stage, [key for key in new if key not in self.pks[stage.name]])
+                self.rejected[stage.name].update(conflicts)
+                rows = self.reject(rows, conflicts, stage.key, stage.label)
+
+        stage = self.get_stage("devices")
+        conflicts = self.get_position_conflicts(rows)
+        self.rejected[stage.name].update(conflicts)
+        rows = self.reject(rows, conflicts, stage.key, stage.label)
+
+        # Недостающие объекты считаем по оставшимся строкам: отклоненные строки ничего не создают
+        for stage in self.stages:
+            for key in self.collect(rows, stage.key):
+                if key not in self.pks[stage.name]:
+                    self.missing[stage.name].add(key)
+
+        # Если адрес встречается в нескольких строках, как и раньше побеждает последняя
+        interface_key = self.get_stage("interfaces").key
+        device_key = self.get_stage("devices").key
+        for row in rows:
+            self.assignments[row.address] = interface_key(row)
+            field = {"ssh": "primary_ip4", "ipmi": "oob_ip"}.get(row.interface.lower())
+            if field:
+                self.device_ips[device_key(row)][field] = row.address
+
+    def get_slug_conflicts(self, stage, keys):
+        """Новые объекты, slug которых уже занят другим объектом или другой строкой файла"""
+        slugs = self.slugs[stage.name]
+        conflicts = {}
+        new_slugs = {}
+        for key in keys:
+            slug = make_slug(key)
+            if slugs.setdefault(slug, key) != key:
+                conflicts[key] = f"slug {slug} is also used by {slugs[slug]}"
+            else:
+                new_slugs[slug] = key
+
+        if new_slugs:
+            queryset = stage.model.objects.filter(slug__in=new_slugs).exclude(name__in=list(new_slugs.values()))
+            if hasattr(stage.model, "parent"):
+                # У вложенных моделей (регионы, роли, платформы) slug уникален среди соседей
+                queryset = queryset.filter(parent__isnull=True)
+            for slug, name in queryset.values_list("slug", "name"):
+                conflicts[new_slugs[slug]] = f"slug {slug} is already used by {name}"
+        return conflicts
+
+    def get_position_conflicts(self, rows):
+        """Новые устройства, место которых в стойке (позиция и сторона) уже занято"""
+        stage = self.get_stage("devices")
+        rack_stage = self.get_stage("racks")
+        racks = self.pks["racks"]
+
+        # Занятые места читаются один раз для каждой существующей стойки
+        rack_ids = {racks[key] for key in self.collect(rows, rack_stage.key) if key in racks} - self.checked_racks
+        if rack_ids:
+            self.checked_racks.update(rack_ids)
+            for name, rack_id, position, face in Device.objects.filter(
+                rack__in=rack_ids, position__isnull=False
+            ).values_list("name", "rack_id", "position", "face"):
+                self.occupied[(rack_id, position, face)] = name
+
+        conflicts = {}
+        for key, row in self.collect(rows, stage.key).items():
+            if self.is_known(stage, key):
+                continue
+            rack_key = rack_stage.key(row)
+            place = (racks.get(rack_key, rack_key), row.position, row.face)
+            if place in self.occupied:
+                conflicts[key] = f"position {row.position} ({row.face}) is occupied by {self.occupied[place]}"
+            else:
+                self.occupied[place] = row.device
+        return conflicts
+
+    def plan_updates(self):
+        """Изменения существующих объектов: привязка IP к интерфейсу и primary/OOB IP устройства"""
+        interfaces = self.pks["interfaces"]
+        interface_type = ContentType.objects.get_for_model(Interface)
+
+        ip_addresses = {
+            self.pks["ip addresses"][address]: (address, key)
+            for address, key in self.assignments.items() if address in self.pks["ip addresses"]
+        }
+        for chunk in chunks(ip_addresses):
+            changed = {}
+            for pk, type_id, object_id in IPAddress.objects.filter(pk__in=chunk).values_list(
+                "pk", "assigned_object_type_id", "assigned_object_id"
+            ):
+                address, key = ip_addresses[pk]
+                interface = interfaces.get(key)
+                if interface is None or (type_id, object_id) != (interface_type.pk, interface):
+                    changed[pk] = object_id if type_id == interface_type.pk else None
+
+            # Текущие интерфейсы переназначаемых адресов - одним запросом на пачку
+            current_interfaces = Interface.objects.filter(pk__in=set(changed.values())).select_related(
+                "device"
+            ).in_bulk()
+            for pk, interface_id in changed.items():
+                address, key = ip_addresses[pk]
+                current = current_interfaces.get(interface_id)
+                old = f"{current.device} / {current}" if current else ""
+                self.updates.append((IPAddress, pk, address, "interface", old, f"{key[2]} / {key[3]}"))
+
+        devices = {
+            self.pks["devices"][key]: fields
+            for key, fields in self.device_ips.items() if key in self.pks["devices"]
+        }
+        for chunk in chunks(devices):
+            for device in Device.objects.filter(pk__in=chunk).select_related("primary_ip4", "oob_ip"):
+                for field, address in devices[device.pk].items():
+                    current = getattr(device, field)
+                    if current is None or str(current.address) != address:
+                        self.updates.append(
+                            (Device, device.pk, str(device), field, str(current.address) if current else "", address)
+                        )
+
+    def get_plan(self):
+        create = {}
+        for stage in self.stages:
+            keys = sorted(describe(key) for key in self.missing[stage.name])
+            if keys:
+                create[stage.name] = {"count": len(keys), "objects": keys[:PREVIEW_LIMIT]}
+
+        updates = sorted(
+            (
+                {"object": f"{capfirst(model._meta.verbose_name)} {obj}", "field": field, "old": old, "new": new}
+                for model, pk, obj, field, old, new in self.updates
+            ),
+            key=lambda change: (change["object"], change["field"]),
+        )
+
+        # Отпечаток плана: apply() проверяет, что база не изменилась после предпросмотра
+        digest = hashlib.sha256(json.dumps(
+            {
+                "create": {stage.name: sorted(map(describe, self.missing[stage.name])) for stage in self.stages},
+                "update": updates,
+                "failed": sorted(self.failed),
+            },
+            sort_keys=True,
+        ).encode()).hexdigest()
+
+        return {
+            "create": create,
+            "update": {"count": len(updates), "objects": updates[:PREVIEW_LIMIT]},
+            "rows": self.get_rows(),
+            "total": self.rows_read,
+            "failed": len(self.failed),
+            "digest": digest,
+        }
+
+    def get_rows(self):
+        """Отклоненные строки (принятые в предпросмотре не перечисляются)"""
+        return [
+            {"row": number, "device": device, "status": "failed", "error": error}
+            for number, (device, error) in sorted(self.failed.items())
+        ]
+
+    #
+    # Применение
+    #
+
+    def apply(self):
+        """
+        Выполняет план, построенный plan(); вызывать внутри transaction.atomic()
+
+        Returns:
+            dict: {модель: количество созданных объектов}
+        """
+        created = defaultdict(int)
+        self.rows_read = 0
+        for rows, failed in self.read_batches():
+            self.rows_read += len(rows) + len(failed)
+            self.apply_batch([row for row in rows if row.row not in self.failed], created)
+
+        self.report_progress("apply", "primary ips")
+        self.apply_updates()
+
+        return {
+            str(stage.model._meta.verbose_name_plural): created[stage.name]
+            for stage in self.stages if created[stage.name]
+        }
+
+    def apply_batch(self, rows, created):
+        """Создает недостающие объекты строк пачки"""
+        for stage in self.stages:
+            self.report_progress("apply", stage.name)
+            missing = {
+                key: row for key, row in self.collect(rows, stage.key).items()
+                if key in self.missing[stage.name] and key not in self.pks[stage.name]
+            }
+            if stage.name == "interfaces" and missing:
+                # Новые устройства уже получили интерфейсы из шаблонов типа устройства
+                found = stage.lookup(list(missing))
+                self.pks[stage.name].update(found)
+                missing = {key: row for key, row in missing.items() if key not in found}
+            if not missing:
+                continue
+
+            related = stage.related(missing.values()) if stage.related else None
+            objects = {key: stage.build(key, row, related) for key, row in missing.items()}
+            self.create(stage.model, objects.values(), bulk=stage.bulk)
+            self.pks[stage.name].update({key: obj.pk for key, obj in objects.items()})
+            created[stage.name] += len(objects)
+
+            if stage.name == "interfaces":
+                # bulk_create не обновляет счетчики устройств
+                new_interfaces = defaultdict(int)
+                for obj in objects.values():
+                    new_interfaces[obj.device_id] += 1
+                for device_id, count in new_interfaces.items():
+                    update_counter(Device, device_id, "interface_count", count)
+
+    def apply_updates(self):
+        interfaces = self.pks["interfaces"]
+        interface_type = ContentType.objects.get_for_model(Interface)
+
+        # Переназначенные существующие адреса и созданные раньше своего интерфейса
+        reassigned = {pk: address for model, pk, address, field, old, new in self.updates if field == "interface"}
+        reassigned.update({self.pks["ip addresses"][address]: address for address in self.unassigned})
+        for chunk in chunks(reassigned):
+            assigned = []
+            for ip_address in IPAddress.objects.filter(pk__in=chunk):
+                ip_address.snapshot()
+                ip_address.assigned_object_type = interface_type
+                ip_address.assigned_object_id = interfaces[self.assignments[reassigned[ip_address.pk]]]
+                assigned.append(ip_address)
+            self.update(IPAddress, assigned, ["assigned_object_type", "assigned_object_id"])
+
+        # Новым устройствам primary/OOB IP назначаются здесь же: адреса создаются после устройств
+        device_ips = {self.pks["devices"][key]: (key, fields) for key, fields in self.device_ips.items()}
+        for chunk in chunks(device_ips):
+            devices = []
+            for device in Device.objects.filter(pk__in=chunk):
+                key, fields = device_ips[device.pk]
+                changed = False
+                for field, address in fields.items():
+                    ip_address_id = self.pks["ip addresses"][address]
+                    if getattr(device, f"{field}_id") != ip_address_id:
+                        if not changed and key not in self.missing["devices"]:
+                            device.snapshot()
+                        setattr(device, f"{field}_id", ip_address_id)
+                        changed = True
+                if changed:
+                    devices.append(device)
+            self.update(Device, devices, ["primary_ip4", "oob_ip"])
+
+    def log_changes(self, objects, action=ObjectChangeActionChoices.ACTION_CREATE):
+        """Записи журнала изменений для объектов, сохраненных в обход сигналов"""
+        if self.request is None:
+            return
+        changes = []
+        for obj in objects:
+            change = obj.to_objectchange(action)
+            change.user = self.request.user
+            change.request_id = self.request.id
+            changes.append(change)
+        ObjectChange.objects.bulk_create(changes)
+
+    def create(self, model, objects, bulk=True):
+        objects = list(objects)
+        if not objects:
+            return
+        if not bulk:
+            for obj in objects:
+                obj.save()
+            return
+        model.objects.bulk_create(objects)
+        self.log_changes(objects)
+        search_backend.cache(objects, remove_existing=False)
+
+    def update(self, model, objects, fields):
+        """bulk_update измененных объектов с записью в журнал изменений"""
+        objects = list(objects)
+        if not objects:
+            return
+        now = timezone.now()
+        for obj in objects:
+            obj.last_updated = now
+        model.objects.bulk_update(objects, [*fields, "last_updated"])
+        self.log_changes(objects, ObjectChangeActionChoices.ACTION_UPDATE)
@@ -0,0 +1,130 @@
+import os
+import time
+from contextlib import nullcontext
+from datetime import timedelta
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+
+from core.exceptions import JobFailed
+from netbox.jobs import JobRunner
+from utilities.request import apply_request_processors
+
+from .importer import ExcelImporter, ImportFileError, iter_rows
+
+# Загруженный файл хранится в storage между предпросмотром и подтверждением импорта;
+# в задачу и в job.data передается только путь
+UPLOAD_DIR = "nb_automation/imports"
+PROGRESS_CACHE_KEY = "nb_automation:import:{}:progress"
+CACHE_TIMEOUT = 24 * 60 * 60
+
+
+def get_progress(job):
+    return cache.get(PROGRESS_CACHE_KEY.format(job.pk))
+
+
+def save_upload(upload):
+    """Сохраняет загруженный файл и возвращает его путь в storage"""
+    delete_expired_uploads()
+    extension = os.path.splitext(upload.name.lower())[1]
+    return default_storage.save(f"{UPLOAD_DIR}/{uuid4().hex}{extension}", upload)
+
+
+def delete_upload(path):
+    if path and default_storage.exists(path):
+        default_storage.delete(path)
+
+
+def delete_expired_uploads():
+    """Удаляет файлы, предпросмотр которых так и не подтвердили"""
+    try:
+        _, files = default_storage.listdir(UPLOAD_DIR)
+    except FileNotFoundError:
+        return
+    expired = timezone.now() - timedelta(seconds=CACHE_TIMEOUT)
+    for name in files:
+        path = f"{UPLOAD_DIR}/{name}"
+        if default_storage.get_modified_time(path) < expired:
+            default_storage.delete(path)
+
+
+class ExcelImportJob(JobRunner):
+    """
+    Импорт устройств из Excel в фоне
+
+    Без commit задача только строит план (ничего не записывая) и сохраняет
+    его в job.data для предпросмотра. С commit план строится заново и
+    выполняется в одной транзакции; если он отличается от подтвержденного
+    (digest), импорт не выполняется.
+
+    Файл читается пачками прямо из storage: при построении плана и еще раз
+    при применении, целиком в памяти он не держится.
+    """
+
+    class Meta:
+        name = 'Excel import'
+
+    def set_progress(self, phase, stage, index, total, done=None, count=None):
+        # Прогресс в кеше, а не в job.data: применение идет в транзакции, и запись в Job не была бы видна
+        progress = {"phase": phase, "stage": stage, "step": index + 1, "steps": total}
+        if done is not None:
+            progress["done"] = done
+        if count:
+            progress["total"] = count
+        cache.set(PROGRESS_CACHE_KEY.format(self.job.pk), progress, timeout=CACHE_TIMEOUT)
+
+    def run(self, path, filename='', commit=False, digest=None, request=None, **kwargs):
+        def read_batches():
+            with default_storage.open(path, "rb") as file:
+                yield from iter_rows(file, filename)
+
+        # Файл нужен только между успешным предпросмотром и его применением
+        keep_upload = False
+        try:
+            if not commit:
+                self.preview(path, filename, read_batches)
+                keep_upload = True
+            else:
+                self.apply(filename, read_batches, digest, request)
+        except ImportFileError as e:
+            self.logger.error(f"Can not read {filename}: {e}")
+            raise JobFailed()
+        except FileNotFoundError:
+            self.logger.error(f"Uploaded file {filename} was not found. Upload the file again.")
+            raise JobFailed()
+        finally:
+            if not keep_upload:
+                delete_upload(path)
+
+    def preview(self, path, filename, read_batches):
+        self.logger.info(f"Planning import of {filename}")
+        started = time.monotonic()
+        plan = ExcelImporter(read_batches, progress=self.set_progress).plan()
+        self.logger.info(f"Planned {plan['total']} rows in {time.monotonic() - started:.1f}s")
+        self.job.data = {"filename": filename, "path": path, "commit": False, **plan}
+        self.log_plan(plan)
+
+    def apply(self, filename, read_batches, digest, request):
+        self.logger.info(f"Importing {filename}")
+        importer = ExcelImporter(read_batches, request=request, progress=self.set_progress)
+        with transaction.atomic():
+            with apply_request_processors(request) if request else nullcontext():
+                plan = importer.plan()
+                if digest and plan["digest"] != digest:
+                    self.logger.error("Data in NetBox has changed since the preview. Upload the file again.")
+                    raise JobFailed()
+                created = importer.apply()
+
+        self.job.data = {"filename": filename, "commit": True, **plan, "created": created}
+        self.log_plan(plan)
+        created = ", ".join(f"{name}: {count}" for name, count in created.items()) or "nothing"
+        self.logger.info(f"Import finished. Created {created}. Failed rows: {plan['failed']}")
+
+    def log_plan(self, plan):
+        for row in plan["rows"]:
+            self.logger.warning(f"Row {row['row']}: {row['error']}")
+        create = ", ".join(f"{name}: {item['count']}" for name, item in plan["create"].items()) or "nothing"
+        self.logger.info(f"Create {create}. Update: {plan['update']['count']}. Failed rows: {plan['failed']}")
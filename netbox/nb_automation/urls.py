@@ -5,4 +5,5 @@ app_name = 'nb_automation'
 
 urlpatterns = [
     path('excel-upload/', views.ExcelUploadView.as_view(), name='excel_upload'),
+    path('excel-upload/<int:job_pk>/', views.ExcelImportView.as_view(), name='excel_import'),
 ]
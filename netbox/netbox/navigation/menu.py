@@ -529,6 +529,11 @@ APK_MENU = Menu(
                     link='plugins:apk:apk_rubej_list',
                     link_text='APK Rubej',
                 ),
+                MenuItem(
+                    link='plugins:apk:apk_rollup',
+                    link_text='APK Capacity',
+                    permissions=['apk.view_apk'],
+                ),
             ),
         ),
     ),
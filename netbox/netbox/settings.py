@@ -956,4 +956,22 @@ CELERY_BEAT_SCHEDULE = {
         'task': 'device_scan.tasks.calculate_cached_counts_task',
         'schedule': crontab(minute='*/10')
     },
-}
\ No newline at end of file
+}
+
+# Очереди Celery: планировщик сканов, сами сканы и обслуживание не ждут друг друга.
+# Остальные задачи остаются в очереди по умолчанию "celery". Воркеры запускаются на свои очереди
+# (см. contrib/netbox-celery.service и contrib/netbox-celery-scans.service):
+#   celery -A netbox worker -Q celery,scan_dispatch,maintenance -c 2
+#   celery -A netbox worker -Q scans -c 8
+CELERY_TASK_ROUTES = {
+    'device_scan.tasks.scan_all_devices_task': {'queue': 'scan_dispatch'},
+    'device_scan.tasks.scan_devices_task': {'queue': 'scans'},
+    'device_scan.tasks.scan_device_task': {'queue': 'scans'},
+    'device_scan.tasks.calculate_cached_counts_task': {'queue': 'maintenance'},
+}
+# Сканы - долгие I/O задачи: воркер не резервирует следующие, пока не закончит текущую,
+# и подтверждает задачу только после выполнения, чтобы пачка не терялась при падении воркера.
+# Пачка сканов должна укладываться в visibility_timeout брокера Redis (по умолчанию 1 час).
+CELERY_WORKER_PREFETCH_MULTIPLIER = 1
+CELERY_TASK_ACKS_LATE = True
+CELERY_TASK_REJECT_ON_WORKER_LOST = True
\ No newline at end of file
@@ -41,6 +41,36 @@ def update_counts(model, field_name, related_query):
     })
 
 
+def fix_count_drift(model, field_name, related_query, queryset=None):
+    """
+    Correct the given counter field only on objects whose cached value differs from the actual count of related
+    objects. Returns the number of corrected rows. For example,
+
+        fix_count_drift(Device, '_interface_count', 'interfaces')
+
+    will update only those Devices where _interface_count != Count('interfaces'). An optional queryset may be passed
+    to limit the objects checked (e.g. to those with recently changed children).
+    """
+    if queryset is None:
+        queryset = model.objects.all()
+    subquery = Subquery(
+        model.objects.filter(pk=OuterRef('pk')).annotate(_count=Count(related_query)).values('_count')
+    )
+
+    # Find objects with a stale counter; values are recalculated at update time to avoid racing concurrent changes
+    drifted = queryset.order_by().annotate(_actual_count=subquery).exclude(
+        **{field_name: F('_actual_count')}
+    ).values_list('pk', flat=True)
+    pks = list(drifted)
+    if not pks:
+        return 0
+
+    model.objects.filter(pk__in=pks).update(**{
+        field_name: subquery
+    })
+    return len(pks)
+
+
 #
 # Signal handlers
 #
@@ -1,14 +1,37 @@
 from collections import defaultdict
+from datetime import datetime, time
 
-from django.core.management.base import BaseCommand
+from django.contrib.contenttypes.models import ContentType
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime, parse_duration
 
+from core.models import ObjectChange
 from netbox.registry import registry
-from utilities.counters import update_counts
+from utilities.counters import fix_count_drift, update_counts
 
 
 class Command(BaseCommand):
     help = "Force a recalculation of all cached counter fields"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'args',
+            metavar='app_label[.ModelName]',
+            nargs='*',
+            help='One or more apps or models (owning the counter fields) to recalculate',
+        )
+        parser.add_argument(
+            '--drift',
+            action='store_true',
+            help="Update only those objects whose cached count differs from the actual count"
+        )
+        parser.add_argument(
+            '--since',
+            help="Check only objects with related objects changed since the given ISO 8601 date/time or duration "
+                 "(e.g. \"2025-01-01T12:00\" or \"00:30:00\"). Implies --drift."
+        )
+
     @staticmethod
     def collect_models():
         """
@@ -26,9 +49,95 @@ class Command(BaseCommand):
 
         return models
 
-    def handle(self, *model_names, **options):
-        for model, mappings in self.collect_models().items():
+    @staticmethod
+    def filter_models(models, *model_labels):
+        """
+        Limit the collected models to those matching the given app or model labels.
+        """
+        if not model_labels:
+            return models
+
+        selected = {}
+        for label in model_labels:
+            labels = label.lower().split('.')
+            if len(labels) not in (1, 2):
+                raise CommandError(
+                    f"Invalid model: {label}. Model names must be in the format <app_label> or "
+                    f"<app_label>.<model_name>."
+                )
+            matches = {
+                model: mappings for model, mappings in models.items()
+                if labels == [model._meta.app_label, model._meta.model_name][:len(labels)]
+            }
+            if not matches:
+                raise CommandError(f"No counter fields registered for {label}")
+            selected.update(matches)
+
+        return selected
+
+    @staticmethod
+    def parse_since(value):
+        """
+        Return an aware datetime from an ISO 8601 date/time, or from a duration relative to the current time.
+        """
+        if value is None or isinstance(value, datetime):
+            return value
+        since = parse_datetime(value)
+        if since is None and (date := parse_date(value)):
+            since = datetime.combine(date, time.min)
+        if since is None:
+            if (duration := parse_duration(value)) is None:
+                raise CommandError(f"Invalid --since value: {value}")
+            return timezone.now() - duration
+        return timezone.make_aware(since) if timezone.is_naive(since) else since
+
+    @staticmethod
+    def get_changed_objects(model, related_query, since):
+        """
+        Return a queryset of parent objects which may have gained or lost related objects since the given time: those
+        referenced by a related object modified since then, or by a changelog record (covering deletions and moves
+        between parents) of the related model.
+        """
+        relation = model._meta.get_field(related_query)     # Device.interfaces
+        related_model = relation.related_model              # Interface
+        fk_name = relation.field.name                       # 'device'
+
+        pks = set()
+        if hasattr(related_model, 'last_updated'):
+            pks.update(
+                related_model.objects.filter(last_updated__gte=since).values_list(relation.field.attname, flat=True)
+            )
+        for data in ('prechange_data', 'postchange_data'):
+            pks.update(
+                ObjectChange.objects.filter(
+                    changed_object_type=ContentType.objects.get_for_model(related_model),
+                    time__gte=since,
+                ).values_list(f'{data}__{fk_name}', flat=True)
+            )
+
+        return model.objects.filter(pk__in=[pk for pk in pks if isinstance(pk, int)])
+
+    def handle(self, *model_labels, **options):
+        models = self.filter_models(self.collect_models(), *model_labels)
+        since = self.parse_since(options['since'])
+
+        # Recalculate all counters unconditionally
+        if not options['drift'] and since is None:
+            for model, mappings in models.items():
+                for field_name, related_query in mappings.items():
+                    update_counts(model, field_name, related_query)
+
+            self.stdout.write(self.style.SUCCESS('Finished.'))
+            return
+
+        # Correct only counters which have drifted from the actual count
+        total = 0
+        for model, mappings in models.items():
             for field_name, related_query in mappings.items():
-                update_counts(model, field_name, related_query)
+                queryset = self.get_changed_objects(model, related_query, since) if since else None
+                corrected = fix_count_drift(model, field_name, related_query, queryset=queryset)
+                if corrected:
+                    self.stdout.write(f'{model._meta.label}.{field_name}: {corrected} corrected')
+                total += corrected
 
-        self.stdout.write(self.style.SUCCESS('Finished.'))
+        self.stdout.write(self.style.SUCCESS(f'Finished. {total} counters corrected.'))
@@ -1,7 +1,13 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
 from django.test import override_settings
 from django.urls import reverse
+from django.utils import timezone
 
 from dcim.models import *
+from utilities.counters import fix_count_drift
 from utilities.testing.base import TestCase
 from utilities.testing.utils import create_test_device
 
@@ -102,3 +108,53 @@ class CountersTest(TestCase):
         self.client.post(reverse("dcim:inventoryitem_bulk_delete"), data)
         device1.refresh_from_db()
         self.assertEqual(device1.inventory_item_count, 0)
+
+    def test_fix_count_drift(self):
+        """
+        Only objects with a stale counter should be corrected.
+        """
+        device1, device2 = Device.objects.all()
+        Device.objects.filter(pk=device1.pk).update(interface_count=5)
+
+        self.assertEqual(fix_count_drift(Device, 'interface_count', 'interfaces'), 1)
+        self.assertEqual(fix_count_drift(Device, 'interface_count', 'interfaces'), 0)
+        device1.refresh_from_db()
+        self.assertEqual(device1.interface_count, 2)
+
+        # Objects outside the given queryset are not checked
+        Device.objects.update(interface_count=0)
+        queryset = Device.objects.filter(pk=device2.pk)
+        self.assertEqual(fix_count_drift(Device, 'interface_count', 'interfaces', queryset=queryset), 1)
+        device1.refresh_from_db()
+        device2.refresh_from_db()
+        self.assertEqual(device1.interface_count, 0)
+        self.assertEqual(device2.interface_count, 2)
+
+    def test_calculate_cached_counts_drift(self):
+        device1, device2 = Device.objects.all()
+        Device.objects.filter(pk=device1.pk).update(interface_count=0, inventory_item_count=3)
+
+        out = StringIO()
+        call_command('calculate_cached_counts', 'dcim.device', drift=True, stdout=out)
+        self.assertIn('dcim.Device.interface_count: 1 corrected', out.getvalue())
+        self.assertIn('dcim.Device.inventory_item_count: 1 corrected', out.getvalue())
+        self.assertIn('2 counters corrected', out.getvalue())
+        device1.refresh_from_db()
+        self.assertEqual(device1.interface_count, 2)
+        self.assertEqual(device1.inventory_item_count, 0)
+
+    def test_calculate_cached_counts_since(self):
+        """
+        With --since, only objects with recently changed related objects should be checked.
+        """
+        device1, device2 = Device.objects.all()
+        Interface.objects.filter(device=device1).update(last_updated=timezone.now() - timedelta(days=1))
+        Device.objects.update(interface_count=0)
+
+        out = StringIO()
+        call_command('calculate_cached_counts', 'dcim.device', since='01:00:00', stdout=out)
+        self.assertIn('dcim.Device.interface_count: 1 corrected', out.getvalue())
+        device1.refresh_from_db()
+        device2.refresh_from_db()
+        self.assertEqual(device1.interface_count, 0)
+        self.assertEqual(device2.interface_count, 2)
@@ -0,0 +1,677 @@
+import asyncio
+import hashlib
+import json
+import random
+import time
+from email.utils import parsedate_to_datetime
+
+import aiohttp
+
+from vendors.base.vendor import DEFAULT_MAX_CONCURRENT_REQUESTS, DEFAULT_REQUESTS_PER_SECOND, RedfishLinksMixin
+
+# Общий лимит соединений пула на все BMC одного процесса
+DEFAULT_MAX_CONNECTIONS = 200
+# Сколько серверов опрашивается одновременно в одном event loop
+DEFAULT_MAX_CONCURRENT_DEVICES = 100
+DEFAULT_TIMEOUT = 30
+# Таймаут установки TCP соединения: выключенный BMC не должен стоить полных DEFAULT_TIMEOUT секунд
+DEFAULT_CONNECT_TIMEOUT = 5
+# Нижняя граница адаптивного таймаута запроса
+DEFAULT_MIN_TIMEOUT = 10
+# Сколько сетевых ошибок подряд переводят BMC в недоступные до конца сканирования
+DEFAULT_FAILURE_THRESHOLD = 3
+# Через сколько секунд недоступному BMC снова разрешается пробный запрос
+DEFAULT_RESET_TIMEOUT = 60
+# Дольше этого Retry-After не ждем - считаем, что ответа не будет
+DEFAULT_MAX_RETRY_AFTER = 30
+
+# Поддержка $expand/$select, определенная для прошивки BMC:
+# {(host, RedfishVersion, Product): {"expand": ".", "max_levels": 1, "select": True}}
+_query_support_cache = {}
+
+# Поля ресурса Systems, которые меняются только при замене железа или прошивки.
+# PowerState, Status и т.п. сюда не входят: из-за них менялся бы и @odata.etag
+FINGERPRINT_FIELDS = (
+    "Manufacturer", "Model", "SKU", "SerialNumber", "PartNumber", "BiosVersion",
+    "MemorySummary.TotalSystemMemoryGiB", "ProcessorSummary.Count", "ProcessorSummary.Model",
+)
+# Состав коллекций, который тоже входит в отпечаток: {ресурс: поле со списком элементов}.
+# Из элементов берутся только ссылки и серийные номера, показания датчиков и etag не учитываются
+FINGERPRINT_MEMBERS = {
+    "Storage": "Members",
+    "Power": "PowerSupplies",
+    "Thermal": "Fans",
+}
+
+
+class AsyncHostLimiter:
+    """
+    Ограничитель нагрузки на один BMC (iLO/iDRAC/iBMC): не больше max_concurrent
+    запросов одновременно и минимальный интервал между стартами запросов
+    """
+
+    def __init__(self, max_concurrent=DEFAULT_MAX_CONCURRENT_REQUESTS, requests_per_second=DEFAULT_REQUESTS_PER_SECOND):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.interval = 1.0 / requests_per_second if requests_per_second else 0
+        self._semaphore = asyncio.Semaphore(self.max_concurrent)
+        self._next_slot = 0.0
+
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        if self.interval:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+            if slot > now:
+                try:
+                    await asyncio.sleep(slot - now)
+                except BaseException:
+                    self._semaphore.release()
+                    raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self._semaphore.release()
+
+
+class HostUnavailable(aiohttp.ClientConnectionError):
+    """BMC признан недоступным (circuit breaker открыт): запросы к нему не отправляются"""
+
+
+class QueryNotSupported(Exception):
+    """BMC явно отклонил параметры запроса ($expand и т.п.): 400 Bad Request или 501 Not Implemented"""
+
+
+class HostHealth:
+    """
+    Состояние одного BMC: circuit breaker и адаптивный таймаут
+
+    После failure_threshold сетевых ошибок подряд (нет соединения, таймаут) breaker
+    открывается, и все следующие запросы к хосту сразу падают с HostUnavailable,
+    поэтому сканирование мертвого сервера прерывается, а не ждет таймаут каждой секции.
+    Через reset_timeout секунд пропускается пробный запрос, успешный ответ закрывает breaker.
+
+    Таймаут запроса считается по наблюдаемому времени ответов, как RTO в TCP:
+    srtt + 4 * rttvar в пределах [min_timeout, max_timeout].
+    """
+
+    def __init__(self, failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 min_timeout=DEFAULT_MIN_TIMEOUT, max_timeout=DEFAULT_TIMEOUT):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.reset_timeout = reset_timeout
+        self.min_timeout = min(min_timeout, max_timeout)
+        self.max_timeout = max_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.srtt = None
+        self.rttvar = None
+
+    @property
+    def is_open(self):
+        return self.opened_at is not None and time.monotonic() - self.opened_at < self.reset_timeout
+
+    @property
+    def timeout(self):
+        """Таймаут следующего запроса, секунды"""
+        if self.srtt is None:
+            return self.max_timeout
+        return min(self.max_timeout, max(self.min_timeout, self.srtt + 4 * self.rttvar))
+
+    def check(self, host):
+        if self.is_open:
+            raise HostUnavailable(f"BMC {host} is unavailable: {self.failures} consecutive connection failures")
+
+    def record_success(self, latency):
+        self.failures = 0
+        self.opened_at = None
+        if self.srtt is None:
+            self.srtt = latency
+            self.rttvar = latency / 2
+        else:
+            self.rttvar = 0.75 * self.rttvar + 0.25 * abs(self.srtt - latency)
+            self.srtt = 0.875 * self.srtt + 0.125 * latency
+
+    def record_failure(self):
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = time.monotonic()
+
+
+def parse_retry_after(value):
+    """Retry-After в секундах: число или HTTP дата; None, если заголовка нет или он непонятен"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ConnectionPool:
+    """
+    Общий пул HTTP соединений для множества BMC
+
+    Один aiohttp.ClientSession на event loop: keep-alive соединения
+    переиспользуются между запросами, число соединений ограничено
+    и в целом (max_connections), и на каждый хост (max_connections_per_host).
+    Сессия создается лениво внутри работающего event loop.
+    """
+
+    def __init__(self, max_connections=DEFAULT_MAX_CONNECTIONS,
+                 max_connections_per_host=DEFAULT_MAX_CONCURRENT_REQUESTS,
+                 requests_per_second=DEFAULT_REQUESTS_PER_SECOND, timeout=DEFAULT_TIMEOUT,
+                 connect_timeout=DEFAULT_CONNECT_TIMEOUT, min_timeout=DEFAULT_MIN_TIMEOUT,
+                 failure_threshold=DEFAULT_FAILURE_THRESHOLD, reset_timeout=DEFAULT_RESET_TIMEOUT,
+                 max_retry_after=DEFAULT_MAX_RETRY_AFTER):
+        self.max_connections = max_connections
+        self.max_connections_per_host = max(1, int(max_connections_per_host or 1))
+        self.requests_per_second = requests_per_second
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.min_timeout = min_timeout
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.max_retry_after = max_retry_after
+        self._session = None
+        self._limiters = {}
+        self._health = {}
+
+    @property
+    def session(self):
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.max_connections,
+                limit_per_host=self.max_connections_per_host,
+                ssl=False,
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    def get_limiter(self, host):
+        """Возвращает ограничитель запросов для хоста"""
+        if host not in self._limiters:
+            self._limiters[host] = AsyncHostLimiter(self.max_connections_per_host, self.requests_per_second)
+        return self._limiters[host]
+
+    def get_health(self, host):
+        """Возвращает состояние хоста (circuit breaker и адаптивный таймаут)"""
+        if host not in self._health:
+            self._health[host] = HostHealth(
+                self.failure_threshold, self.reset_timeout, self.min_timeout, self.timeout
+            )
+        return self._health[host]
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+class AsyncBaseProvider(RedfishLinksMixin):
+    """
+    Базовый класс провайдера на asyncio
+
+    Все запросы идут через общий ConnectionPool, поэтому один процесс
+    может опрашивать сотни BMC одновременно. Методы сбора данных - корутины,
+    get_all_inventory() нужно выполнять в event loop (см. run_inventory / collect_inventories).
+    """
+
+    def __init__(self, ip_address: str, username: str, password: str,
+                 max_concurrent_requests: int = DEFAULT_MAX_CONCURRENT_REQUESTS,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 pool: ConnectionPool = None):
+        self.ip_address = ip_address
+        self.username = username
+        self.password = password
+        self.base_url = f"https://{ip_address}"
+        self.max_concurrent_requests = max(1, int(max_concurrent_requests or 1))
+        self.auth = aiohttp.BasicAuth(username or "", password or "")
+        # Если пул не передан, провайдер работает со своим и сам его закрывает
+        self._owns_pool = pool is None
+        self.pool = pool or ConnectionPool(
+            max_connections=self.max_concurrent_requests,
+            max_connections_per_host=self.max_concurrent_requests,
+            requests_per_second=requests_per_second,
+        )
+        self.limiter = self.pool.get_limiter(ip_address)
+        self.health = self.pool.get_health(ip_address)
+        self._path_locks = {}
+        self._response_cache = {}
+        self._query_support_key = None
+        # Счетчики HTTP запросов за сбор инвентаря
+        self.stats = {"requests": 0, "requests_saved": 0, "retries": 0, "bytes": 0}
+        # Время выполнения секций сбора инвентаря, секунды
+        self.timings = {}
+
+    async def _get(self, path, retry=2, delay=0.3, reject_query=False):
+        """
+        Вспомогательный метод для GET запросов
+        Работает и с /redfish/v1 и с /rest/v1
+
+        Повторы идут с экспоненциальной задержкой и случайным разбросом (jitter),
+        на 429/503 выдерживается Retry-After. Сетевые ошибки учитывает circuit breaker
+        хоста (self.health): если BMC не отвечает, запрос падает сразу с HostUnavailable.
+
+        Args:
+            path: путь API (например, "/redfish/v1/Systems/1")
+            retry: количество попыток
+            delay: базовая задержка между попытками
+            reject_query: на 400/501 выбросить QueryNotSupported вместо возврата None
+
+        Returns:
+            dict: JSON ответ от сервера или None при ошибке
+        """
+        url = f"{self.base_url}{path}"
+        timeout = self.health.timeout
+        wait = None
+
+        for attempt in range(retry):
+            if attempt > 0:
+                self.stats["retries"] += 1
+                if wait is None:
+                    wait = delay * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                await asyncio.sleep(wait)
+            wait = None
+
+            self.health.check(self.ip_address)
+            try:
+                async with self.limiter:
+                    self.stats["requests"] += 1
+                    started = time.monotonic()
+                    request_timeout = aiohttp.ClientTimeout(total=timeout, sock_connect=self.pool.connect_timeout)
+                    async with self.pool.session.get(url, auth=self.auth, timeout=request_timeout) as response:
+                        # Любой HTTP ответ значит, что BMC жив
+                        self.health.record_success(time.monotonic() - started)
+
+                        # 404 - ресурс не найден, это нормально
+                        if response.status == 404:
+                            return None
+
+                        if reject_query and response.status in (400, 501):
+                            raise QueryNotSupported(f"{self.ip_address} rejected {path}: HTTP {response.status}")
+
+                        if response.status in (429, 503):
+                            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+                            if retry_after is not None and retry_after > self.pool.max_retry_after:
+                                print(f"   ⚠️ {self.ip_address} просит подождать {retry_after:.0f}s, пропускаем {path}")
+                                return None
+                            wait = retry_after
+
+                        response.raise_for_status()
+                        body = await response.read()
+                        self.stats["bytes"] += len(body)
+
+                return json.loads(body) if body else None
+
+            except QueryNotSupported:
+                raise
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                self.health.record_failure()
+                # Следующая попытка получает больший таймаут: возможно, BMC просто медленный
+                timeout = min(self.pool.timeout, timeout * 2)
+                if attempt < retry - 1 and not self.health.is_open:
+                    print(f"   ⚠️ Attempt {attempt + 1}/{retry}, reconnecting...")
+                else:
+                    # После всех попыток выбрасываем исключение, чтобы задача могла его обработать
+                    raise aiohttp.ClientConnectionError(
+                        f"Failed to connect to {self.ip_address} after {attempt + 1} attempts: "
+                        f"{str(e) or type(e).__name__}"
+                    ) from e
+            except Exception:
+                if attempt < retry - 1:
+                    continue
+                return None
+
+        return None
+
+    async def _get_cached(self, path, reject_query=False):
+        """
+        GET с кешированием ответа на время одного сбора инвентаря
+        Одновременные запросы одного и того же пути выполняются один раз.
+        """
+        if path in self._response_cache:
+            return self._response_cache[path]
+
+        path_lock = self._path_locks.setdefault(path, asyncio.Lock())
+        async with path_lock:
+            if path not in self._response_cache:
+                self._response_cache[path] = await self._get(path, reject_query=reject_query)
+            return self._response_cache[path]
+
+    async def _get_many(self, paths, cached=False):
+        """
+        Параллельно запрашивает несколько путей
+
+        Returns:
+            list: ответы в том же порядке, что и paths (None для пустых путей и ошибок)
+        """
+        fetch = self._get_cached if cached else self._get
+
+        async def _fetch(path):
+            return await fetch(path) if path else None
+
+        return list(await asyncio.gather(*(_fetch(path) for path in paths)))
+
+    @staticmethod
+    def _is_expanded(ref):
+        """Ссылка уже развернута в ресурс (ответ на $expand), а не просто {"@odata.id": ...}"""
+        return isinstance(ref, dict) and ("Id" in ref or "@odata.type" in ref)
+
+    async def _get_query_support(self):
+        """
+        Определяет поддержку $expand и $select по ProtocolFeaturesSupported
+        Результат кешируется для прошивки BMC (RedfishVersion + Product).
+        """
+        if self._query_support_key is None:
+            root = await self._get_cached("/redfish/v1") or {}
+            key = (self.ip_address, root.get("RedfishVersion"), root.get("Product"))
+
+            if key not in _query_support_cache:
+                features = root.get("ProtocolFeaturesSupported") or {}
+                expand = features.get("ExpandQuery") or {}
+
+                # "." разворачивает только подчиненные ресурсы (Members), "*" - еще и Links
+                symbol = "." if expand.get("NoLinks") else "*" if expand.get("ExpandAll") else None
+                max_levels = 0
+                if symbol:
+                    max_levels = int(expand.get("MaxLevels") or 1) if expand.get("Levels") else 1
+
+                _query_support_cache[key] = {
+                    "expand": symbol,
+                    "levels": bool(expand.get("Levels")),
+                    "max_levels": max_levels,
+                    "select": bool(features.get("SelectQuery")),
+                }
+
+            self._query_support_key = key
+
+        return _query_support_cache[self._query_support_key]
+
+    @staticmethod
+    def _add_query(path, query):
+        return f"{path}{'&' if '?' in path else '?'}{query}"
+
+    async def _get_expanded(self, path, levels=1, cached=False):
+        """
+        Получает коллекцию с развернутыми Members одним запросом ($expand)
+
+        Если BMC не поддерживает $expand (400/501) или вернул неразвернутые ссылки,
+        возвращается обычная коллекция: _fetch_members дочитает элементы по одному,
+        а прошивка запоминается как не поддерживающая $expand. Другие ошибки (404,
+        таймаут) на поддержку не влияют: коллекция читается без $expand только в этот раз.
+        """
+        fetch = self._get_cached if cached else self._get
+        # Старый /rest/v1 (HP Gen9) параметры запроса Redfish не понимает
+        if not path.startswith("/redfish/"):
+            return await fetch(path)
+
+        support = await self._get_query_support()
+        if not support["max_levels"]:
+            return await fetch(path)
+
+        levels = min(levels, support["max_levels"])
+        if support["levels"]:
+            expand = f"$expand={support['expand']}($levels={levels})"
+        else:
+            expand = f"$expand={support['expand']}"
+        try:
+            data = await fetch(self._add_query(path, expand), reject_query=True)
+        except QueryNotSupported:
+            support["max_levels"] = 0
+            return await fetch(path)
+
+        if data is None:
+            return await fetch(path)
+
+        members = data.get("Members") or []
+        if members and not any(self._is_expanded(member) for member in members):
+            support["max_levels"] = 0
+
+        return data
+
+    async def _fetch_members(self, refs, cached=False, select=None):
+        """
+        Получает все элементы коллекции (Members, Drives и т.п.) параллельно
+        Уже развернутые через $expand элементы повторно не запрашиваются.
+
+        Args:
+            refs: список ссылок или развернутых ресурсов
+            cached: кешировать ответы (если элементы читают несколько секций)
+            select: список нужных полей для $select (если BMC его поддерживает)
+
+        Returns:
+            list: данные элементов в исходном порядке, без пустых ответов
+        """
+        refs = list(refs or [])
+        query = None
+        if select and not all(self._is_expanded(ref) for ref in refs):
+            support = await self._get_query_support()
+            if support["select"]:
+                query = "$select=" + ",".join(select)
+
+        paths = []
+        for ref in refs:
+            if self._is_expanded(ref):
+                paths.append(None)
+                continue
+            path = self._extract_path(self._get_first_href(ref))
+            paths.append(self._add_query(path, query) if path and query else path)
+
+        fetched = await self._get_many(paths, cached=cached)
+
+        results = []
+        for ref, data in zip(refs, fetched):
+            if self._is_expanded(ref):
+                self.stats["requests_saved"] += 1
+                data = ref
+            if data:
+                results.append(data)
+        return results
+
+    async def _collect_sections(self, sections):
+        """
+        Параллельно выполняет секции сбора инвентаря (System, Processors, ...)
+
+        Args:
+            sections: dict {название секции: корутинная функция}
+
+        Returns:
+            dict: {название секции: результат} в исходном порядке
+        """
+        results = await asyncio.gather(*(self._timed(name, func) for name, func in sections.items()))
+        return dict(zip(sections.keys(), results))
+
+    async def _timed(self, name, func):
+        """Выполняет корутинную функцию и записывает время в self.timings[name]"""
+        started = time.monotonic()
+        try:
+            return await func()
+        finally:
+            self.timings[name] = round(time.monotonic() - started, 3)
+
+    def get_scan_stats(self):
+        """
+        Статистика последнего сбора: запросы, повторы, байты, время секций
+        и версия Redfish сервиса BMC (если корень /redfish/v1 запрашивался)
+        """
+        firmware = None
+        if self._query_support_key:
+            _, version, product = self._query_support_key
+            firmware = " ".join(str(part) for part in (product, version) if part) or None
+
+        return {**self.stats, "timings": dict(self.timings), "firmware": firmware}
+
+    async def get_system_resource(self):
+        """Ресурс Systems сервера (переопределяется в провайдерах, ответ кешируется)"""
+        raise NotImplementedError
+
+    async def _get_fingerprint_members(self, system):
+        """
+        Состав дисковых контроллеров, блоков питания и вентиляторов для отпечатка
+
+        Коллекция Storage берется по ссылке из Systems, Power и Thermal - по соглашению Redfish
+        прямо под ресурсом Chassis из Links.Chassis, без запроса самого Chassis.
+        Все три запроса идут параллельно и кешируются.
+
+        Returns:
+            dict: {ресурс: [количество, [(ссылка, серийный номер), ...]]} или None для недоступного ресурса
+        """
+        chassis_path = self._extract_path(self._get_first_href((system.get("Links") or {}).get("Chassis")))
+        paths = {
+            "Storage": self._extract_path(self._get_first_href(system.get("Storage"))),
+            "Power": f"{chassis_path}/Power" if chassis_path else None,
+            "Thermal": f"{chassis_path}/Thermal" if chassis_path else None,
+        }
+        fetched = await self._get_many(list(paths.values()), cached=True)
+
+        members = {}
+        for (name, field), data in zip(FINGERPRINT_MEMBERS.items(), fetched):
+            if not isinstance(data, dict):
+                members[name] = None
+                continue
+            items = [item for item in data.get(field) or [] if isinstance(item, dict)]
+            members[name] = [
+                data.get(f"{field}@odata.count", len(items)),
+                sorted(
+                    (item.get("@odata.id") or item.get("MemberId") or "", item.get("SerialNumber") or "")
+                    for item in items
+                ),
+            ]
+        return members
+
+    async def get_fingerprint(self):
+        """
+        Дешевый отпечаток конфигурации сервера: хеш стабильных полей ресурса Systems
+        и состава коллекций Storage, Power и Thermal (см. _get_fingerprint_members).
+        Это 4-5 запросов, три из них параллельно; если отпечаток не изменился, глубокий обход не нужен.
+
+        Returns:
+            str: sha256 или None, если BMC не вернул данных
+        """
+        system = await self.get_system_resource()
+        if not system:
+            return None
+
+        values = {}
+        for field in FINGERPRINT_FIELDS:
+            value = system
+            for key in field.split("."):
+                value = value.get(key) if isinstance(value, dict) else None
+            values[field] = value
+
+        if not any(values.values()):
+            return None
+        values.update(await self._get_fingerprint_members(system))
+        return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode()).hexdigest()
+
+    async def close(self):
+        """Закрывает собственный пул соединений (общий пул закрывает владелец)"""
+        if self._owns_pool:
+            await self.pool.close()
+
+    async def get_all_inventory(self, *args, **kwargs) -> dict:
+        raise NotImplementedError
+
+
+def log_request_stats(provider):
+    stats = provider.stats
+    print(
+        f"   📡 HTTP запросов: {stats['requests']}, "
+        f"сэкономлено через $expand: {stats['requests_saved']} host {provider.ip_address}"
+    )
+
+
+async def collect_inventory(provider, fingerprint=None):
+    """
+    Собирает инвентарь сервера, если он изменился
+
+    Args:
+        provider: AsyncBaseProvider
+        fingerprint: отпечаток с прошлого полного скана (None - сканировать полностью)
+
+    Returns:
+        dict: инвентарь с ключом "fingerprint"; если отпечаток совпал -
+              {"ip_address": ..., "fingerprint": ..., "unchanged": True}.
+              В "scan_stats" - статистика запросов и время секций (get_scan_stats)
+    """
+    started = time.monotonic()
+    current = await provider._timed("Fingerprint", provider.get_fingerprint)
+
+    if fingerprint and current == fingerprint:
+        print(f"   ⏭️  Конфигурация не изменилась, пропускаем полный скан host {provider.ip_address}")
+        inventory = {"ip_address": provider.ip_address, "fingerprint": current, "unchanged": True}
+    else:
+        inventory = await provider.get_all_inventory()
+        inventory["fingerprint"] = current
+
+    provider.timings["Total"] = round(time.monotonic() - started, 3)
+    inventory["scan_stats"] = provider.get_scan_stats()
+    return inventory
+
+
+def run_inventory(provider, fingerprint=None):
+    """Синхронно собирает инвентарь одного сервера"""
+    async def _run():
+        try:
+            return await collect_inventory(provider, fingerprint)
+        finally:
+            await provider.close()
+            log_request_stats(provider)
+
+    return asyncio.run(_run())
+
+
+async def collect_inventories(providers, pool=None, max_concurrent_devices=DEFAULT_MAX_CONCURRENT_DEVICES,
+                              fingerprints=None):
+    """
+    Собирает инвентарь множества серверов в одном event loop
+
+    Args:
+        providers: список AsyncBaseProvider (обычно с общим pool)
+        pool: общий ConnectionPool, закрывается по завершении
+        max_concurrent_devices: сколько серверов опрашивается одновременно
+        fingerprints: отпечатки прошлых сканов в порядке providers (см. collect_inventory)
+
+    Returns:
+        list: инвентарь или исключение для каждого провайдера, в исходном порядке
+              (у исключения в атрибуте scan_stats статистика неудачного скана)
+    """
+    semaphore = asyncio.Semaphore(max(1, int(max_concurrent_devices)))
+
+    async def _collect(provider, fingerprint):
+        async with semaphore:
+            try:
+                return await collect_inventory(provider, fingerprint)
+            except Exception as e:
+                e.scan_stats = provider.get_scan_stats()
+                return e
+            finally:
+                await provider.close()
+                log_request_stats(provider)
+
+    try:
+        fingerprints = fingerprints or [None] * len(providers)
+        return list(await asyncio.gather(*(
+            _collect(provider, fingerprint) for provider, fingerprint in zip(providers, fingerprints)
+        )))
+    finally:
+        if pool is not None:
+            await pool.close()
+
+
+def run_inventories(providers, pool=None, max_concurrent_devices=DEFAULT_MAX_CONCURRENT_DEVICES, fingerprints=None):
+    """Синхронная обертка над collect_inventories (для Celery задач)"""
+    return asyncio.run(collect_inventories(providers, pool, max_concurrent_devices, fingerprints))
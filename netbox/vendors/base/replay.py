@@ -0,0 +1,187 @@
+import asyncio
+import json
+import os
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from vendors.base.aio import ConnectionPool
+
+# Формат файла записи:
+# {"vendor": "dell", "host": "10.0.0.1", "responses": {"/redfish/v1/Systems": {"status": 200, "body": {...}}}}
+
+
+def _split_url(url):
+    """https://10.0.0.1/redfish/v1?$expand=. -> ("10.0.0.1", "/redfish/v1?$expand=.")"""
+    parts = urlsplit(url)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    return parts.hostname, path
+
+
+class ReplayResponse:
+    """Минимальная замена aiohttp.ClientResponse, которую использует AsyncBaseProvider._get"""
+
+    def __init__(self, url, status, body, latency=0.0, headers=None):
+        self.url = url
+        self.status = status
+        self.headers = headers or {}
+        self._body = body
+        self._latency = latency
+
+    async def __aenter__(self):
+        if self._latency:
+            await asyncio.sleep(self._latency)
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+    def raise_for_status(self):
+        if self.status >= 400:
+            raise aiohttp.ClientResponseError(
+                None, (), status=self.status, message=f"Recorded {self.status} for {self.url}"
+            )
+
+    async def read(self):
+        return self._body
+
+
+class RecordingSession:
+    """Обертка над aiohttp.ClientSession: пропускает запросы к BMC и запоминает ответы"""
+
+    def __init__(self, session, responses):
+        self._session = session
+        self._responses = responses
+
+    def get(self, url, **kwargs):
+        return _RecordingRequest(self._session, self._responses, url, kwargs)
+
+    @property
+    def closed(self):
+        return self._session.closed
+
+    async def close(self):
+        await self._session.close()
+
+
+class _RecordingRequest:
+
+    def __init__(self, session, responses, url, kwargs):
+        self._session = session
+        self._responses = responses
+        self._url = url
+        self._kwargs = kwargs
+
+    async def __aenter__(self):
+        async with self._session.get(self._url, **self._kwargs) as response:
+            status = response.status
+            headers = dict(response.headers)
+            body = await response.read()
+
+        host, path = _split_url(self._url)
+        try:
+            recorded = json.loads(body) if body else None
+        except ValueError:
+            recorded = body.decode(errors="replace")
+        self._responses.setdefault(host, {})[path] = {"status": status, "body": recorded}
+
+        return ReplayResponse(self._url, status, body, headers=headers)
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+class RecordingPool(ConnectionPool):
+    """
+    ConnectionPool, который записывает все ответы BMC для последующего replay
+
+    Пример:
+        pool = RecordingPool()
+        provider = DellProvider(ip, user, password, pool=pool)
+        run_inventory(provider)
+        pool.save("fixtures/", "dell")
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # {host: {path: {"status": ..., "body": ...}}}
+        self.responses = {}
+
+    @property
+    def session(self):
+        return RecordingSession(ConnectionPool.session.fget(self), self.responses)
+
+    def save(self, directory, vendor):
+        """
+        Сохраняет записи в directory, по файлу на хост
+
+        Returns:
+            list: пути созданных файлов
+        """
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for host, responses in self.responses.items():
+            path = os.path.join(directory, f"{vendor}_{host}.json")
+            with open(path, "w") as f:
+                json.dump({"vendor": vendor, "host": host, "responses": responses}, f, indent=2, sort_keys=True)
+            files.append(path)
+        return files
+
+
+class ReplaySession:
+    """Отдает записанные ответы вместо BMC; незаписанные пути возвращают 404"""
+
+    closed = False
+
+    def __init__(self, responses, latency=0.0):
+        self.responses = responses
+        self.latency = latency
+
+    def get(self, url, **kwargs):
+        _, path = _split_url(url)
+        recorded = self.responses.get(path)
+
+        if recorded is None:
+            return ReplayResponse(url, 404, b"", self.latency)
+
+        body = recorded.get("body")
+        if body is None:
+            data = b""
+        elif isinstance(body, str):
+            data = body.encode()
+        else:
+            data = json.dumps(body).encode()
+        return ReplayResponse(url, recorded.get("status", 200), data, self.latency)
+
+    async def close(self):
+        return None
+
+
+class ReplayPool(ConnectionPool):
+    """
+    ConnectionPool, который обслуживает запросы из записи (см. RecordingPool)
+
+    Все хосты получают одни и те же ответы, поэтому одну запись можно
+    прогнать для сотни "серверов" одновременно. latency - задержка каждого
+    ответа в секундах, имитирует медленный BMC.
+    """
+
+    def __init__(self, responses, latency=0.0, **kwargs):
+        super().__init__(**kwargs)
+        self._session = ReplaySession(responses, latency)
+
+    @property
+    def session(self):
+        return self._session
+
+    async def close(self):
+        return None
+
+
+def load_fixture(path):
+    """Читает файл записи: возвращает (vendor, responses)"""
+    with open(path) as f:
+        fixture = json.load(f)
+    return fixture["vendor"], fixture["responses"]
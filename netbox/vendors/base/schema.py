@@ -0,0 +1,305 @@
+from dataclasses import dataclass, field
+from typing import ClassVar, Optional
+
+# Нормализованная схема инвентаря, общая для всех производителей
+#
+# Провайдеры Dell/HP/Huawei возвращают словари немного разной формы
+# ("Capacity" против "Capacity (W)", "Speed" против "Speed (RPM)"),
+# normalize_inventory() приводит их к одним и тем же dataclass с типизированными полями.
+
+EMPTY_VALUES = ("N/A", "n/a", "None", "Unknown", "")
+
+
+def to_str(value):
+    """Строка без заглушек N/A/None"""
+    if value is None:
+        return ""
+    value = str(value).strip()
+    return "" if value in EMPTY_VALUES else value
+
+
+def to_int(value):
+    """Целое число или None; "2400 MHz" и 2400.0 -> 2400"""
+    number = to_float(value)
+    return int(number) if number is not None else None
+
+
+def to_float(value):
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = to_str(value).split(" ")[0].replace(",", ".")
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def first(data, *keys):
+    """Первое непустое значение из нескольких вариантов ключа"""
+    for key in keys:
+        value = data.get(key)
+        if to_str(value):
+            return value
+    return None
+
+
+def show(value):
+    """Значение для описания InventoryItem: пустые поля показываются как N/A"""
+    return "N/A" if value is None or value == "" else value
+
+
+@dataclass
+class Component:
+    """
+    Базовый компонент сервера
+
+    name - имя InventoryItem в NetBox, остальные поля - типизированные характеристики.
+    """
+    kind: ClassVar[str] = ""
+
+    name: str
+    model: str = ""
+    manufacturer: str = ""
+    serial: str = ""
+    status: str = ""
+
+    # Поля, которые хранятся в InventoryComponent (см. device_scan/models.py)
+    spec_fields: ClassVar[tuple] = ()
+
+    def get_description(self):
+        return ""
+
+    def get_spec(self):
+        """Типизированные характеристики для хранения в базе"""
+        return {name: getattr(self, name) for name in ("model", "status", *self.spec_fields)}
+
+
+@dataclass
+class Fan(Component):
+    kind: ClassVar[str] = "fan"
+    spec_fields: ClassVar[tuple] = ("rpm",)
+
+    rpm: Optional[int] = None
+
+
+@dataclass
+class DIMM(Component):
+    kind: ClassVar[str] = "memory"
+    spec_fields: ClassVar[tuple] = ("capacity_gb", "memory_type", "speed_mhz")
+
+    capacity_gb: Optional[float] = None
+    memory_type: str = ""
+    speed_mhz: Optional[int] = None
+
+    def get_description(self):
+        return f"{show(self.capacity_gb)} GB \n {show(self.memory_type)} \n {show(self.speed_mhz)} MHz"
+
+
+@dataclass
+class PSU(Component):
+    kind: ClassVar[str] = "psu"
+    spec_fields: ClassVar[tuple] = ("watts",)
+
+    firmware: str = ""
+    watts: Optional[int] = None
+
+    def get_description(self):
+        return (
+            f"FirmwareVersion: {show(self.firmware)} \n Model: {show(self.model)} \n "
+            f"Capacity: {show(self.watts)} Watts"
+        )
+
+
+@dataclass
+class CPU(Component):
+    kind: ClassVar[str] = "cpu"
+    spec_fields: ClassVar[tuple] = ("cores", "threads", "speed_mhz")
+
+    cores: Optional[int] = None
+    threads: Optional[int] = None
+    speed_mhz: Optional[int] = None
+
+    def get_description(self):
+        return (
+            f"Model: {show(self.model)} \n Total Cores: {show(self.cores)} \n "
+            f"Total Threads: {show(self.threads)} \n MaxSpeed: {show(self.speed_mhz)}"
+        )
+
+
+@dataclass
+class RaidController(Component):
+    kind: ClassVar[str] = "raid_controller"
+
+    firmware: str = ""
+
+    def get_description(self):
+        return f"Model: {show(self.model)} \n FirmwareVersion: {show(self.firmware)}"
+
+
+@dataclass
+class RaidVolume(Component):
+    kind: ClassVar[str] = "raid_volume"
+    spec_fields: ClassVar[tuple] = ("capacity_gb", "raid_level")
+
+    capacity_gb: Optional[float] = None
+    raid_level: str = ""
+
+    def get_description(self):
+        return f"Size: {show(self.capacity_gb)} GB \n Type: {show(self.raid_level)} \n Status: {show(self.status)}"
+
+
+@dataclass
+class Disk(Component):
+    kind: ClassVar[str] = "disk"
+    spec_fields: ClassVar[tuple] = ("capacity_gb", "media_type", "protocol")
+
+    capacity_gb: Optional[float] = None
+    media_type: str = ""
+    protocol: str = ""
+
+    def get_description(self):
+        return f"Model: {show(self.model)} \n Protocol: {show(self.protocol)} \n Capacity: {show(self.capacity_gb)} GB"
+
+
+@dataclass
+class Inventory:
+    """
+    Нормализованный инвентарь сервера
+
+    complete=False, если какую-то секцию не удалось разобрать: тогда пропавшие
+    компоненты нельзя удалять, данные неполные.
+    """
+    serial: str = ""
+    components: list = field(default_factory=list)
+    complete: bool = True
+
+
+#
+# Разбор ответов провайдеров
+#
+
+def parse_fan(fan):
+    return Fan(
+        name=to_str(fan.get("Name")) or "Fan",
+        status=to_str(fan.get("Status")),
+        rpm=to_int(first(fan, "Speed (RPM)", "Speed")),
+    )
+
+
+def parse_dimm(module):
+    return DIMM(
+        name=f"RAM {module.get('DeviceLocator', 'Unknown')}",
+        manufacturer=to_str(module.get("Manufacturer")),
+        status=to_str(module.get("Status")),
+        capacity_gb=to_float(module.get("Capacity (GB)")),
+        memory_type=to_str(module.get("MemoryDeviceType")),
+        speed_mhz=to_int(module.get("OperatingSpeedMhz")),
+    )
+
+
+def parse_psu(psu, number):
+    return PSU(
+        name=f"{number}.PSU {psu.get('Name')}",
+        model=to_str(psu.get("Model")),
+        manufacturer=to_str(psu.get("Manufacturer")),
+        serial=to_str(psu.get("SerialNumber")),
+        status=to_str(psu.get("Status")),
+        firmware=to_str(psu.get("FirmwareVersion")),
+        watts=to_int(first(psu, "Capacity (W)", "Capacity")),
+    )
+
+
+def parse_cpu(cpu):
+    return CPU(
+        name=f"CPU {cpu.get('ID')}",
+        model=to_str(cpu.get("Model")),
+        manufacturer=to_str(cpu.get("Manufacturer")),
+        status=to_str(cpu.get("Status")),
+        cores=to_int(cpu.get("TotalCores")),
+        threads=to_int(cpu.get("TotalThreads")),
+        speed_mhz=to_int(cpu.get("MaxSpeed (MHz)")),
+    )
+
+
+def parse_raid_controller(controller):
+    firmware = controller.get("FirmwareVersion")
+    if isinstance(firmware, dict):
+        firmware = firmware.get("VersionString")
+    return RaidController(
+        name=f"RAID Controller {controller.get('Name')}",
+        model=to_str(controller.get("Model")),
+        serial=to_str(controller.get("SerialNumber")),
+        status=to_str(controller.get("Status")),
+        firmware=to_str(firmware),
+    )
+
+
+def parse_raid_volume(volume):
+    return RaidVolume(
+        name=f"RAID Volume {volume.get('Name')}",
+        status=to_str(volume.get("Status")),
+        capacity_gb=to_float(volume.get("Capacity")),
+        raid_level=to_str(volume.get("RAID")),
+    )
+
+
+def parse_disk(disk):
+    return Disk(
+        name=f"{disk.get('MediaType')} {disk.get('ID')}",
+        model=to_str(disk.get("Model")),
+        serial=to_str(disk.get("SerialNumber")),
+        status=to_str(disk.get("Status")),
+        capacity_gb=to_float(disk.get("Capacity")),
+        media_type=to_str(disk.get("MediaType")),
+        protocol=to_str(disk.get("Protocol")),
+    )
+
+
+def _dicts(items):
+    return [item for item in items or [] if isinstance(item, dict)]
+
+
+def normalize_inventory(data):
+    """
+    Приводит результат get_all_inventory() любого провайдера к Inventory
+
+    Ошибка в одной секции не мешает разобрать остальные, но помечает инвентарь неполным.
+    """
+    inventory = Inventory()
+    raid = data.get("RAID") or {}
+
+    sections = {
+        "FANS": lambda: [parse_fan(fan) for fan in _dicts(data.get("FANS"))],
+        "MEMORY": lambda: [parse_dimm(module) for module in _dicts((data.get("Memory") or {}).get("Modules"))],
+        "PSUs": lambda: [parse_psu(psu, number) for number, psu in enumerate(_dicts(data.get("PSUs")), start=1)],
+        "Processors": lambda: [parse_cpu(cpu) for cpu in _dicts(data.get("Processors"))],
+        "RAID Controllers": lambda: [
+            controller for controller in map(parse_raid_controller, _dicts(raid.get("Controllers")))
+            if "ahci" not in controller.name.lower() and "sata" not in controller.name.lower()
+        ],
+        "RAID Volumes": lambda: [parse_raid_volume(volume) for volume in _dicts(raid.get("Volumes"))],
+        "Storage": lambda: [parse_disk(disk) for disk in _dicts(data.get("Storage"))],
+    }
+    for section, parse in sections.items():
+        try:
+            inventory.components.extend(parse())
+        except Exception as e:
+            inventory.complete = False
+            print(f"❌ Ошибка в {section}: {e}")
+
+    try:
+        inventory.serial = to_str((data.get("System") or {}).get("SerialNumber"))
+    except Exception as e:
+        print(f"❌ Ошибка в System: {e}")
+
+    return inventory
+
+
+COMPONENT_TYPES = (CPU, DIMM, Disk, PSU, Fan, RaidController, RaidVolume)
+
+# Все типизированные поля, которые встречаются хотя бы у одного компонента
+SPEC_FIELDS = tuple(dict.fromkeys(
+    name for component in COMPONENT_TYPES for name in ("model", "status", *component.spec_fields)
+))
@@ -1,75 +1,41 @@
-import time
+DEFAULT_MAX_CONCURRENT_REQUESTS = 4
+DEFAULT_REQUESTS_PER_SECOND = 10
 
-import requests
 
+class RedfishLinksMixin:
+    """
+    Разбор ссылок Redfish (@odata.id, href) в пути API
+    Нужен атрибут base_url (https://<ip>).
+    """
 
-class BaseProvider:
-
-    def __init__(self, ip_address: str, username: str, password: str):
-        self.ip_address = ip_address
-        self.username = username
-        self.password = password
-        self.base_url = f"https://{ip_address}"
-        self.session = requests.Session()
-        self.session.auth = (username, password)
-        self.session.verify = False
-
-    def _get(self, path, retry=2, delay=0.3):
+    def _get_first_href(self, value):
         """
-        Вспомогательный метод для GET запросов
-        Работает и с /redfish/v1 и с /rest/v1
-
-        Args:
-            path: путь API (например, "/redfish/v1/Systems/1")
-            retry: количество повторных попыток
-            delay: задержка между запросами
-
-        Returns:
-            dict: JSON ответ от сервера или None при ошибке
+        Извлекает ссылку из разных форматов
+        Может быть строка, dict с @odata.id, или список
         """
-        url = f"{self.base_url}{path}"
-
-        for attempt in range(retry):
-            try:
-                if attempt > 0:
-                    time.sleep(delay * (attempt + 1))
-
-                response = self.session.get(url, timeout=30)
-
-                # 404 - ресурс не найден, это нормально
-                if response.status_code == 404:
-                    return None
-
-                response.raise_for_status()
-                time.sleep(delay)  # Задержка чтобы не перегружать iLO
-
-                return response.json() if response.content else None
-
-            except requests.exceptions.ConnectionError as e:
-                if attempt < retry - 1:
-                    print(f"   ⚠️ Attempt {attempt + 1}/{retry}, reconnecting...")
-                    self._recreate_session()
-                else:
-                    # После всех попыток выбрасываем исключение, чтобы задача могла его обработать
-                    raise requests.exceptions.ConnectionError(
-                        f"Failed to connect to {self.ip_address} after {retry} attempts: {str(e)}"
-                    ) from e
-            except Exception:
-                if attempt < retry - 1:
-                    continue
-                return None
-
+        if not value:
+            return None
+        if isinstance(value, str):
+            return value.strip() or None
+        if isinstance(value, dict):
+            return value.get("@odata.id") or value.get("href")
+        if isinstance(value, list) and value:
+            for item in value:
+                if isinstance(item, dict):
+                    href = item.get("@odata.id") or item.get("href")
+                    if href:
+                        return href
         return None
 
-    def _recreate_session(self):
-        """Пересоздает сессию при проблемах"""
-        try:
-            self.session.close()
-        except:
-            pass
-        self.session = requests.Session()
-        self.session.auth = (self.username, self.password)
-        self.session.verify = False
-
-    def get_all_inventory(self, *args, **kwargs) -> dict:
-        raise NotImplemented
+    def _extract_path(self, url_or_path):
+        """Извлекает путь из полного URL"""
+        if not url_or_path:
+            return None
+        if isinstance(url_or_path, str):
+            if url_or_path.startswith(self.base_url):
+                return url_or_path[len(self.base_url):]
+            if url_or_path.startswith("http"):
+                # Полный URL от другого хоста - берем только путь
+                return "/" + "/".join(url_or_path.split("/")[3:])
+            return url_or_path
+        return None
@@ -1,7 +1,7 @@
 import time
 import logging
 import urllib3
-from vendors.base.vendor import BaseProvider
+from vendors.base.aio import AsyncBaseProvider
 
 # Отключаем предупреждения о небезопасном SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -9,49 +9,22 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logger = logging.getLogger(__name__)
 
 
-class DellProvider(BaseProvider):
+class DellProvider(AsyncBaseProvider):
     """
     Класс для работы с Dell сервером через Redfish API
     Поддерживает iDRAC 7, 8, 9 и новее
     """
+
+    # Поля для $select при поштучном чтении процессоров и памяти
+    PROCESSOR_FIELDS = ("Id", "Model", "Manufacturer", "TotalCores", "TotalThreads", "MaxSpeedMHz", "Status")
+    MEMORY_FIELDS = ("Id", "DeviceLocator", "SocketLocator", "CapacityMiB", "MemoryDeviceType",
+                     "OperatingSpeedMhz", "Manufacturer", "Status")
     
-    def _get_first_href(self, value):
-        """
-        Извлекает ссылку из разных форматов
-        Может быть строка, dict с @odata.id, или список
-        """
-        if not value:
-            return None
-        if isinstance(value, str):
-            return value.strip() or None
-        if isinstance(value, dict):
-            return value.get("@odata.id")
-        if isinstance(value, list) and value:
-            for item in value:
-                if isinstance(item, dict):
-                    href = item.get("@odata.id")
-                    if href:
-                        return href
-        return None
-    
-    def _extract_path(self, url_or_path):
-        """Извлекает путь из полного URL"""
-        if not url_or_path:
-            return None
-        if isinstance(url_or_path, str):
-            if url_or_path.startswith(self.base_url):
-                return url_or_path[len(self.base_url):]
-            if url_or_path.startswith("http"):
-                # Полный URL от другого хоста - берем только путь
-                return "/" + "/".join(url_or_path.split("/")[3:])
-            return url_or_path
-        return None
-    
-    def _find_system_id(self):
+    async def _find_system_id(self):
         """
         Находит ID системы (обычно System.Embedded.1)
         """
-        systems_data = self._get("/redfish/v1/Systems")
+        systems_data = await self._get_cached("/redfish/v1/Systems")
         if not systems_data:
             return "System.Embedded.1"  # Значение по умолчанию для Dell
         
@@ -64,7 +37,11 @@ class DellProvider(BaseProvider):
         
         return "System.Embedded.1"
     
-    def get_system_info(self):
+    async def get_system_resource(self):
+        system_id = await self._find_system_id()
+        return await self._get_cached(f"/redfish/v1/Systems/{system_id}")
+    
+    async def get_system_info(self):
         """
         Получение основной информации о системе
         
@@ -73,8 +50,7 @@ class DellProvider(BaseProvider):
         """
         logger.info(f"📊 Получение информации о системе host {self.ip_address}")
         
-        system_id = self._find_system_id()
-        data = self._get(f"/redfish/v1/Systems/{system_id}")
+        data = await self.get_system_resource()
         if not data:
             return {}
         
@@ -90,7 +66,7 @@ class DellProvider(BaseProvider):
         
         return system_info
     
-    def get_processor_info(self):
+    async def get_processor_info(self):
         """
         Получение информации о процессорах
         
@@ -100,33 +76,16 @@ class DellProvider(BaseProvider):
         logger.info(f"🖥️  Получение информации о процессорах... host {self.ip_address}")
         
         processors = []
-        system_id = self._find_system_id()
+        system_id = await self._find_system_id()
         
-        data = self._get(f"/redfish/v1/Systems/{system_id}/Processors")
+        data = await self._get_expanded(f"/redfish/v1/Systems/{system_id}/Processors")
         
         if not data:
             logger.warning(f"⚠️  Не удалось получить информацию о процессорах host {self.ip_address}")
             return processors
         
-        # Получаем список процессоров
-        members = data.get("Members", [])
-        
-        for member in members:
-            # Получаем ссылку на процессор
-            href = self._get_first_href(member)
-            if not href:
-                continue
-            
-            # Извлекаем путь
-            path = self._extract_path(href)
-            if not path:
-                continue
-            
-            # Получаем данные процессора
-            proc_data = self._get(path)
-            if not proc_data:
-                continue
-            
+        # Получаем данные всех процессоров параллельно
+        for proc_data in await self._fetch_members(data.get("Members", []), select=self.PROCESSOR_FIELDS):
             # Проверяем что процессор установлен
             state = proc_data.get("Status", {}).get("State", "")
             if state and state not in ["Enabled", "Present", "OK"]:
@@ -146,7 +105,7 @@ class DellProvider(BaseProvider):
         print(f"   ✅ Найдено процессоров: {len(processors)} host {self.ip_address}")
         return processors
     
-    def get_memory_info(self):
+    async def get_memory_info(self):
         """
         Получение информации о памяти
         
@@ -157,29 +116,15 @@ class DellProvider(BaseProvider):
         
         memory_modules = []
         total_memory_gb = 0
-        system_id = self._find_system_id()
+        system_id = await self._find_system_id()
         
-        data = self._get(f"/redfish/v1/Systems/{system_id}/Memory")
+        data = await self._get_expanded(f"/redfish/v1/Systems/{system_id}/Memory")
         
         if not data:
             print(f"   ⚠️  Не удалось получить информацию о памяти host {self.ip_address}")
             return {"Всего памяти (GB)": 0, "Модули": []}
         
-        members = data.get("Members", [])
-        
-        for member in members:
-            href = self._get_first_href(member)
-            if not href:
-                continue
-            
-            path = self._extract_path(href)
-            if not path:
-                continue
-            
-            mem_data = self._get(path)
-            if not mem_data:
-                continue
-            
+        for mem_data in await self._fetch_members(data.get("Members", []), select=self.MEMORY_FIELDS):
             # Проверяем что модуль установлен
             state = mem_data.get("Status", {}).get("State", "")
             if state and state not in ["Enabled", "Present", "OK"]:
@@ -211,7 +156,7 @@ class DellProvider(BaseProvider):
             "Modules": memory_modules
         }
     
-    def get_storage_info(self):
+    async def get_storage_info(self):
         """
         Получение информации о дисках
         
@@ -221,25 +166,16 @@ class DellProvider(BaseProvider):
         print(f"\n💿 Получение информации о хранилище host {self.ip_address}")
         
         drives = []
-        system_id = self._find_system_id()
+        system_id = await self._find_system_id()
         
-        # Получаем Storage контроллеры
-        data = self._get(f"/redfish/v1/Systems/{system_id}/Storage")
+        # Получаем Storage контроллеры (общие с get_raid_info, поэтому кешируются)
+        data = await self._get_expanded(f"/redfish/v1/Systems/{system_id}/Storage", levels=2, cached=True)
         
         if not data or not data.get("Members"):
             print(f"   ⚠️  Не удалось получить информацию о хранилище host {self.ip_address}")
             return drives
         
-        for storage_member in data.get("Members", []):
-            storage_href = self._get_first_href(storage_member)
-            if not storage_href:
-                continue
-            
-            storage_path = self._extract_path(storage_href)
-            storage = self._get(storage_path)
-            if not storage:
-                continue
-            
+        for storage in await self._fetch_members(data.get("Members", []), cached=True):
             controller_name = storage.get("Id", "Unknown Controller")
             
             # Получаем диски
@@ -248,18 +184,10 @@ class DellProvider(BaseProvider):
             if total_drives > 0:
                 print(f"   📀 Контроллер: {controller_name}, дисков: {total_drives} host {self.ip_address}")
             
-            for idx, drive_ref in enumerate(drives_list, 1):
-                drive_href = self._get_first_href(drive_ref)
-                if not drive_href:
-                    continue
-                
-                drive_path = self._extract_path(drive_href)
-                drive_data = self._get(drive_path)
-                
-                if drive_data:
-                    drive = self._normalize_drive(drive_data, controller_name)
-                    if drive:
-                        drives.append(drive)
+            for drive_data in await self._fetch_members(drives_list):
+                drive = self._normalize_drive(drive_data, controller_name)
+                if drive:
+                    drives.append(drive)
         
         print(f"   ✅ Найдено дисков: {len(drives)} host {self.ip_address}")
         return drives
@@ -291,7 +219,7 @@ class DellProvider(BaseProvider):
             "Status": drive_data.get("Status", {}).get("Health", "N/A"),
         }
     
-    def get_raid_info(self):
+    async def get_raid_info(self):
         """
         Получение информации о RAID контроллерах и массивах
         
@@ -302,26 +230,16 @@ class DellProvider(BaseProvider):
         
         controllers = []
         volumes = []
-        system_id = self._find_system_id()
+        system_id = await self._find_system_id()
         
         # Получаем Storage контроллеры
-        storage_data = self._get(f"/redfish/v1/Systems/{system_id}/Storage")
+        storage_data = await self._get_expanded(f"/redfish/v1/Systems/{system_id}/Storage", levels=2, cached=True)
         
         if not storage_data:
             print("   ⚠️  RAID информация недоступна")
             return {"Контроллеры": controllers, "Тома": volumes}
         
-        for storage_member in storage_data.get("Members", []):
-            storage_href = self._get_first_href(storage_member)
-            if not storage_href:
-                continue
-            
-            storage_path = self._extract_path(storage_href)
-            storage = self._get(storage_path)
-            
-            if not storage:
-                continue
-            
+        for storage in await self._fetch_members(storage_data.get("Members", []), cached=True):
             # Информация о контроллере
             storage_controllers = storage.get("StorageControllers", [])
             if storage_controllers:
@@ -347,45 +265,37 @@ class DellProvider(BaseProvider):
                 continue
             
             volumes_path = self._extract_path(volumes_href)
-            volumes_data = self._get(volumes_path)
+            volumes_data = await self._get_expanded(volumes_path)
             
             if not volumes_data:
                 continue
             
             # Для каждого тома
-            for vol_member in volumes_data.get("Members", []):
-                vol_href = self._get_first_href(vol_member)
-                if not vol_href:
-                    continue
+            for vol_data in await self._fetch_members(volumes_data.get("Members", [])):
+                # Размер
+                capacity_bytes = vol_data.get("CapacityBytes")
+                capacity_gb = capacity_bytes / (1024**3) if capacity_bytes else 0
                 
-                vol_path = self._extract_path(vol_href)
-                vol_data = self._get(vol_path)
+                # RAID уровень - убираем "RAID" префикс если есть
+                raid_type = vol_data.get("RAIDType") or vol_data.get("VolumeType", "N/A")
+                if raid_type.startswith("RAID"):
+                    raid_type = raid_type.replace("RAID", "").strip()
                 
-                if vol_data:
-                    # Размер
-                    capacity_bytes = vol_data.get("CapacityBytes")
-                    capacity_gb = capacity_bytes / (1024**3) if capacity_bytes else 0
-                    
-                    # RAID уровень - убираем "RAID" префикс если есть
-                    raid_type = vol_data.get("RAIDType") or vol_data.get("VolumeType", "N/A")
-                    if raid_type.startswith("RAID"):
-                        raid_type = raid_type.replace("RAID", "").strip()
-                    
-                    volume = {
-                        "ID": vol_data.get("Id", "N/A"),
-                        "Name": vol_data.get("Name", "N/A"),
-                        "RAID": raid_type,
-                        "Capacity": round(capacity_gb, 2),
-                        "Controller": storage.get("Id", "N/A"),
-                        "Status": vol_data.get("Status", {}).get("Health", "N/A"),
-                    }
-                    volumes.append(volume)
+                volume = {
+                    "ID": vol_data.get("Id", "N/A"),
+                    "Name": vol_data.get("Name", "N/A"),
+                    "RAID": raid_type,
+                    "Capacity": round(capacity_gb, 2),
+                    "Controller": storage.get("Id", "N/A"),
+                    "Status": vol_data.get("Status", {}).get("Health", "N/A"),
+                }
+                volumes.append(volume)
         
         print(f"   ✅ Контроллеров: {len(controllers)}, RAID массивов: {len(volumes)} host {self.ip_address}")
         
         return {"Controllers": controllers, "Volumes": volumes}
     
-    def get_power_supplies(self):
+    async def get_power_supplies(self):
         """
         Получение информации о блоках питания
         
@@ -397,7 +307,7 @@ class DellProvider(BaseProvider):
         power_supplies = []
         
         # Получаем данные о питании из Chassis
-        power_data = self._get("/redfish/v1/Chassis/System.Embedded.1/Power")
+        power_data = await self._get("/redfish/v1/Chassis/System.Embedded.1/Power")
         
         if not power_data:
             print(f"   ⚠️  Информация о блоках питания недоступна {self.ip_address}")
@@ -429,7 +339,7 @@ class DellProvider(BaseProvider):
         
         return power_supplies
     
-    def get_fans(self):
+    async def get_fans(self):
         """
         Получение информации о вентиляторах
         
@@ -441,7 +351,7 @@ class DellProvider(BaseProvider):
         fans = []
         
         # Получаем термальные данные из Chassis
-        thermal_data = self._get("/redfish/v1/Chassis/System.Embedded.1/Thermal")
+        thermal_data = await self._get("/redfish/v1/Chassis/System.Embedded.1/Thermal")
         
         if not thermal_data:
             print(f"   ⚠️  Информация о вентиляторах недоступна host {self.ip_address}")
@@ -469,7 +379,7 @@ class DellProvider(BaseProvider):
         
         return fans
     
-    def get_all_inventory(self):
+    async def get_all_inventory(self):
         """
         Собирает всю информацию о сервере
         
@@ -478,15 +388,20 @@ class DellProvider(BaseProvider):
         """
         print(f"\n🔍 Сбор информации о сервере Dell host {self.ip_address}...")
         
+        # Секции собираются параллельно, нагрузку на BMC ограничивает self.limiter
+        sections = await self._collect_sections({
+            "System": self.get_system_info,
+            "Processors": self.get_processor_info,
+            "Memory": self.get_memory_info,
+            "RAID": self.get_raid_info,
+            "Storage": self.get_storage_info,
+            "PSUs": self.get_power_supplies,
+            "FANS": self.get_fans,
+        })
+        
         inventory = {
             "ip_address": self.ip_address,
-            "System": self.get_system_info(),
-            "Processors": self.get_processor_info(),
-            "Memory": self.get_memory_info(),
-            "RAID": self.get_raid_info(),
-            "Storage": self.get_storage_info(),
-            "PSUs": self.get_power_supplies(),
-            "FANS": self.get_fans(),
+            **sections,
         }
         
         return inventory
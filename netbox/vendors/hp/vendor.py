@@ -3,54 +3,22 @@ import json
 import os
 import time
 
-from vendors.base.vendor import BaseProvider
+from vendors.base.aio import AsyncBaseProvider
 
 
-class HPProvider(BaseProvider):
+class HPProvider(AsyncBaseProvider):
     """
     Класс для работы с HP сервером через Redfish API
     Поддерживает и Gen9 (через REST v1) и Gen10+ (через Redfish v1)
     """
-    #
-    # def __init__(self, ip_address, username, password):
-    #     super().__init__(ip_address, username, password)
 
-    def _get_first_href(self, value):
-        """
-        Извлекает ссылку из разных форматов
-        Может быть строка, dict с @odata.id, или список
-        """
-        if not value:
-            return None
-        if isinstance(value, str):
-            return value.strip() or None
-        if isinstance(value, dict):
-            return value.get("@odata.id") or value.get("href")
-        if isinstance(value, list) and value:
-            for item in value:
-                if isinstance(item, dict):
-                    href = item.get("@odata.id") or item.get("href")
-                    if href:
-                        return href
-        return None
-
-    def _extract_path(self, url_or_path):
-        """Извлекает путь из полного URL"""
-        if not url_or_path:
-            return None
-        if isinstance(url_or_path, str):
-            if url_or_path.startswith(self.base_url):
-                return url_or_path[len(self.base_url):]
-            if url_or_path.startswith("http"):
-                # Полный URL от другого хоста - берем только путь
-                return "/" + "/".join(url_or_path.split("/")[3:])
-            return url_or_path
-        return None
-
-    def get_system_info(self):
+    async def get_system_resource(self):
+        return await self._get_cached("/redfish/v1/Systems/1")
+
+    async def get_system_info(self):
         print("\n📊 Получение информации о системе...")
 
-        data = self._get("/redfish/v1/Systems/1")
+        data = await self.get_system_resource()
         if not data:
             return {}
 
@@ -66,7 +34,7 @@ class HPProvider(BaseProvider):
 
         return system_info
 
-    def get_processor_info(self):
+    async def get_processor_info(self):
         """
         Получение информации о процессорах
         Пробует разные пути API для разных поколений HP серверов
@@ -87,7 +55,7 @@ class HPProvider(BaseProvider):
 
         data = None
         for path in paths_to_try:
-            data = self._get(path)
+            data = await self._get_expanded(path)
             if data and data.get("Members"):
                 print(f"   ℹ️  Используем путь: {path}")
                 break
@@ -96,25 +64,8 @@ class HPProvider(BaseProvider):
             print("   ⚠️  Не удалось получить информацию о процессорах")
             return processors
 
-        # Получаем список процессоров
-        members = data.get("Members", [])
-
-        for member in members:
-            # Получаем ссылку на процессор
-            href = self._get_first_href(member)
-            if not href:
-                continue
-
-            # Извлекаем путь
-            path = self._extract_path(href)
-            if not path:
-                continue
-
-            # Получаем данные процессора
-            proc_data = self._get(path)
-            if not proc_data:
-                continue
-
+        # Получаем данные всех процессоров параллельно
+        for proc_data in await self._fetch_members(data.get("Members", [])):
             # Проверяем что процессор установлен (может быть Enabled, Present, или другое)
             state = proc_data.get("Status", {}).get("State", "")
             # Для Gen9 может не быть поля State или оно может быть другим
@@ -135,7 +86,7 @@ class HPProvider(BaseProvider):
         print(f"   ✅ Найдено процессоров: {len(processors)}")
         return processors
 
-    def get_memory_info(self):
+    async def get_memory_info(self):
         """
         Получение информации о памяти
         Пробует разные пути API для разных поколений HP серверов
@@ -157,7 +108,7 @@ class HPProvider(BaseProvider):
 
         data = None
         for path in paths_to_try:
-            data = self._get(path)
+            data = await self._get_expanded(path)
             if data and data.get("Members"):
                 print(f"   ℹ️  Используем путь: {path}")
                 break
@@ -166,21 +117,7 @@ class HPProvider(BaseProvider):
             print("   ⚠️  Не удалось получить информацию о памяти")
             return {"Total_memory (GB)": 0, "Modules": []}
 
-        members = data.get("Members", [])
-
-        for member in members:
-            href = self._get_first_href(member)
-            if not href:
-                continue
-
-            path = self._extract_path(href)
-            if not path:
-                continue
-
-            mem_data = self._get(path)
-            if not mem_data:
-                continue
-
+        for mem_data in await self._fetch_members(data.get("Members", [])):
             # Проверяем что модуль установлен
             # Для Gen9 может не быть поля State или оно может быть другим
             state = mem_data.get("Status", {}).get("State", "")
@@ -215,7 +152,7 @@ class HPProvider(BaseProvider):
             "Modules": memory_modules
         }
 
-    def get_storage_info(self):
+    async def get_storage_info(self):
         """
         Получение информации о дисках
         Для Gen9 использует SmartStorage API
@@ -228,54 +165,37 @@ class HPProvider(BaseProvider):
         drives = []
 
         # Попытка 1: Стандартный Redfish Storage (Gen10+)
-        data = self._get("/redfish/v1/Systems/1/Storage")
+        data = await self._get_expanded("/redfish/v1/Systems/1/Storage", levels=2)
 
         if data and data.get("Members"):
             print("   ℹ️  Используем стандартный Redfish Storage API")
-            drives = self._get_storage_redfish(data)
+            drives = await self._get_storage_redfish(data)
         else:
             # Попытка 2: SmartStorage для Gen9
             print("   ℹ️  Используем SmartStorage API (HP Gen9)")
-            drives = self._get_storage_smartstorage()
+            drives = await self._get_storage_smartstorage()
 
         print(f"   ✅ Найдено дисков: {len(drives)}")
         return drives
 
-    def _get_storage_redfish(self, storage_data):
+    async def _get_storage_redfish(self, storage_data):
         """Получение дисков через стандартный Redfish Storage"""
         drives = []
 
-        for storage_member in storage_data.get("Members", []):
-            storage_href = self._get_first_href(storage_member)
-            if not storage_href:
-                continue
-
-            storage_path = self._extract_path(storage_href)
-            storage = self._get(storage_path)
-            if not storage:
-                continue
-
+        for storage in await self._fetch_members(storage_data.get("Members", [])):
             controller_name = storage.get("Id", "Unknown Controller")
 
             # Получаем диски
             drives_list = storage.get("Drives", [])
-            for drive_ref in drives_list:
-                drive_href = self._get_first_href(drive_ref)
-                if not drive_href:
-                    continue
-
-                drive_path = self._extract_path(drive_href)
-                drive_data = self._get(drive_path)
-
-                if drive_data:
-                    drive = self._normalize_drive(drive_data)
-                    if drive:
-                        drive["Controller"] = controller_name
-                        drives.append(drive)
+            for drive_data in await self._fetch_members(drives_list):
+                drive = self._normalize_drive(drive_data)
+                if drive:
+                    drive["Controller"] = controller_name
+                    drives.append(drive)
 
         return drives
 
-    def _get_storage_smartstorage(self):
+    async def _get_storage_smartstorage(self):
         """
         Получение дисков через HP SmartStorage API (Gen9)
         Это упрощенная версия из provider.py для понимания junior'ом
@@ -283,7 +203,7 @@ class HPProvider(BaseProvider):
         drives = []
 
         # Шаг 1: Получаем SmartStorage корень
-        smartstorage = self._get("/redfish/v1/Systems/1/SmartStorage")
+        smartstorage = await self._get_cached("/redfish/v1/Systems/1/SmartStorage")
         if not smartstorage:
             print("   ⚠️  SmartStorage API недоступен")
             return drives
@@ -299,24 +219,14 @@ class HPProvider(BaseProvider):
         # Шаг 3: Получаем список контроллеров
         ac_href = self._get_first_href(array_controllers_ref)
         ac_path = self._extract_path(ac_href)
-        controllers_data = self._get(ac_path)
+        controllers_data = await self._get_expanded(ac_path, cached=True)
 
         if not controllers_data:
             print("   ⚠️  Не удалось получить контроллеры")
             return drives
 
         # Шаг 4: Для каждого контроллера получаем физические диски
-        for controller_member in controllers_data.get("Members", []):
-            controller_href = self._get_first_href(controller_member)
-            if not controller_href:
-                continue
-
-            controller_path = self._extract_path(controller_href)
-            controller = self._get(controller_path)
-
-            if not controller:
-                continue
-
+        for controller in await self._fetch_members(controllers_data.get("Members", []), cached=True):
             ctrl_id = controller.get("Id", "Unknown")
 
             # Получаем ссылку на физические диски
@@ -331,28 +241,20 @@ class HPProvider(BaseProvider):
 
             # Важно для Gen9! Пробуем с параметром ?page=1&count=ALL
             # Это заставляет iLO вернуть все диски сразу
-            drives_collection = self._get(f"{pd_path}?page=1&count=ALL")
+            drives_collection = await self._get_expanded(f"{pd_path}?page=1&count=ALL")
 
             # Если не получилось, пробуем без параметров
             if not drives_collection:
-                drives_collection = self._get(pd_path)
+                drives_collection = await self._get(pd_path)
 
             if not drives_collection:
                 continue
 
             # Получаем каждый диск
-            for drive_member in drives_collection.get("Members", []):
-                drive_href = self._get_first_href(drive_member)
-                if not drive_href:
-                    continue
-
-                drive_path = self._extract_path(drive_href)
-                drive_data = self._get(drive_path)
-
-                if drive_data:
-                    drive = self._normalize_drive_gen9(drive_data, ctrl_id)
-                    if drive:
-                        drives.append(drive)
+            for drive_data in await self._fetch_members(drives_collection.get("Members", [])):
+                drive = self._normalize_drive_gen9(drive_data, ctrl_id)
+                if drive:
+                    drives.append(drive)
 
         return drives
 
@@ -412,7 +314,7 @@ class HPProvider(BaseProvider):
             "Status": drive_data.get("Status", {}).get("Health", "N/A"),
         }
 
-    def get_raid_info(self):
+    async def get_raid_info(self):
         """
         Получение информации о RAID контроллерах и массивах
         Для Gen9 использует SmartStorage API
@@ -426,7 +328,7 @@ class HPProvider(BaseProvider):
         volumes = []
 
         # Для Gen9 используем SmartStorage
-        smartstorage = self._get("/redfish/v1/Systems/1/SmartStorage")
+        smartstorage = await self._get_cached("/redfish/v1/Systems/1/SmartStorage")
         if not smartstorage:
             print("   ⚠️  RAID информация недоступна")
             return {"Controllers": controllers, "Тома": volumes}
@@ -440,23 +342,13 @@ class HPProvider(BaseProvider):
 
         ac_href = self._get_first_href(array_controllers_ref)
         ac_path = self._extract_path(ac_href)
-        controllers_data = self._get(ac_path)
+        controllers_data = await self._get_expanded(ac_path, cached=True)
 
         if not controllers_data:
             return {"Controllers": controllers, "Тома": volumes}
 
         # Для каждого контроллера
-        for controller_member in controllers_data.get("Members", []):
-            controller_href = self._get_first_href(controller_member)
-            if not controller_href:
-                continue
-
-            controller_path = self._extract_path(controller_href)
-            controller = self._get(controller_path)
-
-            if not controller:
-                continue
-
+        for controller in await self._fetch_members(controllers_data.get("Members", []), cached=True):
             # Информация о контроллере
             ctrl_info = {
                 "ID": controller.get("Id", "N/A"),
@@ -479,45 +371,37 @@ class HPProvider(BaseProvider):
             ld_path = self._extract_path(ld_href)
 
             # Пробуем с параметром count=ALL для Gen9
-            logical_drives_data = self._get(f"{ld_path}?page=1&count=ALL")
+            logical_drives_data = await self._get_expanded(f"{ld_path}?page=1&count=ALL")
             if not logical_drives_data:
-                logical_drives_data = self._get(ld_path)
+                logical_drives_data = await self._get(ld_path)
 
             if not logical_drives_data:
                 continue
 
             # Для каждого логического диска
-            for ld_member in logical_drives_data.get("Members", []):
-                ld_href = self._get_first_href(ld_member)
-                if not ld_href:
-                    continue
-
-                ld_path = self._extract_path(ld_href)
-                ld_data = self._get(ld_path)
-
-                if ld_data:
-                    # Размер
-                    capacity_mib = ld_data.get("CapacityMiB")
-                    capacity_gb = capacity_mib / 1024 if capacity_mib else 0
-
-                    # RAID уровень
-                    raid_type = ld_data.get("Raid") or ld_data.get("RaidType", "N/A")
-
-                    volume = {
-                        "ID": ld_data.get("Id") or ld_data.get("LogicalDriveNumber", "N/A"),
-                        "Name": ld_data.get("LogicalDriveName") or ld_data.get("Name", "N/A"),
-                        "RAID": raid_type,
-                        "Capacity": round(capacity_gb, 2),
-                        "Controller": ctrl_info["ID"],
-                        "Status": ld_data.get("Status", {}).get("Health", "N/A"),
-                    }
-                    volumes.append(volume)
+            for ld_data in await self._fetch_members(logical_drives_data.get("Members", [])):
+                # Размер
+                capacity_mib = ld_data.get("CapacityMiB")
+                capacity_gb = capacity_mib / 1024 if capacity_mib else 0
+
+                # RAID уровень
+                raid_type = ld_data.get("Raid") or ld_data.get("RaidType", "N/A")
+
+                volume = {
+                    "ID": ld_data.get("Id") or ld_data.get("LogicalDriveNumber", "N/A"),
+                    "Name": ld_data.get("LogicalDriveName") or ld_data.get("Name", "N/A"),
+                    "RAID": raid_type,
+                    "Capacity": round(capacity_gb, 2),
+                    "Controller": ctrl_info["ID"],
+                    "Status": ld_data.get("Status", {}).get("Health", "N/A"),
+                }
+                volumes.append(volume)
 
         print(f"   ✅ Controllers: {len(controllers)}, RAID массивов: {len(volumes)}")
 
         return {"Controllers": controllers, "Тома": volumes}
 
-    def get_power_supplies(self):
+    async def get_power_supplies(self):
         """
         Получение информации о блоках питания
 
@@ -529,11 +413,11 @@ class HPProvider(BaseProvider):
         power_supplies = []
 
         # Получаем данные о питании из Chassis
-        power_data = self._get("/redfish/v1/Chassis/1/Power")
+        power_data = await self._get("/redfish/v1/Chassis/1/Power")
 
         # Если не работает через Redfish, пробуем REST API (Gen9)
         if not power_data:
-            power_data = self._get("/rest/v1/Chassis/1/Power")
+            power_data = await self._get("/rest/v1/Chassis/1/Power")
 
         if not power_data:
             print("   ⚠️  Информация о блоках питания недоступна")
@@ -565,7 +449,7 @@ class HPProvider(BaseProvider):
 
         return power_supplies
 
-    def get_fans(self):
+    async def get_fans(self):
         """
         Получение информации о вентиляторах
 
@@ -577,11 +461,11 @@ class HPProvider(BaseProvider):
         fans = []
 
         # Получаем термальные данные из Chassis
-        thermal_data = self._get("/redfish/v1/Chassis/1/Thermal")
+        thermal_data = await self._get("/redfish/v1/Chassis/1/Thermal")
 
         # Если не работает через Redfish, пробуем REST API (Gen9)
         if not thermal_data:
-            thermal_data = self._get("/rest/v1/Chassis/1/Thermal")
+            thermal_data = await self._get("/rest/v1/Chassis/1/Thermal")
 
         if not thermal_data:
             print("   ⚠️  Информация о вентиляторах недоступна")
@@ -611,7 +495,7 @@ class HPProvider(BaseProvider):
 
         return fans
 
-    def get_all_inventory(self):
+    async def get_all_inventory(self):
         """
         Собирает всю информацию о сервере
 
@@ -620,19 +504,20 @@ class HPProvider(BaseProvider):
         """
         print(f"\n🔍 Сбор информации о сервере {self.ip_address}...")
 
+        # Секции собираются параллельно, нагрузку на BMC ограничивает self.limiter
+        sections = await self._collect_sections({
+            "System": self.get_system_info,
+            "Processors": self.get_processor_info,
+            "Memory": self.get_memory_info,
+            "RAID": self.get_raid_info,
+            "Storage": self.get_storage_info,
+            "PSUs": self.get_power_supplies,
+            "FANS": self.get_fans,
+        })
+
         inventory = {
             "ip_address": self.ip_address,
-            "System": self.get_system_info(),
-            "Processors": self.get_processor_info(),
-            "Memory": self.get_memory_info(),
-            "RAID": self.get_raid_info(),
-            "Storage": self.get_storage_info(),
-            "PSUs": self.get_power_supplies(),
-            "FANS": self.get_fans(),
+            **sections,
         }
 
         return inventory
-
-    def close(self):
-        """Закрытие сессии"""
-        self.session.close()
@@ -1,7 +1,7 @@
 import time
 import logging
 import urllib3
-from vendors.base.vendor import BaseProvider
+from vendors.base.aio import AsyncBaseProvider
 
 # Отключаем предупреждения о небезопасном SSL
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
@@ -9,49 +9,22 @@ urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 logger = logging.getLogger(__name__)
 
 
-class HuaweiProvider(BaseProvider):
+class HuaweiProvider(AsyncBaseProvider):
     """
     Класс для работы с Huawei сервером через Redfish API
     Поддерживает FusionServer серии
     """
+
+    # Поля для $select при поштучном чтении процессоров и памяти
+    PROCESSOR_FIELDS = ("Id", "Model", "Manufacturer", "TotalCores", "TotalThreads", "MaxSpeedMHz", "Status")
+    MEMORY_FIELDS = ("Id", "DeviceLocator", "SocketLocator", "CapacityMiB", "MemoryDeviceType",
+                     "OperatingSpeedMhz", "Manufacturer", "Status")
     
-    def _get_first_href(self, value):
-        """
-        Извлекает ссылку из разных форматов
-        Может быть строка, dict с @odata.id, или список
-        """
-        if not value:
-            return None
-        if isinstance(value, str):
-            return value.strip() or None
-        if isinstance(value, dict):
-            return value.get("@odata.id")
-        if isinstance(value, list) and value:
-            for item in value:
-                if isinstance(item, dict):
-                    href = item.get("@odata.id")
-                    if href:
-                        return href
-        return None
-    
-    def _extract_path(self, url_or_path):
-        """Извлекает путь из полного URL"""
-        if not url_or_path:
-            return None
-        if isinstance(url_or_path, str):
-            if url_or_path.startswith(self.base_url):
-                return url_or_path[len(self.base_url):]
-            if url_or_path.startswith("http"):
-                # Полный URL от другого хоста - берем только путь
-                return "/" + "/".join(url_or_path.split("/")[3:])
-            return url_or_path
-        return None
-    
-    def _find_system_id(self):
+    async def _find_system_id(self):
         """
         Находит ID системы для Huawei серверов
         """
-        systems_data = self._get("/redfish/v1/Systems")
+        systems_data = await self._get_cached("/redfish/v1/Systems")
         if not systems_data:
             return "1"  # Значение по умолчанию для Huawei
         
@@ -64,7 +37,11 @@ class HuaweiProvider(BaseProvider):
         
         return "1"
     
-    def get_system_info(self):
+    async def get_system_resource(self):
+        system_id = await self._find_system_id()
+        return await self._get_cached(f"/redfish/v1/Systems/{system_id}")
+    
+    async def get_system_info(self):
         """
         Получение основной информации о системе
         
@@ -73,8 +50,7 @@ class HuaweiProvider(BaseProvider):
         """
         logger.info("📊 Получение информации о системе...")
         
-        system_id = self._find_system_id()
-        data = self._get(f"/redfish/v1/Systems/{system_id}")
+        data = await self.get_system_resource()
         if not data:
             return {}
         
@@ -90,7 +66,7 @@ class HuaweiProvider(BaseProvider):
         
         return system_info
     
-    def get_processor_info(self):
+    async def get_processor_info(self):
         """
         Получение информации о процессорах
         
@@ -100,33 +76,16 @@ class HuaweiProvider(BaseProvider):
         logger.info("🖥️  Получение информации о процессорах...")
         
         processors = []
-        system_id = self._find_system_id()
+        system_id = await self._find_system_id()
         
-        data = self._get(f"/redfish/v1/Systems/{system_id}/Processors")
+        data = await self._get_expanded(f"/redfish/v1/Systems/{system_id}/Processors")
         
         if not data:
             logger.warning("⚠️  Не удалось получить информацию о процессорах")
             return processors
         
-        # Получаем список процессоров
-        members = data.get("Members", [])
-        
-        for member in members:
-            # Получаем ссылку на процессор
-            href = self._get_first_href(member)
-            if not href:
-                continue
-            
-            # Извлекаем путь
-            path = self._extract_path(href)
-            if not path:
-                continue
-            
-            # Получаем данные процессора
-            proc_data = self._get(path)
-            if not proc_data:
-                continue
-            
+        # Получаем данные всех процессоров параллельно
+        for proc_data in await self._fetch_members(data.get("Members", []), select=self.PROCESSOR_FIELDS):
             # Проверяем что процессор установлен
             state = proc_data.get("Status", {}).get("State", "")
             if state and state not in ["Enabled", "Present", "OK"]:
@@ -146,7 +105,7 @@ class HuaweiProvider(BaseProvider):
         print(f"   ✅ Найдено процессоров: {len(processors)}")
         return processors
     
-    def get_memory_info(self):
+    async def get_memory_info(self):
         """
         Получение информации о памяти
         
@@ -157,29 +116,15 @@ class HuaweiProvider(BaseProvider):
         
         memory_modules = []
         total_memory_gb = 0
-        system_id = self._find_system_id()
+        system_id = await self._find_system_id()
         
-        data = self._get(f"/redfish/v1/Systems/{system_id}/Memory")
+        data = await self._get_expanded(f"/redfish/v1/Systems/{system_id}/Memory")
         
         if not data:
             print("   ⚠️  Не удалось получить информацию о памяти")
             return {"Всего памяти (GB)": 0, "Модули": []}
         
-        members = data.get("Members", [])
-        
-        for member in members:
-            href = self._get_first_href(member)
-            if not href:
-                continue
-            
-            path = self._extract_path(href)
-            if not path:
-                continue
-            
-            mem_data = self._get(path)
-            if not mem_data:
-                continue
-            
+        for mem_data in await self._fetch_members(data.get("Members", []), select=self.MEMORY_FIELDS):
             # Проверяем что модуль установлен
             state = mem_data.get("Status", {}).get("State", "")
             if state and state not in ["Enabled", "Present", "OK"]:
@@ -211,7 +156,7 @@ class HuaweiProvider(BaseProvider):
             "Modules": memory_modules
         }
     
-    def get_storage_info(self):
+    async def get_storage_info(self):
         """
         Получение информации о дисках
         Huawei использует путь /redfish/v1/Systems/{id}/Storages (с "s")
@@ -222,31 +167,31 @@ class HuaweiProvider(BaseProvider):
         print("\n💿 Получение информации о хранилище...")
         
         drives = []
-        system_id = self._find_system_id()
+        system_id = await self._find_system_id()
         
         # Метод 1: Huawei использует Storages (с "s") как ссылку из Systems
-        system_data = self._get(f"/redfish/v1/Systems/{system_id}")
+        system_data = await self._get_cached(f"/redfish/v1/Systems/{system_id}")
         if system_data and "Storage" in system_data:
             storage_ref = system_data["Storage"]
             if isinstance(storage_ref, dict) and "@odata.id" in storage_ref:
                 storages_path = self._extract_path(storage_ref["@odata.id"])
-                storages_data = self._get(storages_path)
+                storages_data = await self._get_expanded(storages_path, levels=2, cached=True)
                 
                 if storages_data and storages_data.get("Members"):
                     print("   ℹ️  Используем путь через Systems/Storages")
-                    drives = self._get_drives_from_huawei_storages(storages_data)
+                    drives = await self._get_drives_from_huawei_storages(storages_data)
         
         # Метод 2: Прямой путь к дискам через Chassis
         if not drives:
-            chassis_data = self._get("/redfish/v1/Chassis")
+            chassis_data = await self._get_cached("/redfish/v1/Chassis")
             if chassis_data and chassis_data.get("Members"):
                 chassis_href = self._get_first_href(chassis_data.get("Members", [])[0])
                 chassis_id = chassis_href.split("/")[-1] if chassis_href else "1"
                 
-                drives_collection = self._get(f"/redfish/v1/Chassis/{chassis_id}/Drives")
+                drives_collection = await self._get_expanded(f"/redfish/v1/Chassis/{chassis_id}/Drives")
                 if drives_collection and drives_collection.get("Members"):
                     print("   ℹ️  Используем путь Chassis/Drives")
-                    drives = self._get_drives_from_collection(drives_collection)
+                    drives = await self._get_drives_from_collection(drives_collection)
         
         if not drives:
             print("   ⚠️  Не удалось получить информацию о хранилище")
@@ -255,20 +200,11 @@ class HuaweiProvider(BaseProvider):
         
         return drives
     
-    def _get_drives_from_huawei_storages(self, storages_data):
+    async def _get_drives_from_huawei_storages(self, storages_data):
         """Получение дисков из Huawei Storages коллекции"""
         drives = []
         
-        for storage_member in storages_data.get("Members", []):
-            storage_href = self._get_first_href(storage_member)
-            if not storage_href:
-                continue
-            
-            storage_path = self._extract_path(storage_href)
-            storage = self._get(storage_path)
-            if not storage:
-                continue
-            
+        for storage in await self._fetch_members(storages_data.get("Members", []), cached=True):
             controller_name = storage.get("Id", "Unknown Controller")
             
             # В Huawei диски находятся в массиве Drives
@@ -277,42 +213,26 @@ class HuaweiProvider(BaseProvider):
             if total_drives > 0:
                 print(f"   📀 Контроллер: {controller_name}, дисков: {total_drives}")
             
-            for drive_ref in drives_list:
-                drive_href = self._get_first_href(drive_ref)
-                if not drive_href:
-                    continue
-                
-                drive_path = self._extract_path(drive_href)
-                drive_data = self._get(drive_path)
-                
-                if drive_data:
-                    drive = self._normalize_drive(drive_data, controller_name)
-                    if drive:
-                        drives.append(drive)
+            for drive_data in await self._fetch_members(drives_list):
+                drive = self._normalize_drive(drive_data, controller_name)
+                if drive:
+                    drives.append(drive)
         
         return drives
     
     
-    def _get_drives_from_collection(self, drives_collection):
+    async def _get_drives_from_collection(self, drives_collection):
         """Получение дисков из прямой коллекции Drives"""
         drives = []
         
-        for drive_member in drives_collection.get("Members", []):
-            drive_href = self._get_first_href(drive_member)
-            if not drive_href:
-                continue
-            
-            drive_path = self._extract_path(drive_href)
-            drive_data = self._get(drive_path)
-            
-            if drive_data:
-                drive = self._normalize_drive(drive_data, "Unknown Controller")
-                if drive:
-                    drives.append(drive)
+        for drive_data in await self._fetch_members(drives_collection.get("Members", [])):
+            drive = self._normalize_drive(drive_data, "Unknown Controller")
+            if drive:
+                drives.append(drive)
         
         return drives
     
-    def _get_drives_from_huawei_oem(self, oem_data):
+    async def _get_drives_from_huawei_oem(self, oem_data):
         """Получение дисков из Huawei OEM данных"""
         drives = []
         print(f"   🔍 Huawei OEM структура: {list(oem_data.keys())}")
@@ -330,7 +250,7 @@ class HuaweiProvider(BaseProvider):
                                 drive_href = self._get_first_href(drive_ref)
                                 if drive_href:
                                     drive_path = self._extract_path(drive_href)
-                                    drive_data = self._get(drive_path)
+                                    drive_data = await self._get(drive_path)
                                     if drive_data:
                                         drive = self._normalize_drive(drive_data, "Unknown Controller")
                                         if drive:
@@ -400,7 +320,7 @@ class HuaweiProvider(BaseProvider):
             "Status": drive_data.get("Status", {}).get("Health", "N/A"),
         }
     
-    def get_raid_info(self):
+    async def get_raid_info(self):
         """
         Получение информации о RAID контроллерах и массивах
         Huawei использует путь /redfish/v1/Systems/{id}/Storages (с "s")
@@ -412,19 +332,19 @@ class HuaweiProvider(BaseProvider):
         
         controllers = []
         volumes = []
-        system_id = self._find_system_id()
+        system_id = await self._find_system_id()
         
         # Получаем Storages через ссылку из Systems
-        system_data = self._get(f"/redfish/v1/Systems/{system_id}")
+        system_data = await self._get_cached(f"/redfish/v1/Systems/{system_id}")
         if system_data and "Storage" in system_data:
             storage_ref = system_data["Storage"]
             if isinstance(storage_ref, dict) and "@odata.id" in storage_ref:
                 storages_path = self._extract_path(storage_ref["@odata.id"])
-                storages_data = self._get(storages_path)
+                storages_data = await self._get_expanded(storages_path, levels=2, cached=True)
                 
                 if storages_data and storages_data.get("Members"):
                     print("   ℹ️  Используем путь через Systems/Storages для RAID")
-                    result = self._get_raid_from_huawei_storages(storages_data)
+                    result = await self._get_raid_from_huawei_storages(storages_data)
                     controllers.extend(result["controllers"])
                     volumes.extend(result["volumes"])
         
@@ -435,22 +355,12 @@ class HuaweiProvider(BaseProvider):
         
         return {"Controllers": controllers, "Тома": volumes}
     
-    def _get_raid_from_huawei_storages(self, storages_data):
+    async def _get_raid_from_huawei_storages(self, storages_data):
         """Получение RAID информации из Huawei Storages коллекции"""
         controllers = []
         volumes = []
         
-        for storage_member in storages_data.get("Members", []):
-            storage_href = self._get_first_href(storage_member)
-            if not storage_href:
-                continue
-            
-            storage_path = self._extract_path(storage_href)
-            storage = self._get(storage_path)
-            
-            if not storage:
-                continue
-            
+        for storage in await self._fetch_members(storages_data.get("Members", []), cached=True):
             # Информация о контроллере
             storage_controllers = storage.get("StorageControllers", [])
             if storage_controllers:
@@ -470,91 +380,75 @@ class HuaweiProvider(BaseProvider):
             volumes_ref = storage.get("Volumes")
             if volumes_ref and isinstance(volumes_ref, dict) and "@odata.id" in volumes_ref:
                 volumes_path = self._extract_path(volumes_ref["@odata.id"])
-                volumes_data = self._get(volumes_path)
+                volumes_data = await self._get_expanded(volumes_path)
                 
                 if volumes_data and volumes_data.get("Members"):
                     # Для каждого тома
-                    for vol_member in volumes_data.get("Members", []):
-                        vol_href = self._get_first_href(vol_member)
-                        if not vol_href:
-                            continue
+                    for vol_data in await self._fetch_members(volumes_data.get("Members", [])):
+                        # Размер
+                        capacity_bytes = vol_data.get("CapacityBytes")
+                        capacity_mib = vol_data.get("CapacityMiB")
+                        
+                        if capacity_bytes:
+                            capacity_gb = capacity_bytes / (1024**3)
+                        elif capacity_mib:
+                            capacity_gb = capacity_mib / 1024
+                        else:
+                            capacity_gb = 0
                         
-                        vol_path = self._extract_path(vol_href)
-                        vol_data = self._get(vol_path)
+                        # RAID уровень из Huawei OEM
+                        huawei_oem = vol_data.get("Oem", {}).get("Huawei", {})
+                        raid_type = huawei_oem.get("VolumeRaidLevel", "N/A")
+                        if raid_type and raid_type.startswith("RAID"):
+                            raid_type = raid_type.replace("RAID", "").strip()
                         
-                        if vol_data:
-                            # Размер
-                            capacity_bytes = vol_data.get("CapacityBytes")
-                            capacity_mib = vol_data.get("CapacityMiB")
-                            
-                            if capacity_bytes:
-                                capacity_gb = capacity_bytes / (1024**3)
-                            elif capacity_mib:
-                                capacity_gb = capacity_mib / 1024
-                            else:
-                                capacity_gb = 0
-                            
-                            # RAID уровень из Huawei OEM
-                            huawei_oem = vol_data.get("Oem", {}).get("Huawei", {})
-                            raid_type = huawei_oem.get("VolumeRaidLevel", "N/A")
-                            if raid_type and raid_type.startswith("RAID"):
-                                raid_type = raid_type.replace("RAID", "").strip()
-                            
-                            volume = {
-                                "ID": vol_data.get("Id", "N/A"),
-                                "Name": vol_data.get("Name", "N/A"),
-                                "RAID": raid_type,
-                                "Capacity": round(capacity_gb, 2),
-                                "Controller": storage.get("Id", "N/A"),
-                                "Status": vol_data.get("Status", {}).get("Health", "N/A"),
-                            }
-                            volumes.append(volume)
+                        volume = {
+                            "ID": vol_data.get("Id", "N/A"),
+                            "Name": vol_data.get("Name", "N/A"),
+                            "RAID": raid_type,
+                            "Capacity": round(capacity_gb, 2),
+                            "Controller": storage.get("Id", "N/A"),
+                            "Status": vol_data.get("Status", {}).get("Health", "N/A"),
+                        }
+                        volumes.append(volume)
         
         return {"controllers": controllers, "volumes": volumes}
     
     
-    def _get_volumes_from_collection(self, volumes_collection):
+    async def _get_volumes_from_collection(self, volumes_collection):
         """Получение томов из прямой коллекции Volumes"""
         volumes = []
         
-        for vol_member in volumes_collection.get("Members", []):
-            vol_href = self._get_first_href(vol_member)
-            if not vol_href:
-                continue
+        for vol_data in await self._fetch_members(volumes_collection.get("Members", [])):
+            # Размер
+            capacity_bytes = vol_data.get("CapacityBytes")
+            capacity_mib = vol_data.get("CapacityMiB")
             
-            vol_path = self._extract_path(vol_href)
-            vol_data = self._get(vol_path)
+            if capacity_bytes:
+                capacity_gb = capacity_bytes / (1024**3)
+            elif capacity_mib:
+                capacity_gb = capacity_mib / 1024
+            else:
+                capacity_gb = 0
             
-            if vol_data:
-                # Размер
-                capacity_bytes = vol_data.get("CapacityBytes")
-                capacity_mib = vol_data.get("CapacityMiB")
-                
-                if capacity_bytes:
-                    capacity_gb = capacity_bytes / (1024**3)
-                elif capacity_mib:
-                    capacity_gb = capacity_mib / 1024
-                else:
-                    capacity_gb = 0
-                
-                # RAID уровень
-                raid_type = vol_data.get("RAIDType") or vol_data.get("VolumeType", "N/A")
-                if raid_type and isinstance(raid_type, str) and raid_type.startswith("RAID"):
-                    raid_type = raid_type.replace("RAID", "").strip()
-                
-                volume = {
-                    "ID": vol_data.get("Id", "N/A"),
-                    "Name": vol_data.get("Name", "N/A"),
-                    "RAID": raid_type,
-                    "Capacity": round(capacity_gb, 2),
-                    "Controller": "N/A",
-                    "Status": vol_data.get("Status", {}).get("Health", "N/A"),
-                }
-                volumes.append(volume)
+            # RAID уровень
+            raid_type = vol_data.get("RAIDType") or vol_data.get("VolumeType", "N/A")
+            if raid_type and isinstance(raid_type, str) and raid_type.startswith("RAID"):
+                raid_type = raid_type.replace("RAID", "").strip()
+            
+            volume = {
+                "ID": vol_data.get("Id", "N/A"),
+                "Name": vol_data.get("Name", "N/A"),
+                "RAID": raid_type,
+                "Capacity": round(capacity_gb, 2),
+                "Controller": "N/A",
+                "Status": vol_data.get("Status", {}).get("Health", "N/A"),
+            }
+            volumes.append(volume)
         
         return volumes
     
-    def get_power_supplies(self):
+    async def get_power_supplies(self):
         """
         Получение информации о блоках питания
         
@@ -566,7 +460,7 @@ class HuaweiProvider(BaseProvider):
         power_supplies = []
         
         # Находим Chassis ID
-        chassis_data = self._get("/redfish/v1/Chassis")
+        chassis_data = await self._get_cached("/redfish/v1/Chassis")
         if not chassis_data:
             print("   ⚠️  Информация о блоках питания недоступна")
             return power_supplies
@@ -581,7 +475,7 @@ class HuaweiProvider(BaseProvider):
         chassis_id = chassis_href.split("/")[-1] if chassis_href else "1"
         
         # Получаем данные о питании из Chassis
-        power_data = self._get(f"/redfish/v1/Chassis/{chassis_id}/Power")
+        power_data = await self._get(f"/redfish/v1/Chassis/{chassis_id}/Power")
         
         if not power_data:
             print("   ⚠️  Информация о блоках питания недоступна")
@@ -613,7 +507,7 @@ class HuaweiProvider(BaseProvider):
         
         return power_supplies
     
-    def get_fans(self):
+    async def get_fans(self):
         """
         Получение информации о вентиляторах
         
@@ -625,7 +519,7 @@ class HuaweiProvider(BaseProvider):
         fans = []
         
         # Находим Chassis ID
-        chassis_data = self._get("/redfish/v1/Chassis")
+        chassis_data = await self._get_cached("/redfish/v1/Chassis")
         if not chassis_data:
             print("   ⚠️  Информация о вентиляторах недоступна")
             return fans
@@ -640,7 +534,7 @@ class HuaweiProvider(BaseProvider):
         chassis_id = chassis_href.split("/")[-1] if chassis_href else "1"
         
         # Получаем термальные данные из Chassis
-        thermal_data = self._get(f"/redfish/v1/Chassis/{chassis_id}/Thermal")
+        thermal_data = await self._get(f"/redfish/v1/Chassis/{chassis_id}/Thermal")
         
         if not thermal_data:
             print("   ⚠️  Информация о вентиляторах недоступна")
@@ -670,7 +564,7 @@ class HuaweiProvider(BaseProvider):
         
         return fans
     
-    def get_all_inventory(self):
+    async def get_all_inventory(self):
         """
         Собирает всю информацию о сервере
         
@@ -679,15 +573,20 @@ class HuaweiProvider(BaseProvider):
         """
         print(f"\n🔍 Сбор информации о сервере Huawei {self.ip_address}...")
         
+        # Секции собираются параллельно, нагрузку на BMC ограничивает self.limiter
+        sections = await self._collect_sections({
+            "System": self.get_system_info,
+            "Processors": self.get_processor_info,
+            "Memory": self.get_memory_info,
+            "RAID": self.get_raid_info,
+            "Storage": self.get_storage_info,
+            "PSUs": self.get_power_supplies,
+            "FANS": self.get_fans,
+        })
+        
         inventory = {
             "ip_address": self.ip_address,
-            "System": self.get_system_info(),
-            "Processors": self.get_processor_info(),
-            "Memory": self.get_memory_info(),
-            "RAID": self.get_raid_info(),
-            "Storage": self.get_storage_info(),
-            "PSUs": self.get_power_supplies(),
-            "FANS": self.get_fans(),
+            **sections,
         }
         
         return inventory